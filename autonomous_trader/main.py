@@ -5,25 +5,56 @@ import pandas as pd
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-from utils.logger import Notifier, log_trade, log_status, log_equity
+from utils.logger import ConsoleNotifier, Notifier, log_trade, log_status, log_equity
 from utils.trade_executor import PaperBroker
 from utils.data_fetchers import load_crypto_whitelist
 from utils.exchange_utils import get_exchange, filter_supported_symbols
-from strategies.ai_combo_strategy import generate_signal
+from strategies.ai_combo_strategy import GATE_STATS, generate_signal, generate_signals, ohlcv_panel, signal_at
+from strategies.indicator_engine import IndicatorEngine
+from strategies.signal_cache import SignalCache, config_fingerprint
 from utils.momentum import apply_momentum_entry
 from utils.scanner_helper import run_scanner
 from utils.trending_feed import start_trending_feed
+from utils.bar_builder import parse_timeframe
+from utils.bar_store import BARS_DIR, open_bar_store, load_recent_bars, flush_all
+from utils.candle_fetcher import CandleFetcher
+from utils.candle_cache import OHLCV_COLUMNS, CandleCache, bars_array, bars_frame, splice_bars
+from utils.event_scheduler import EventScheduler
+from utils.exit_engine import ExitEngine
+from utils.feed_recorder import FeedRecorder, RECORDINGS_DIR, recording_path, run_replay
 
 BASE = os.path.dirname(__file__)
 with open(os.path.join(BASE, "config", "config.json"), "r") as f:
     CFG = json.load(f)
 
 EXCHANGE = get_exchange()
+# every REST candle request (loop backfills, hub subscriptions) shares one rate limiter
+CANDLE_FETCHER = CandleFetcher.from_config(EXCHANGE.fetch_ohlcv, CFG)
+# REST bars per (symbol, timeframe); backfills only request what is missing
+CANDLE_CACHE = CandleCache()
+
+# ---------- Feed recording / offline replay of a recording instead of the websocket
+RECORDER_CFG = CFG.get("feed_recorder", {})
+REPLAY_CFG = CFG.get("replay", {})
+# a replay trades on recorded data only: no REST backfill, bar store, persisted
+# broker state, trade/status logs or notifications
+REPLAY_FILE = REPLAY_CFG.get("file") or None
+
+# ---------- Persistent bar store (warm restarts without REST backfill)
+BAR_STORE_ENABLED = bool(CFG.get("bar_store", {}).get("enable", True)) and not REPLAY_FILE
+BAR_STORE_DIR = BARS_DIR if BAR_STORE_ENABLED else None
 
 # ---------- Live hub selection (Kraken-only or legacy cryptofeed)
 HAS_CF = True
+LIVE_BACKFILL_BARS = 720  # 1m bars per hub backfill request (Kraken's REST max); stored history only fetches its gap
+# streaming ATR windows kept per symbol: the default 14 plus whatever the scanner ranks on
+ATR_WINDOWS = sorted({14, int(CFG.get("scanner", {}).get("atr_window") or 14)})
 _feed_hub = None
 
+def hub_backfill(requests):
+    """The Kraken hub's batched 1m backfill: ``(symbol, since)`` pairs, fetched concurrently."""
+    return CANDLE_FETCHER.fetch_many([(sym, since, LIVE_BACKFILL_BARS) for sym, since in requests], "1m")
+
 def _symbols_from_cfg_as_slash(cfg):
     df = cfg.get("data_feeds", {})
     syms = df.get("symbols") or cfg.get("trade_universe", []) or ["BTC/USDT", "ETH/USDT"]
@@ -37,13 +68,21 @@ def _symbols_from_cfg_as_slash(cfg):
     return out
 
 try:
-    if (CFG.get("market_data") or "").lower() == "kraken_ws":
-        # Use our new Kraken-only hub
+    MARKET_DATA = (CFG.get("market_data") or "").lower()
+    if MARKET_DATA in ("kraken_ws", "kraken_native"):
+        # Kraken-only hub: "kraken_native" parses Kraken's websocket directly,
+        # "kraken_ws" goes through cryptofeed
         from utils.market_data_kraken import KrakenHub, register_global_hub
+        from utils.trade_ring import TRADE_RING_CAPACITY
+        hub_cls = KrakenHub
+        if MARKET_DATA == "kraken_native":
+            from utils.market_data_kraken_ws import KrakenWsHub as hub_cls
         kr_syms = _symbols_from_cfg_as_slash(CFG)
-        _feed_hub = KrakenHub(symbols=kr_syms)
+        trade_cap = int(CFG.get("data_feeds", {}).get("trade_buffer_size", TRADE_RING_CAPACITY))
+        _feed_hub = hub_cls(symbols=kr_syms, trade_capacity=trade_cap, bar_store_dir=BAR_STORE_DIR,
+                            backfill=None if REPLAY_FILE else hub_backfill, atr_windows=ATR_WINDOWS)
         register_global_hub(_feed_hub)
-        print(f"[BOOT] Kraken hub enabled for: {', '.join(kr_syms)}")
+        print(f"[BOOT] Kraken hub ({hub_cls.__name__}) enabled for: {', '.join(kr_syms)}")
     else:
         # Fallback: legacy multi-exchange cryptofeed hub
         from utils.market_data_cryptofeed import CryptoFeedHub, register_global_hub
@@ -54,48 +93,129 @@ try:
                 symbols_src = ["BTC-USDT", "ETH-USDT"]
             exchanges_src = df.get("exchanges") or [ (cfg.get("exchange","BINANCE")).upper() ]
             channels_src = df.get("channels") or ["ticker", "trades"]
-            return {"data_feeds": {"exchanges": exchanges_src, "channels": channels_src, "symbols": symbols_src, "normalize_symbols": True}}
+            feed_cfg = {"exchanges": exchanges_src, "channels": channels_src, "symbols": symbols_src, "normalize_symbols": True,
+                        "atr_windows": ATR_WINDOWS}
+            if df.get("trade_buffer_size"):
+                feed_cfg["trade_buffer_size"] = df["trade_buffer_size"]
+            if BAR_STORE_DIR:
+                feed_cfg["bar_store_dir"] = BAR_STORE_DIR
+            return {"data_feeds": feed_cfg}
         _feed_hub = CryptoFeedHub(_mk_feed_cfg(CFG))
         register_global_hub(_feed_hub)
 except Exception as e:
     print("[BOOT] Live market data hub unavailable:", e)
     HAS_CF = False
 
+if HAS_CF and _feed_hub is not None and RECORDER_CFG.get("enable") and not REPLAY_FILE:
+    _feed_hub.recorder = FeedRecorder(recording_path(RECORDER_CFG.get("dir") or RECORDINGS_DIR))
+    print(f"[BOOT] Recording feed to {_feed_hub.recorder.path}")
+
+# ---------- Event scheduling: the trading loop wakes on bar closes and position price updates
+SCHED_CFG = CFG.get("scheduler", {})
+SCHEDULER = EventScheduler.from_config(CFG)
+if HAS_CF and _feed_hub is not None:
+    _feed_hub.events = SCHEDULER
+
 # ---------- helpers
-def fetch_candles(symbol, timeframe="5m", limit=200):
+def local_candles(symbol, timeframe="5m", limit=200):
+    """Bars from the live hub and the bar store; ``(df, need_backfill)``."""
     df_live = pd.DataFrame()
     # 1) Try live (synthetic) candles from the hub
     if HAS_CF and _feed_hub is not None:
         try:
             tmp = _feed_hub.ohlcv_df(symbol, timeframe=timeframe, limit=limit)
             if tmp is not None and not tmp.empty:
-                df_live = tmp[["time","open","high","low","close","volume"]].copy()
+                df_live = tmp[OHLCV_COLUMNS].copy()
         except Exception as e:
             print(f"[WARN] ohlcv_df error {symbol}: {e}")
 
-    # 2) If we have too few bars, backfill from REST (Kraken via ccxt)
-    need_backfill = df_live.empty or len(df_live) < min(100, limit // 2)
-    df_rest = pd.DataFrame()
-    if need_backfill:
-        try:
-            ohlcv = EXCHANGE.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-            if ohlcv:
-                df_rest = pd.DataFrame(ohlcv, columns=["time","open","high","low","close","volume"])
-        except Exception as e:
-            print(f"[WARN] fetch_ohlcv error {symbol}: {e}")
-
-    # 3) Merge (REST first for history, live last to overwrite newest points)
-    if not df_live.empty and not df_rest.empty:
-        df = pd.concat([df_rest, df_live], ignore_index=True)
-        df = df.drop_duplicates(subset=["time"], keep="last").sort_values("time")
-        return df.tail(limit).reset_index(drop=True)
-    if not df_live.empty:
-        return df_live.tail(limit).reset_index(drop=True)
-    if not df_rest.empty:
-        return df_rest.tail(limit).reset_index(drop=True)
-
-    return pd.DataFrame()
+    # 2) If we have too few bars, extend with the on-disk bar store first
+    min_bars = min(100, limit // 2)
+    if BAR_STORE_ENABLED and (df_live.empty or len(df_live) < min_bars):
+        stored = load_recent_bars(symbol, timeframe, time.time(), limit)
+        if len(stored):
+            df_store = pd.DataFrame(stored, columns=OHLCV_COLUMNS)
+            df_store["time"] = df_store["time"].astype("int64")
+            if df_live.empty:
+                # stored bars have no forming bar and may lag by MAX_GAP_BARS:
+                # seed the candle cache with them and let REST top them up
+                CANDLE_CACHE.seed(symbol, timeframe, stored, parse_timeframe(timeframe) * 1000)
+            elif df_store["time"].iloc[-1] + parse_timeframe(timeframe) * 1000 >= df_live["time"].iloc[0]:
+                # only use stored history that connects to the live bars
+                df_live = bars_frame(splice_bars(bars_array(df_store), bars_array(df_live)))
+
+    # 3) No live bars, or still too few: the caller backfills from REST
+    return df_live, df_live.empty or len(df_live) < min_bars
+
+def merge_rest_candles(symbol, timeframe, limit, df_live, ohlcv):
+    """
+    Add a REST reply to the symbol's candle cache and return the cached
+    history with the local bars over the newest points.
+    """
+    if ohlcv:
+        new = CANDLE_CACHE.update(symbol, timeframe, ohlcv, parse_timeframe(timeframe) * 1000)
+        if BAR_STORE_ENABLED:
+            _store_closed_bars(symbol, timeframe, new.tolist())
+    return CANDLE_CACHE.frame(symbol, timeframe, df_live, limit, parse_timeframe(timeframe) * 1000)
+
+def backfill_request(symbol, timeframe, limit):
+    """``(symbol, since, limit)``: only the bars missing from the candle cache."""
+    since, n = CANDLE_CACHE.request(symbol, timeframe, limit, time.time() * 1000, parse_timeframe(timeframe) * 1000)
+    return symbol, since, n
 
+def fetch_candles(symbol, timeframe="5m", limit=200):
+    df_live, need_backfill = local_candles(symbol, timeframe, limit)
+    if not need_backfill or REPLAY_FILE:
+        return df_live.tail(limit).reset_index(drop=True)
+    ohlcv = None
+    try:
+        _, since, n = backfill_request(symbol, timeframe, limit)
+        ohlcv = CANDLE_FETCHER.fetch_one(symbol, timeframe, n, since)
+    except Exception as e:
+        print(f"[WARN] fetch_ohlcv error {symbol}: {e}")
+    return merge_rest_candles(symbol, timeframe, limit, df_live, ohlcv)
+
+def iter_candles(symbols, timeframe="5m", limit=200):
+    """
+    ``(symbol, df)`` for every symbol, as ``fetch_candles`` would build it.
+    Symbols with enough local bars come first, in order; the ones that need
+    a REST backfill follow as their requests complete (never in a replay).
+    """
+    pending = {}
+    for sym in symbols:
+        df_live, need_backfill = local_candles(sym, timeframe, limit)
+        if need_backfill and not REPLAY_FILE:
+            pending[sym] = df_live
+        else:
+            yield sym, df_live.tail(limit).reset_index(drop=True)
+    requests = [backfill_request(sym, timeframe, limit) for sym in pending]
+    for sym, ohlcv, err in CANDLE_FETCHER.fetch_many(requests, timeframe):
+        if err is not None:
+            print(f"[WARN] fetch_ohlcv error {sym}: {err}")
+        yield sym, merge_rest_candles(sym, timeframe, limit, pending[sym], ohlcv)
+
+def _store_closed_bars(symbol, timeframe, ohlcv):
+    """Persist REST bars that have already closed so the next restart can skip REST."""
+    try:
+        step_ms = parse_timeframe(timeframe) * 1000
+        now_ms = time.time() * 1000
+        open_bar_store(symbol, timeframe).extend(r for r in ohlcv if r[0] + step_ms <= now_ms)
+    except (OSError, ValueError) as e:
+        print(f"[STORE] {symbol} {timeframe}: {e}")
+
+
+def sync_live_subscriptions(wl, held):
+    """Keep the live hub subscribed to the active list, ``held`` positions and configured symbols."""
+    if REPLAY_FILE or not (HAS_CF and _feed_hub is not None and hasattr(_feed_hub, "update_subscriptions")):
+        return
+    wanted, seen = [], set()
+    for s in list(wl) + list(held) + _symbols_from_cfg_as_slash(CFG):
+        if s not in seen:
+            seen.add(s); wanted.append(s)
+    try:
+        _feed_hub.update_subscriptions(wanted)
+    except Exception as e:
+        print("[LOOP] live subscription update failed:", e)
 
 def maybe_run_scanner(last_scan_ts):
     now = time.time()
@@ -110,6 +230,79 @@ def maybe_run_scanner(last_scan_ts):
         return now
     return last_scan_ts
 
+def refresh_whitelist(wl):
+    """Trending symbols first, then the scanner's; ``wl`` is kept if both are empty or unreadable."""
+    try:
+        scanner_syms = filter_supported_symbols(EXCHANGE, load_crypto_whitelist()) or []
+        trending_path = os.path.join(BASE, "data", "runtime", "runtime_whitelist.json")
+        trending_syms = []
+        if os.path.exists(trending_path):
+            try:
+                with open(trending_path, "r", encoding="utf-8") as f:
+                    trending_syms = json.load(f)
+            except Exception:
+                pass
+
+        merged_syms, seen = [], set()
+        for s in trending_syms + scanner_syms:
+            if s not in seen:
+                seen.add(s); merged_syms.append(s)
+
+        max_syms = CFG.get("scanner", {}).get("max_symbols", 20)
+        wl = merged_syms[:max_syms] if merged_syms else wl
+        print(f"[WL] Active trading list ({len(wl)}): {', '.join(wl)}")
+    except Exception as e:
+        print("[LOOP] whitelist merge failed:", e)
+    return wl
+
+# streaming indicator state per (symbol, timeframe); only the trading loop touches it
+_indicator_engines = {}
+
+def indicator_engine_for(symbol, timeframe):
+    """Shared IndicatorEngine for a symbol, or None when strategy.indicator_engine is off."""
+    if not CFG.get("strategy", {}).get("indicator_engine", False):
+        return None
+    key = (symbol, timeframe)
+    engine = _indicator_engines.get(key)
+    if engine is None:
+        engine = _indicator_engines[key] = IndicatorEngine.from_config(CFG)
+    return engine
+
+def prune_indicator_engines(active):
+    for key in [k for k in _indicator_engines if k[0] not in active]:
+        del _indicator_engines[key]
+
+# signals of unchanged frames are reused between loop passes
+SIGNAL_CACHE_CFG = CFG.get("signal_cache", {})
+_signal_cache = (SignalCache(SIGNAL_CACHE_CFG.get("max_entries", 2048))
+                 if SIGNAL_CACHE_CFG.get("enable", True) else None)
+
+def _compute_signals(candidates, timeframe):
+    strat = CFG.get("strategy", {})
+    if strat.get("indicator_engine", False) or strat.get("indicator_backend", "numpy") == "pandas":
+        return [generate_signal(df, CFG, indicator_engine_for(sym, timeframe)) for sym, df, _ in candidates]
+    result = generate_signals(ohlcv_panel([df for _, df, _ in candidates]), CFG)
+    return [signal_at(result, i) for i in range(len(candidates))]
+
+def score_candidates(candidates, timeframe):
+    """
+    Signals for ``(symbol, frame, price)`` candidates, in order. Frames seen
+    unchanged since an earlier pass come from the signal cache. The rest are
+    scored one at a time when they have an IndicatorEngine (or the pandas
+    backend is selected), otherwise together in one pass over a price panel.
+    """
+    if _signal_cache is None:
+        return _compute_signals(candidates, timeframe)
+    cfg_hash = config_fingerprint(CFG)
+    keys = [_signal_cache.key(sym, timeframe, df, cfg_hash) for sym, df, _ in candidates]
+    sigs = [_signal_cache.get(k) for k in keys]
+    todo = [i for i, sig in enumerate(sigs) if sig is None]
+    if todo:
+        for i, sig in zip(todo, _compute_signals([candidates[i] for i in todo], timeframe)):
+            _signal_cache.put(keys[i], sig)
+            sigs[i] = sig
+    return sigs
+
 def compute_unrealized_pnl(broker, prices):
     pnl = 0.0
     for sym, pos in broker.positions.items():
@@ -119,6 +312,18 @@ def compute_unrealized_pnl(broker, prices):
         pnl += pos["qty"] * (price - pos["entry"])
     return pnl
 
+def record_trade(side, sym, qty, price, extra):
+    """``log_trade``; a replay's trades are printed only, never added to trades.csv."""
+    if REPLAY_FILE:
+        print(f"[REPLAY] {side} {sym} {qty:.8f} @ {price:.4f} {extra}")
+    else:
+        log_trade(side, sym, qty, price, extra)
+
+def log_exit(notifier, sym, price, r, reason):
+    """ExitEngine ``on_exit`` callback; runs on its worker thread for tick-driven exits."""
+    record_trade("SELL", sym, r["qty"], price, {"pnl": r["pnl"], "reason": reason})
+    notifier.send(f"SELL {sym} @ {price:.4f} | PnL: {r['pnl']:.2f} ({reason})")
+
 def get_exit_cfg():
     exits = CFG.get("exits", {})
     trailing = CFG.get("trailing_stop", {})
@@ -132,11 +337,27 @@ def get_exit_cfg():
         "atr_trail_multiplier": trailing.get("atr_trail_multiplier"),
     }
 
+def can_open(broker, exit_engine):
+    """``broker.can_open()`` (it rolls the day) under the exit engine's lock."""
+    with exit_engine.lock:
+        return broker.can_open()
+
 # ---------- trading loop (background thread)
 def trading_loop():
-    n = Notifier(CFG)
-    broker = PaperBroker()
+    if REPLAY_FILE:
+        # recorded data must not touch the live wallet, logs or alert channels
+        n = ConsoleNotifier()
+        broker = PaperBroker(persist=False, logger=n)
+    else:
+        n = Notifier(CFG)
+        broker = PaperBroker()
     exit_cfg = get_exit_cfg()
+    # stops and take-profits are checked on every trade print. The engine's worker
+    # thread sells, so this thread calls the broker under exit_engine.lock.
+    exit_engine = ExitEngine(broker, on_exit=lambda *args: log_exit(n, *args))
+    exit_engine.sync()
+    if HAS_CF and _feed_hub is not None:
+        _feed_hub.exit_engine = exit_engine
 
     debug_verbose = CFG.get("debug", {}).get("verbose")
 
@@ -151,45 +372,44 @@ def trading_loop():
     print(f"[BOOT] Starting with {len(wl)} symbols: {', '.join(wl[:10])}{'…' if len(wl)>10 else ''}")
 
     last_scan_ts = 0.0
+    last_refresh = float("-inf")
+    refresh_sec = SCHED_CFG.get("refresh_sec", 30)
     prices = {}
     heartbeat_every = max(10, CFG.get("logging", {}).get("print_status_every_sec", 30))
     last_beat = 0
     debug_printed = set()
 
     while True:
-        last_scan_ts = maybe_run_scanner(last_scan_ts)
-
-        try:
-            scanner_syms = filter_supported_symbols(EXCHANGE, load_crypto_whitelist()) or []
-            trending_path = os.path.join(BASE, "data", "runtime", "runtime_whitelist.json")
-            trending_syms = []
-            if os.path.exists(trending_path):
-                try:
-                    with open(trending_path, "r", encoding="utf-8") as f:
-                        trending_syms = json.load(f)
-                except Exception:
-                    pass
-
-            merged_syms, seen = [], set()
-            for s in trending_syms + scanner_syms:
-                if s not in seen:
-                    seen.add(s); merged_syms.append(s)
-
-            max_syms = CFG.get("scanner", {}).get("max_symbols", 20)
-            wl = merged_syms[:max_syms] if merged_syms else wl
-            print(f"[WL] Active trading list ({len(wl)}): {', '.join(wl)}")
-        except Exception as e:
-            print("[LOOP] whitelist merge failed:", e)
+        with exit_engine.lock:
+            held = list(broker.positions)
+        if time.time() - last_refresh >= refresh_sec:
+            last_scan_ts = maybe_run_scanner(last_scan_ts)
+            wl = refresh_whitelist(wl)
+            sync_live_subscriptions(wl, held)
+            prune_indicator_engines(set(wl))
+            CANDLE_CACHE.retain(wl)
+            last_refresh = time.time()
+        timeframe = CFG.get("timeframe_crypto", "5m")
+
+        # sleep until a bar closes, a held symbol's price moves or a quiet symbol is due
+        SCHEDULER.watch(held)
+        entries, exits = SCHEDULER.wait(wl, last_refresh + refresh_sec - time.time())
+
+        for sym, (price, event_time) in exits.items():
+            if sym in broker.positions:
+                prices[sym] = price
+                exit_engine.check(sym, price)
+                SCHEDULER.record("price", event_time)
 
         processed = 0
-        for sym in wl[:50]:
+        scan_started = time.perf_counter()
+        candidates = []  # flat symbols with candles, scored together once exits are done
+        for sym, df in iter_candles(list(entries), timeframe):
             live_price = None
             if HAS_CF and _feed_hub is not None:
                 lp, _vol = _feed_hub.snapshot(sym)
                 live_price = lp
 
-            df = fetch_candles(sym, CFG.get("timeframe_crypto", "5m"))
-
             if sym not in debug_printed:
                 if df.empty:
                     print(f"[DATA] {sym}: no candles yet (live+rest)")
@@ -212,50 +432,68 @@ def trading_loop():
             processed += 1
 
             if sym in broker.positions:
-                should_exit, reason = broker.should_exit(sym, price)
-                if should_exit:
-                    r = broker.sell(sym, price)
-                    if r:
-                        log_trade("SELL", sym, r["qty"], price, {"pnl": r["pnl"], "reason": reason})
-                        n.send(f"SELL {sym} @ {price:.4f} | PnL: {r['pnl']:.2f} ({reason})")
+                exit_engine.check(sym, price)
+                SCHEDULER.record("bar", entries[sym])
                 continue
 
-            if not df.empty and broker.can_open():
-                sig = generate_signal(df, CFG)
+            if not df.empty:
+                candidates.append((sym, df, price))
+
+        if candidates and can_open(broker, exit_engine):
+            # backfilled symbols arrive out of order; entries keep whitelist priority
+            rank = {s: i for i, s in enumerate(wl)}
+            candidates.sort(key=lambda c: rank[c[0]])
+            for (sym, df, price), sig in zip(candidates, score_candidates(candidates, timeframe)):
+                if not can_open(broker, exit_engine):
+                    break
                 sig = apply_momentum_entry(df, sig, CFG, debug_verbose)
+                SCHEDULER.record("bar", entries[sym])
 
                 if debug_verbose and sig.get("signal") == "HOLD":
                     print(f"[HOLD] {sym} score={sig.get('score', 0):.2f} gate={sig.get('failed')}")
                 if debug_verbose:
                     print(f"[SIG] {sym} -> {sig}")
                 if sig.get("signal") == "BUY":
-                    o = broker.buy(sym, price, {
-                        "score": sig.get("score"),
-                        "take_profit_pct": exit_cfg["take_profit_pct"],
-                        "stop_loss_pct": exit_cfg["stop_loss_pct"],
-                        "breakeven_trigger_pct": exit_cfg["breakeven_trigger_pct"],
-                        "trailing_stop_pct": exit_cfg["trailing_stop_pct"],
-                        "trailing_enable": exit_cfg["trailing_enable"],
-                        "activate_profit_pct": exit_cfg["activate_profit_pct"],
-                        "atr_trail_multiplier": exit_cfg["atr_trail_multiplier"],
-                    })
+                    with exit_engine.lock:  # buy() re-checks can_open(); both under the lock
+                        o = broker.buy(sym, price, {
+                            "score": sig.get("score"),
+                            "take_profit_pct": exit_cfg["take_profit_pct"],
+                            "stop_loss_pct": exit_cfg["stop_loss_pct"],
+                            "breakeven_trigger_pct": exit_cfg["breakeven_trigger_pct"],
+                            "trailing_stop_pct": exit_cfg["trailing_stop_pct"],
+                            "trailing_enable": exit_cfg["trailing_enable"],
+                            "activate_profit_pct": exit_cfg["activate_profit_pct"],
+                            "atr_trail_multiplier": exit_cfg["atr_trail_multiplier"],
+                        })
+                        exit_engine.sync()
                     if o:
-                        log_trade("BUY", sym, o["qty"], price, {"score": sig.get("score")})
+                        record_trade("BUY", sym, o["qty"], price, {"score": sig.get("score")})
                         n.send(f"BUY {sym} @ {price:.4f} [score={sig.get('score', 0):.2f}]")
 
+        scan_sec = time.perf_counter() - scan_started
         now = time.time()
         if now - last_beat >= heartbeat_every:
-            unreal = compute_unrealized_pnl(broker, prices)
-            mv = sum([pos["qty"] * prices.get(sym, pos["entry"]) for sym, pos in broker.positions.items()])
-            cost = sum([pos["qty"] * pos["entry"] for pos in broker.positions.values()])
-            equity = broker.balance + mv - cost
-            log_status(broker.balance, len(broker.positions), unreal)
-            log_equity(now, broker.balance, equity)
-            print(f"[HB] cash={broker.balance:.2f} open={len(broker.positions)} unreal={unreal:.2f} scanned={processed}")
+            with exit_engine.lock:  # the exit worker may be selling
+                unreal = compute_unrealized_pnl(broker, prices)
+                mv = sum([pos["qty"] * prices.get(sym, pos["entry"]) for sym, pos in broker.positions.items()])
+                cost = sum([pos["qty"] * pos["entry"] for pos in broker.positions.values()])
+                equity = broker.balance + mv - cost
+            if not REPLAY_FILE:
+                log_status(broker.balance, len(broker.positions), unreal)
+                log_equity(now, broker.balance, equity)
+            # feed latency vs loop time tells a lagging feed apart from a slow trading loop
+            feed = ""
+            if HAS_CF and _feed_hub is not None and hasattr(_feed_hub, "stats"):
+                feed = " " + _feed_hub.stats.heartbeat(now)
+            if _signal_cache is not None:
+                feed += " " + _signal_cache.heartbeat()
+            feed += " " + GATE_STATS.heartbeat()
+            feed += " " + SCHEDULER.heartbeat()
+            feed += " " + exit_engine.heartbeat()
+            print(f"[HB] cash={broker.balance:.2f} open={len(broker.positions)} unreal={unreal:.2f} "
+                  f"scanned={processed} scan={scan_sec:.2f}s{feed}")
             last_beat = now
 
-        time.sleep(10)
-
 def run():
     print("[BOOT] Launching bot…")
     print(f"[BOOT] Exchange: {CFG.get('exchange')} | Timeframe: {CFG.get('timeframe_crypto','5m')}")
@@ -267,12 +505,18 @@ def run():
     t = threading.Thread(target=trading_loop, daemon=False)
     t.start()
 
-    # Run the live hub in the main thread (blocking)
+    # Run the live hub (or a recorded session) in the main thread (blocking)
     if HAS_CF and _feed_hub is not None:
         try:
-            _feed_hub.run()
+            if REPLAY_FILE:
+                run_replay(REPLAY_FILE, _feed_hub, REPLAY_CFG.get("speed", 60))
+            else:
+                _feed_hub.run()
         except KeyboardInterrupt:
             print("\n[BOOT] Shutting down…")
+        finally:
+            if getattr(_feed_hub, "recorder", None) is not None:
+                _feed_hub.recorder.close()
 
     # If hub returned (or not present), keep process alive so trading thread runs
     try:
@@ -280,6 +524,8 @@ def run():
             time.sleep(3600)
     except KeyboardInterrupt:
         print("\n[BOOT] Shutting down…")
+    finally:
+        flush_all()
 
 if __name__ == "__main__":
     run()
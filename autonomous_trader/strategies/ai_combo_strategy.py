@@ -1,6 +1,24 @@
+import time
+from collections import Counter, defaultdict
+
 import numpy as np
 import pandas as pd
 
+# NumPy versions of the indicators below. Like utils/trade_executor.py, fall
+# back to loading the sibling file directly when this module is loaded by
+# path (tests) rather than as part of the strategies package.
+try:  # pragma: no cover - import fallback
+    from strategies import indicator_kernels as kernels
+except Exception:  # pragma: no cover
+    import importlib.util, pathlib
+
+    _spec = importlib.util.spec_from_file_location(
+        "indicator_kernels", pathlib.Path(__file__).resolve().parent / "indicator_kernels.py"
+    )
+    kernels = importlib.util.module_from_spec(_spec)
+    assert _spec.loader is not None
+    _spec.loader.exec_module(kernels)
+
 # ---------- indicators
 def ema(series: pd.Series, span: int) -> pd.Series:
     return series.ewm(span=span, adjust=False).mean()
@@ -43,33 +61,196 @@ def macd(series: pd.Series, fast=12, slow=26, signal=9):
     hist = macd_line - signal_line
     return macd_line, signal_line, hist
 
+def _kernel_columns(high, low, close, volume) -> dict:
+    """The strategy's indicator columns from the NumPy kernels (1D series or 2D panels)."""
+    atr_pct = kernels.atr(high, low, close, 14)
+    atr_pct /= close
+    atr_pct[np.isnan(atr_pct)] = 0.0
+    return {
+        "close": close,
+        "volume": volume,
+        "ema20": kernels.ema(close, 20),
+        "ema50": kernels.ema(close, 50),
+        "ema200": kernels.ema(close, 200),
+        "rsi": kernels.rsi(close, 14),
+        "atr_pct": atr_pct,
+        "vol_ma": kernels.rolling_mean(volume, 20),
+        "macd_hist": kernels.macd(close, 12, 26, 9)[2],
+        "hh": kernels.rolling_max(high, 20),
+        "ll": kernels.rolling_min(low, 20),
+    }
+
+# ---------- gate statistics
+class GateStats:
+    """
+    Running totals of strategy outcomes (the gate that rejected each
+    evaluation, or BUY / None) and of the time spent computing each
+    indicator on the lazy NumPy path.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.outcomes = Counter()
+        self.feature_sec = defaultdict(float)
+        self.feature_calls = Counter()
+
+    def record(self, sig: dict) -> None:
+        self.outcomes[sig.get("failed") or sig["signal"]] += 1
+
+    def record_feature(self, name: str, seconds: float) -> None:
+        self.feature_sec[name] += seconds
+        self.feature_calls[name] += 1
+
+    def summary(self) -> dict:
+        return {
+            "evaluations": sum(self.outcomes.values()),
+            "outcomes": dict(self.outcomes.most_common()),
+            "features": {name: {"calls": self.feature_calls[name], "total_ms": sec * 1000.0}
+                         for name, sec in sorted(self.feature_sec.items(), key=lambda kv: -kv[1])},
+        }
+
+    def heartbeat(self) -> str:
+        """One-line digest for the trading loop's ``[HB]`` line."""
+        if not self.outcomes:
+            return "gates=idle"
+        outcomes = ",".join(f"{k}:{v}" for k, v in self.outcomes.most_common(4))
+        slowest = max(self.feature_sec.items(), key=lambda kv: kv[1], default=None)
+        feat = f" feat_max={slowest[0]}:{slowest[1]:.1f}s" if slowest else ""
+        return f"gates={outcomes}{feat}"
+
+# shared by every generate_signal / generate_signals call in the process
+GATE_STATS = GateStats()
+
+class _LazyFeatures:
+    """
+    The strategy's indicator columns for one frame, computed with the NumPy
+    kernels the first time a gate reads them. ``generate_signal`` checks its
+    gates cheapest-first, so a symbol rejected early never pays for ADX,
+    MACD, RSI or the long EMAs.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self._cols = {k: df[k].to_numpy(dtype=np.float64) for k in PANEL_FIELDS}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        col = self._cols.get(name)
+        if col is None:
+            started = time.perf_counter()
+            col = self._cols[name] = self._compute(name)
+            GATE_STATS.record_feature(name, time.perf_counter() - started)
+        return col
+
+    def row(self, i: int) -> "_LazyRow":
+        return _LazyRow(self, i)
+
+    def adx(self, period: int) -> np.ndarray:
+        return self[f"adx{int(period)}"]
+
+    def _compute(self, name: str) -> np.ndarray:
+        if name.startswith("adx"):  # ADX for whichever period is configured
+            return kernels.adx(self["high"], self["low"], self["close"], int(name[3:]))
+        return getattr(self, "_" + name)()
+
+    def _atr_pct(self) -> np.ndarray:
+        atr_pct = kernels.atr(self["high"], self["low"], self["close"], 14)
+        atr_pct /= self["close"]
+        atr_pct[np.isnan(atr_pct)] = 0.0
+        return atr_pct
+
+    def _vol_ma(self) -> np.ndarray:
+        return kernels.rolling_mean(self["volume"], 20)
+
+    def _ema20(self) -> np.ndarray:
+        return kernels.ema(self["close"], 20)
+
+    def _ema50(self) -> np.ndarray:
+        return kernels.ema(self["close"], 50)
+
+    def _ema200(self) -> np.ndarray:
+        return kernels.ema(self["close"], 200)
+
+    def _rsi(self) -> np.ndarray:
+        return kernels.rsi(self["close"], 14)
+
+    def _macd_hist(self) -> np.ndarray:
+        return kernels.macd(self["close"], 12, 26, 9)[2]
+
+    def _hh(self) -> np.ndarray:
+        return kernels.rolling_max(self["high"], 20)
+
+    def _ll(self) -> np.ndarray:
+        return kernels.rolling_min(self["low"], 20)
+
+class _LazyRow:
+    """One bar of a ``_LazyFeatures``: ``row["ema50"]`` computes the column on first use."""
+    __slots__ = ("_features", "_i")
+
+    def __init__(self, features: _LazyFeatures, i: int):
+        self._features = features
+        self._i = i
+
+    def __getitem__(self, name: str) -> float:
+        return float(self._features[name][self._i])
+
 # ---------- strategy
-def generate_signal(df: pd.DataFrame, cfg) -> dict:
+def generate_signal(df: pd.DataFrame, cfg, engine=None) -> dict:
+    """
+    Score the last bar of ``df``. Indicators come from the NumPy kernels
+    (strategies/indicator_kernels.py), computed lazily as the gates need
+    them, or from the pandas functions above when
+    ``strategy.indicator_backend`` is ``"pandas"``; both give the same
+    values. With an ``IndicatorEngine`` (strategies/indicator_engine.py) they
+    come from its streaming state, which is caught up with ``df`` first; the
+    result is the same as recomputing them over the bars the engine has seen.
+    Every outcome is counted in ``GATE_STATS``.
+    """
+    sig = _generate_signal(df, cfg, engine)
+    GATE_STATS.record(sig)
+    return sig
+
+def _generate_signal(df: pd.DataFrame, cfg, engine=None) -> dict:
     if len(df) < 60:
         return {"signal": "HOLD", "score": 0.0, "failed": "warmup"}
 
-    df = df.copy()
+    filters_cfg = cfg.get("strategy", {}).get("filters", {})
+    avg_period = filters_cfg.get("avg_volume_period", 20)
+    adx_period = filters_cfg.get("adx_period")
+    use_pandas = engine is None and cfg.get("strategy", {}).get("indicator_backend", "numpy") == "pandas"
+    features = None
+
+    if engine is not None:
+        prev, last = engine.sync(df)
+        avg_vol = last.get(f"vol_mean_{avg_period}")
+        if avg_vol is None or avg_vol != avg_vol:
+            avg_vol = df["volume"].tail(avg_period).mean()
+    elif not use_pandas:
+        # gates below are ordered cheapest first; each reads only the columns it needs
+        features = _LazyFeatures(df)
+        prev, last = features.row(-2), features.row(-1)
+        avg_vol = kernels.tail_mean(features["volume"], avg_period)
+    else:
+        df = df.copy()
 
-    # core indicators
-    df["ema20"]  = ema(df["close"], 20)
-    df["ema50"]  = ema(df["close"], 50)
-    df["ema200"] = ema(df["close"], 200)
-    df["rsi"]    = rsi(df["close"], 14)
-    df["atr"]    = atr(df, 14)
-    df["atr_pct"] = (df["atr"] / df["close"]).fillna(0.0)
-    df["vol_ma"] = df["volume"].rolling(20).mean()
+        # core indicators
+        df["ema20"]  = ema(df["close"], 20)
+        df["ema50"]  = ema(df["close"], 50)
+        df["ema200"] = ema(df["close"], 200)
+        df["rsi"]    = rsi(df["close"], 14)
+        df["atr"]    = atr(df, 14)
+        df["atr_pct"] = (df["atr"] / df["close"]).fillna(0.0)
+        df["vol_ma"] = df["volume"].rolling(20).mean()
 
-    macd_line, signal_line, hist = macd(df["close"], 12, 26, 9)
-    df["macd_hist"] = hist
+        macd_line, signal_line, hist = macd(df["close"], 12, 26, 9)
+        df["macd_hist"] = hist
 
-    # breakout levels
-    lookback = 20
-    df["hh"] = df["high"].rolling(lookback).max()
-    df["ll"] = df["low"].rolling(lookback).min()
+        # breakout levels
+        lookback = 20
+        df["hh"] = df["high"].rolling(lookback).max()
+        df["ll"] = df["low"].rolling(lookback).min()
 
-    last   = df.iloc[-1]
-    prev   = df.iloc[-2]
-    filters_cfg = cfg.get("strategy", {}).get("filters", {})
+        last   = df.iloc[-1]
+        prev   = df.iloc[-2]
+        avg_vol = df["volume"].tail(avg_period).mean()
 
     # ---- gates
     # volatility gate: enforce ATR%% ceiling and optional floor
@@ -79,29 +260,34 @@ def generate_signal(df: pd.DataFrame, cfg) -> dict:
         return {"signal": "HOLD", "score": 0.0, "failed": "atr_range"}
 
     # average volume gate
-    avg_period = filters_cfg.get("avg_volume_period", 20)
     min_avg_vol = filters_cfg.get("min_avg_volume", 0)
-    avg_vol = df["volume"].tail(avg_period).mean()
     if avg_vol < min_avg_vol:
         return {"signal": "HOLD", "score": 0.0, "failed": "avg_volume"}
 
     # optional ADX trend-strength filter
-    adx_period = filters_cfg.get("adx_period")
     min_adx = filters_cfg.get("min_adx")
     if adx_period and min_adx:
-        df["adx"] = adx(df, adx_period)
-        if float(df["adx"].iloc[-1]) < float(min_adx):
+        if engine is not None and engine.adx_period == int(adx_period):
+            last_adx = last["adx"]
+        elif use_pandas:
+            last_adx = float(adx(df, adx_period).iloc[-1])
+        else:
+            features = features or _LazyFeatures(df)
+            last_adx = float(features.adx(adx_period)[-1])
+        if last_adx < float(min_adx):
             return {"signal": "HOLD", "score": 0.0, "failed": "adx"}
 
+    # volume confirm (checked before the trend/momentum features are computed)
+    vol_ok = pd.notna(last["vol_ma"]) and last["volume"] > last["vol_ma"] * 1.2
+    if not vol_ok:
+        return {"signal": "HOLD", "score": 0.0, "failed": "volume"}
+
     # trend filter: ema50 > ema200 and both rising
     trend_up = (last["ema50"] > last["ema200"]) and (last["ema50"] > prev["ema50"]) and (last["ema200"] >= prev["ema200"])
 
-    # momentum/volume confirm
+    # momentum confirm
     macd_flip_up = (prev["macd_hist"] <= 0) and (last["macd_hist"] > 0)
     rsi_ok = 50 <= last["rsi"] <= 70
-    vol_ok = pd.notna(last["vol_ma"]) and last["volume"] > last["vol_ma"] * 1.2
-    if not vol_ok:
-        return {"signal": "HOLD", "score": 0.0, "failed": "volume"}
 
     # breakout: close above recent 20-bar high with tiny buffer
     breakout = (last["close"] > float(last["hh"]) * 1.001) if pd.notna(last["hh"]) else False
@@ -141,3 +327,176 @@ def generate_signal(df: pd.DataFrame, cfg) -> dict:
         reason = "score"
 
     return {"signal": "HOLD", "score": score, "failed": reason}
+
+# ---------- batch evaluation
+PANEL_FIELDS = ("high", "low", "close", "volume")
+
+def ohlcv_panel(frames, bars: int = None) -> dict:
+    """
+    Stack OHLCV frames into aligned ``(symbols x bars)`` float64 arrays for
+    ``generate_signals``. Frames are right-aligned on their last row and
+    left-padded with NaN; ``bars`` keeps only each frame's last ``bars``
+    rows (default: the longest frame). ``lengths`` holds each row's
+    unpadded length.
+    """
+    lengths = np.array([len(f) for f in frames], dtype=np.int64)
+    if bars is not None:
+        lengths = np.minimum(lengths, bars)
+    width = int(lengths.max()) if len(lengths) else 0
+    panel = {k: np.full((len(frames), width), np.nan) for k in PANEL_FIELDS}
+    for i, (df, n) in enumerate(zip(frames, lengths)):
+        if n:
+            for k in PANEL_FIELDS:
+                panel[k][i, width - n:] = df[k].to_numpy(dtype=np.float64)[-n:]
+    panel["lengths"] = lengths
+    return panel
+
+def _gate_arrays(prev: dict, last: dict, avg_vol, adx_last, warm, cfg) -> dict:
+    """
+    ``generate_signal``'s gates and score applied element-wise: every array
+    in ``prev``/``last`` holds one candidate bar per element, ``warm`` marks
+    candidates with enough history. Returns arrays of signal, score, failed,
+    sl_pct and tp_pct (NaN unless BUY).
+    """
+    filters_cfg = cfg.get("strategy", {}).get("filters", {})
+    n = len(warm)
+    failed = np.full(n, None, dtype=object)
+    decided = ~warm
+    failed[decided] = "warmup"
+
+    def gate(fails, name):
+        nonlocal decided
+        fails = fails & ~decided
+        failed[fails] = name
+        decided = decided | fails
+
+    with np.errstate(invalid="ignore"):
+        atr_pct = last["atr_pct"]
+        atr_min = filters_cfg.get("min_atr_pct", 0.002)
+        atr_max = filters_cfg.get("max_atr_pct", 0.06)
+        gate(~((atr_min <= atr_pct) & (atr_pct <= atr_max)), "atr_range")
+        gate(avg_vol < filters_cfg.get("min_avg_volume", 0), "avg_volume")
+        if adx_last is not None:
+            gate(adx_last < float(filters_cfg["min_adx"]), "adx")
+        vol_ok = ~np.isnan(last["vol_ma"]) & (last["volume"] > last["vol_ma"] * 1.2)
+        gate(~vol_ok, "volume")
+
+        trend_up = ((last["ema50"] > last["ema200"]) & (last["ema50"] > prev["ema50"])
+                    & (last["ema200"] >= prev["ema200"]))
+        macd_flip_up = (prev["macd_hist"] <= 0) & (last["macd_hist"] > 0)
+        rsi_ok = (50 <= last["rsi"]) & (last["rsi"] <= 70)
+        breakout = ~np.isnan(last["hh"]) & (last["close"] > last["hh"] * 1.001)
+
+        # same additions in the same order as generate_signal, so scores match bit for bit
+        score = np.zeros(n)
+        for hit, points in ((trend_up, 0.6), (macd_flip_up, 0.5), (rsi_ok, 0.2), (breakout, 0.4), (vol_ok, 0.2)):
+            score = score + np.where(hit, points, 0.0)
+        stretch = (last["close"] - last["ema20"]) / last["close"]
+        score = score - np.where(stretch > 0.02, np.minimum(0.3, stretch * 5), 0.0)
+        score = np.maximum(0.0, np.minimum(1.5, score))
+    score[decided] = 0.0
+
+    min_score = cfg.get("strategy", {}).get("buy_score_threshold", 1.5)
+    entry = macd_flip_up | breakout
+    buy = ~decided & trend_up & entry & (score >= min_score)
+    failed[~decided & ~trend_up] = "trend"
+    failed[~decided & trend_up & ~entry] = "momentum"
+    failed[~decided & trend_up & entry & ~buy] = "score"
+
+    risk_cfg = cfg.get("risk", {})
+    sl_pct = np.maximum(0.001, np.minimum(0.05, atr_pct * risk_cfg.get("atr_stop_multiplier", 1.5)))
+    sl_pct = np.where(buy, sl_pct, np.nan)
+    signal = np.where(buy, "BUY", "HOLD").astype(object)
+    return {"signal": signal, "score": score, "failed": failed,
+            "sl_pct": sl_pct, "tp_pct": sl_pct * risk_cfg.get("rr_ratio", 2.0)}
+
+def generate_signals(panel: dict, cfg) -> dict:
+    """
+    Score the last bar of every symbol in an ``ohlcv_panel`` in one
+    vectorized pass. Each indicator is computed once for the whole panel;
+    row ``i`` of the result is what ``generate_signal`` returns for that
+    symbol's frame (see ``signal_at``).
+    """
+    high, low, close, volume = (panel[k] for k in PANEL_FIELDS)
+    lengths = panel["lengths"]
+    if close.shape[1] < 2:  # nothing is warm; pad so the last-two-bars slices exist
+        high, low, close, volume = (np.full((len(lengths), 2), np.nan) for _ in PANEL_FIELDS)
+    filters_cfg = cfg.get("strategy", {}).get("filters", {})
+    avg_period = filters_cfg.get("avg_volume_period", 20)
+    adx_period = filters_cfg.get("adx_period")
+
+    cols = _kernel_columns(high, low, close, volume)
+    prev = {k: v[:, -2] for k, v in cols.items()}
+    last = {k: v[:, -1] for k, v in cols.items()}
+    avg_vol = kernels.tail_means(volume, avg_period, lengths)
+    adx_last = None
+    if adx_period and filters_cfg.get("min_adx"):
+        adx_last = kernels.adx(high, low, close, adx_period)[:, -1]
+    result = _gate_arrays(prev, last, avg_vol, adx_last, lengths >= 60, cfg)
+    GATE_STATS.outcomes.update(f or sig for f, sig in zip(result["failed"], result["signal"]))
+    return result
+
+def series_features(df: pd.DataFrame) -> dict:
+    """
+    The bar-only inputs of ``generate_signal_series``: every indicator
+    column and its one-bar lag. They depend on no config, so a caller that
+    scores one frame under many configs (a parameter sweep) builds them
+    once and passes them as ``features``. The volume mean and ADX, whose
+    periods come from the config, are memoized per period inside.
+    """
+    high, low, close, volume = (df[k].to_numpy(dtype=np.float64) for k in PANEL_FIELDS)
+    cols = _kernel_columns(high, low, close, volume)
+    return {
+        "high": high, "low": low, "close": close, "volume": volume,
+        "cols": cols,
+        "prev": {k: np.concatenate(([np.nan], v[:-1])) for k, v in cols.items()},
+        "avg_vol": {},
+        "adx": {},
+    }
+
+def generate_signal_series(df: pd.DataFrame, cfg, features: dict = None) -> pd.DataFrame:
+    """
+    ``generate_signal`` for every bar of ``df`` in one vectorized pass.
+
+    Row ``i`` of the returned frame (signal, score, failed, sl_pct, tp_pct;
+    indexed like ``df``) is what ``generate_signal(df.iloc[:i + 1], cfg)``
+    returns: every indicator only looks back, so one pass over the whole
+    frame gives each bar the values its growing slice would. Pair with
+    ``utils.momentum.apply_momentum_series`` for the live loop's momentum
+    override. ``features`` may supply ``series_features(df)`` to skip the
+    indicator pass.
+    """
+    if features is None:
+        features = series_features(df)
+    n = len(df)
+    filters_cfg = cfg.get("strategy", {}).get("filters", {})
+    avg_period = filters_cfg.get("avg_volume_period", 20)
+    adx_period = filters_cfg.get("adx_period")
+
+    adx_series = None
+    if adx_period and filters_cfg.get("min_adx"):
+        if adx_period not in features["adx"]:
+            features["adx"][adx_period] = kernels.adx(features["high"], features["low"], features["close"],
+                                                      adx_period)
+        adx_series = features["adx"][adx_period]
+    if avg_period not in features["avg_vol"]:
+        features["avg_vol"][avg_period] = kernels.trailing_means(features["volume"], avg_period)
+    avg_vol = features["avg_vol"][avg_period]
+    warm = np.arange(1, n + 1) >= 60
+    return pd.DataFrame(_gate_arrays(features["prev"], features["cols"], avg_vol, adx_series, warm, cfg),
+                        index=df.index)
+
+def signal_at(result, i: int) -> dict:
+    """
+    Row ``i`` (by position) of a ``generate_signals`` or
+    ``generate_signal_series`` result as a ``generate_signal`` dict.
+    """
+    sig = {"signal": np.asarray(result["signal"])[i], "score": float(np.asarray(result["score"])[i])}
+    if sig["signal"] == "BUY":
+        sl_pct = float(np.asarray(result["sl_pct"])[i])
+        if sl_pct == sl_pct:  # momentum entries carry no stop/target
+            sig["sl_pct"] = sl_pct
+            sig["tp_pct"] = float(np.asarray(result["tp_pct"])[i])
+    else:
+        sig["failed"] = np.asarray(result["failed"])[i]
+    return sig
@@ -0,0 +1,317 @@
+"""Streaming state for ai_combo_strategy's indicators.
+
+``IndicatorEngine`` keeps, for one symbol and timeframe, everything
+``generate_signal`` reads: EMA20/50/200, RSI, ATR and ATR%, MACD histogram,
+the 20-bar volume mean, the 20-bar high/low breakout levels and, optionally,
+ADX. Each closed bar is folded in once, in O(1), and the forming bar is
+evaluated against that state without changing it, so re-scoring the same
+symbol every loop costs a handful of float operations instead of
+recomputing every series over the whole frame.
+
+The arithmetic mirrors the pandas functions in ``ai_combo_strategy``
+(``ewm(adjust=False)`` including its NaN handling and center-of-mass
+rounding), so for the same bars the engine returns the values the pandas
+path computes for its last row.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+from strategies.indicator_kernels import ema_com, wilder_com
+
+NAN = float("nan")
+
+EMA_SPANS = (20, 50, 200)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOLUME_MA_PERIOD = 20
+BREAKOUT_LOOKBACK = 20
+
+
+class _Ewm:
+    """One ``Series.ewm(com=..., adjust=False).mean()`` value at a time."""
+    __slots__ = ("alpha", "factor", "gap_weights", "value", "old_wt")
+
+    def __init__(self, com: float):
+        self.alpha = 1.0 / (1.0 + com)
+        self.factor = 1.0 - self.alpha
+        self.gap_weights = com == 1  # see indicator_kernels._ewm
+        self.value = NAN
+        self.old_wt = 1.0
+
+    def step(self, x: float) -> Tuple[float, float]:
+        """``(value, weight)`` after ``x``; pass them to ``set`` to commit."""
+        w = self.value
+        if w != w:  # not seeded yet: the first observation becomes the mean
+            return x, 1.0
+        old_wt = self.old_wt * self.factor
+        if x == x:
+            if w != x:
+                new_wt = 1.0 - old_wt if self.gap_weights else self.alpha
+                w = (old_wt * w + new_wt * x) / (old_wt + new_wt)
+            old_wt = 1.0
+        return w, old_wt
+
+    def set(self, state: Tuple[float, float]) -> None:
+        self.value, self.old_wt = state
+
+
+class _RollingMean:
+    """
+    ``Series.rolling(n).mean()`` one value at a time, with the same
+    Kahan-compensated running sum pandas keeps (separate compensation for
+    removals and additions; the oldest value leaves before the new one joins).
+    """
+    __slots__ = ("n", "_values", "_state")
+
+    def __init__(self, n: int):
+        self.n = int(n)
+        self._values: deque = deque(maxlen=self.n)
+        # nobs, sum, add/remove compensation, negatives, run of equal values, last value
+        self._state = (0, 0.0, 0.0, 0.0, 0, 0, NAN)
+
+    def _next(self, x: float) -> tuple:
+        nobs, total, comp_add, comp_rm, neg, same, last = self._state
+        if len(self._values) == self.n:
+            old = self._values[0]
+            nobs -= 1
+            y = -old - comp_rm
+            t = total + y
+            comp_rm = t - total - y
+            total = t
+            if old < 0:
+                neg -= 1
+        nobs += 1
+        y = x - comp_add
+        t = total + y
+        comp_add = t - total - y
+        total = t
+        if x < 0:
+            neg += 1
+        same = same + 1 if x == last else 1
+        return nobs, total, comp_add, comp_rm, neg, same, x
+
+    def peek(self, x: float) -> float:
+        nobs, total, _, _, neg, same, last = self._next(x)
+        if nobs < self.n:
+            return NAN
+        if same >= nobs:
+            return last
+        result = total / nobs
+        if (neg == 0 and result < 0) or (neg == nobs and result > 0):
+            return 0.0
+        return result
+
+    def push(self, x: float) -> None:
+        self._state = self._next(x)
+        self._values.append(x)
+
+
+class _RollingExtreme:
+    """
+    Max (or min) of the last ``n`` values with a monotonic deque of
+    ``(index, value)``: each value is pushed and popped at most once.
+    """
+    __slots__ = ("n", "sign", "_q", "_count")
+
+    def __init__(self, n: int, highest: bool = True):
+        self.n = int(n)
+        self.sign = 1.0 if highest else -1.0
+        self._q: deque = deque()
+        self._count = 0
+
+    def peek(self, x: float) -> float:
+        """Extreme of the window ending at a new value ``x`` (not committed)."""
+        i = self._count
+        if i + 1 < self.n:
+            return NAN
+        best = self.sign * x
+        for j, v in self._q:  # at most one leading entry has left the window
+            if j > i - self.n:
+                if v > best:
+                    best = v
+                break
+        return self.sign * best
+
+    def push(self, x: float) -> float:
+        i = self._count
+        v = self.sign * x
+        q = self._q
+        while q and q[-1][1] <= v:
+            q.pop()
+        q.append((i, v))
+        if q[0][0] <= i - self.n:
+            q.popleft()
+        self._count = i + 1
+        return self.sign * q[0][1] if self._count >= self.n else NAN
+
+
+class IndicatorEngine:
+    """
+    Incremental indicators for one symbol/timeframe.
+
+    ``update`` folds in a closed bar and returns its indicator row;
+    ``preview`` evaluates the forming bar without touching state. ``sync``
+    lines the engine up with an OHLCV frame (by its ``time`` column): bars
+    closed since the last call are folded in, the frame's last row is
+    previewed. A frame that does not follow on from what the engine has seen
+    (no overlap, a change to the last bar it folded in, no ``time`` column)
+    triggers a rebuild from the frame. Rows are plain dicts keyed like the
+    pandas path's columns.
+    """
+    def __init__(self, adx_period: Optional[int] = None, volume_periods: Iterable[int] = ()):
+        self.adx_period = int(adx_period) if adx_period else None
+        self.volume_periods = sorted({VOLUME_MA_PERIOD, *(int(p) for p in volume_periods)})
+        self.reset()
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "IndicatorEngine":
+        filters_cfg = cfg.get("strategy", {}).get("filters", {})
+        return cls(adx_period=filters_cfg.get("adx_period"),
+                   volume_periods=(filters_cfg.get("avg_volume_period", 20),))
+
+    def reset(self) -> None:
+        self.count = 0
+        self.last_time = None
+        self.prev: Optional[Dict[str, float]] = None   # indicator row of the last closed bar
+        self._last_bar: Optional[tuple] = None
+        self._close = NAN
+        self._high = NAN
+        self._low = NAN
+        self._ema = {span: _Ewm(ema_com(span)) for span in EMA_SPANS}
+        self._macd_fast = _Ewm(ema_com(MACD_FAST))
+        self._macd_slow = _Ewm(ema_com(MACD_SLOW))
+        self._macd_signal = _Ewm(ema_com(MACD_SIGNAL))
+        self._rsi_up = _Ewm(wilder_com(RSI_PERIOD))
+        self._rsi_down = _Ewm(wilder_com(RSI_PERIOD))
+        self._atr = _Ewm(wilder_com(ATR_PERIOD))
+        self._volume = {p: _RollingMean(p) for p in self.volume_periods}
+        self._hh = _RollingExtreme(BREAKOUT_LOOKBACK, highest=True)
+        self._ll = _RollingExtreme(BREAKOUT_LOOKBACK, highest=False)
+        if self.adx_period:
+            a = wilder_com(self.adx_period)
+            self._adx_tr, self._adx_plus, self._adx_minus, self._adx = _Ewm(a), _Ewm(a), _Ewm(a), _Ewm(a)
+
+    # -------- per-bar math
+    def _step(self, high: float, low: float, close: float, volume: float, commit: bool) -> Dict[str, float]:
+        prev_close = self._close
+        row = {"close": close, "volume": volume, "high": high, "low": low}
+        states = []
+
+        for span, ewm in self._ema.items():
+            s = ewm.step(close)
+            states.append((ewm, s))
+            row[f"ema{span}"] = s[0]
+
+        fast, slow = self._macd_fast.step(close), self._macd_slow.step(close)
+        line = fast[0] - slow[0]
+        signal = self._macd_signal.step(line)
+        states += [(self._macd_fast, fast), (self._macd_slow, slow), (self._macd_signal, signal)]
+        row["macd_hist"] = line - signal[0]
+
+        delta = close - prev_close
+        up = self._rsi_up.step(max(delta, 0.0) if delta == delta else NAN)
+        down = self._rsi_down.step(-min(delta, 0.0) if delta == delta else NAN)
+        states += [(self._rsi_up, up), (self._rsi_down, down)]
+        rs = up[0] / (down[0] if down[0] != 0 else 1e-12)
+        row["rsi"] = 100 - (100 / (1 + rs))
+
+        # pandas' row-wise max skips the NaN terms of the first bar
+        tr = abs(high - low)
+        if prev_close == prev_close:
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        atr = self._atr.step(tr)
+        states.append((self._atr, atr))
+        row["atr"] = atr[0]
+        atr_pct = atr[0] / close
+        row["atr_pct"] = atr_pct if atr_pct == atr_pct else 0.0
+
+        row["vol_ma"] = self._volume[VOLUME_MA_PERIOD].peek(volume)
+        for p, mean in self._volume.items():
+            row[f"vol_mean_{p}"] = mean.peek(volume)
+        row["hh"] = self._hh.peek(high)
+        row["ll"] = self._ll.peek(low)
+
+        if self.adx_period:
+            row["adx"] = self._adx_step(high, low, close, prev_close, states)
+
+        if commit:
+            for ewm, s in states:
+                ewm.set(s)
+            for mean in self._volume.values():
+                mean.push(volume)
+            self._hh.push(high)
+            self._ll.push(low)
+            self._close, self._high, self._low = close, high, low
+            self.count += 1
+            self.prev = row
+        return row
+
+    def _adx_step(self, high, low, close, prev_close, states) -> float:
+        up_move = high - self._high
+        down_move = self._low - low
+        plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        tr = high - low
+        if prev_close == prev_close:
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        atr, plus, minus = self._adx_tr.step(tr), self._adx_plus.step(plus_dm), self._adx_minus.step(minus_dm)
+        plus_di = _div(100 * plus[0], atr[0])
+        minus_di = _div(100 * minus[0], atr[0])
+        total = plus_di + minus_di
+        dx = abs(plus_di - minus_di) / total * 100 if total != 0 and total == total else NAN
+        adx = self._adx.step(dx)
+        states += [(self._adx_tr, atr), (self._adx_plus, plus), (self._adx_minus, minus), (self._adx, adx)]
+        return adx[0] if adx[0] == adx[0] else 0.0
+
+    # -------- public API
+    def update(self, high: float, low: float, close: float, volume: float, time=None) -> Dict[str, float]:
+        """Fold in a closed bar; returns its indicator row."""
+        row = self._step(float(high), float(low), float(close), float(volume), commit=True)
+        self.last_time = time
+        self._last_bar = (time, float(high), float(low), float(close), float(volume))
+        return row
+
+    def preview(self, high: float, low: float, close: float, volume: float) -> Dict[str, float]:
+        """Indicator row for the forming bar; state is left as it was."""
+        return self._step(float(high), float(low), float(close), float(volume), commit=False)
+
+    def sync(self, df) -> Tuple[Optional[Dict[str, float]], Dict[str, float]]:
+        """
+        Catch up with ``df`` (all rows but the last are closed bars) and
+        return ``(prev, last)`` indicator rows for its last two rows.
+        """
+        n = len(df)
+        if n == 0:
+            raise ValueError("empty frame")
+        high, low = df["high"].to_numpy(), df["low"].to_numpy()
+        close, volume = df["close"].to_numpy(), df["volume"].to_numpy()
+        times = df["time"].to_numpy() if "time" in df.columns else None
+
+        start = self._resume_index(times, high, low, close, volume)
+        if start is None:
+            self.reset()
+            start = 0
+        for i in range(start, n - 1):
+            self.update(high[i], low[i], close[i], volume[i], times[i] if times is not None else None)
+        return self.prev, self.preview(high[-1], low[-1], close[-1], volume[-1])
+
+    def _resume_index(self, times, high, low, close, volume) -> Optional[int]:
+        """First row of ``df`` still to fold in, or None if the engine must rebuild."""
+        if times is None or self._last_bar is None:
+            return None
+        t, h, l, c, v = self._last_bar
+        pos = int(times.searchsorted(t))  # frames are sorted by time
+        if pos >= len(times) - 1 or times[pos] != t:
+            return None
+        if (high[pos], low[pos], close[pos], volume[pos]) != (h, l, c, v):
+            return None  # the bar was revised after we folded it in
+        return pos + 1
+
+
+def _div(a: float, b: float) -> float:
+    if b == 0:
+        return NAN if a == 0 or a != a else math.copysign(math.inf, a)
+    return a / b
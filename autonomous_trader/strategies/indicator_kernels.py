@@ -0,0 +1,326 @@
+"""NumPy indicator kernels for ai_combo_strategy.
+
+Array versions of the strategy's pandas indicators with the same semantics:
+``ewm(adjust=False)`` smoothing (EMA by span, Wilder by period) including
+pandas' NaN handling and center-of-mass rounding, row-wise true range that
+skips the missing previous close on the first bar, and pandas' compensated
+rolling mean. Results match the pandas functions bit for bit.
+
+Inputs are anything ``np.asarray`` turns into float64 (pass contiguous
+float64 arrays to avoid a copy). Every kernel takes an optional ``out``
+array of the input's shape and writes into it instead of allocating.
+The recursive smoothers run one scalar loop per series, which on 200-bar
+frames is far cheaper than building the intermediate pandas objects.
+
+Kernels also take 2D ``(symbols, bars)`` panels and work along the last
+axis, one vectorized step per bar across all symbols. Series shorter than
+the panel are left-padded with NaN; since every indicator here skips
+leading NaNs the way pandas does, each row comes out exactly as the 1D
+kernel (and pandas) computes it on the unpadded series.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+NAN = float("nan")
+
+
+def ema_com(span: int) -> float:
+    """Center of mass pandas derives for ``ewm(span=span)``."""
+    return (span - 1) / 2.0
+
+
+def wilder_com(period: int) -> float:
+    """Center of mass pandas derives for ``ewm(alpha=1/period)``."""
+    alpha = 1 / period
+    return (1.0 - alpha) / alpha
+
+
+def _f64(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def _out(out: Optional[np.ndarray], shape) -> np.ndarray:
+    shape = (shape,) if isinstance(shape, int) else tuple(shape)
+    if out is None:
+        return np.empty(shape, dtype=np.float64)
+    if out.shape != shape or out.dtype != np.float64:
+        raise ValueError(f"out must be a float64 array of shape {shape}")
+    return out
+
+
+def _ewm(values, com: float, out: Optional[np.ndarray]) -> np.ndarray:
+    values = _f64(values)
+    if values.ndim > 1:
+        return _ewm_panel(values, com, out)
+    vals = values.tolist()
+    res = [NAN] * len(vals)
+    alpha = 1.0 / (1.0 + com)
+    factor = 1.0 - alpha
+    gap_weights = com == 1  # pandas re-derives the new weight from the decay in this case
+    w, old_wt, new_wt = NAN, 1.0, alpha
+    for i, x in enumerate(vals):
+        if w == w:
+            old_wt *= factor
+            if gap_weights:
+                new_wt = 1.0 - old_wt
+            if x == x:
+                if w != x:
+                    w = (old_wt * w + new_wt * x) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif x == x:
+            w = x  # the first observation seeds the mean
+        res[i] = w
+    out = _out(out, len(res))
+    out[:] = res
+    return out
+
+
+def _ewm_panel(values: np.ndarray, com: float, out: Optional[np.ndarray]) -> np.ndarray:
+    """``_ewm`` for every row of a 2D panel, one vectorized step per column."""
+    out = _out(out, values.shape)
+    cols = np.ascontiguousarray(values.T)
+    res = np.empty_like(cols)
+    alpha = 1.0 / (1.0 + com)
+    factor = 1.0 - alpha
+    gap_weights = com == 1
+    w = np.full(cols.shape[1], NAN)
+    old_wt = np.ones(cols.shape[1])
+    new_wt = np.full(cols.shape[1], alpha)
+    with np.errstate(invalid="ignore"):
+        for t, x in enumerate(cols):
+            seeded = w == w
+            observed = x == x
+            np.multiply(old_wt, factor, out=old_wt, where=seeded)
+            if gap_weights:
+                np.subtract(1.0, old_wt, out=new_wt, where=seeded)
+            blend = (old_wt * w + new_wt * x) / (old_wt + new_wt)
+            step = seeded & observed
+            np.copyto(w, blend, where=step & (w != x))
+            old_wt[step] = 1.0
+            np.copyto(w, x, where=~seeded & observed)  # the first observation seeds the mean
+            res[t] = w
+    out[...] = res.T
+    return out
+
+
+def ewm_mean(values, alpha: float, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """``Series.ewm(alpha=alpha, adjust=False).mean()``."""
+    return _ewm(values, (1.0 - alpha) / alpha, out)
+
+
+def ema(values, span: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """``Series.ewm(span=span, adjust=False).mean()``."""
+    return _ewm(values, ema_com(span), out)
+
+
+def wilder(values, period: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Wilder smoothing, ``Series.ewm(alpha=1/period, adjust=False).mean()``."""
+    return _ewm(values, wilder_com(period), out)
+
+
+def _diff(x: np.ndarray) -> np.ndarray:
+    """``Series.diff()`` along the last axis."""
+    d = np.empty_like(x)
+    d[..., 0] = NAN
+    np.subtract(x[..., 1:], x[..., :-1], out=d[..., 1:])
+    return d
+
+
+def rsi(close, period: int = 14, out: Optional[np.ndarray] = None) -> np.ndarray:
+    close = _f64(close)
+    delta = _diff(close)
+    up = wilder(np.maximum(delta, 0.0), period)
+    down = wilder(-np.minimum(delta, 0.0), period)
+    down[down == 0] = 1e-12
+    out = _out(out, close.shape)
+    np.divide(up, down, out=out)
+    out += 1
+    np.divide(100, out, out=out)
+    np.subtract(100, out, out=out)
+    return out
+
+
+def true_range(high, low, close, out: Optional[np.ndarray] = None, absolute_range: bool = True) -> np.ndarray:
+    """
+    Row-wise max of high-low, |high-prev close| and |low-prev close|; the
+    first bar has no previous close and gets high-low. ``absolute_range``
+    takes |high-low| (``atr``) rather than high-low (``adx``).
+    """
+    high, low, close = _f64(high), _f64(low), _f64(close)
+    out = _out(out, close.shape)
+    np.subtract(high, low, out=out)
+    if absolute_range:
+        np.abs(out, out=out)
+    if close.shape[-1] > 1:
+        prev, rest = close[..., :-1], out[..., 1:]
+        np.fmax(rest, np.abs(high[..., 1:] - prev), out=rest)
+        np.fmax(rest, np.abs(low[..., 1:] - prev), out=rest)
+    return out
+
+
+def atr(high, low, close, period: int = 14, out: Optional[np.ndarray] = None) -> np.ndarray:
+    return wilder(true_range(high, low, close, out=out), period, out=out)
+
+
+def adx(high, low, close, period: int = 14, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Average Directional Index (0 where it is undefined), as ``ai_combo_strategy.adx``."""
+    high, low, close = _f64(high), _f64(low), _f64(close)
+    up_move = _diff(high)
+    down_move = -_diff(low)
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+    atr_series = wilder(true_range(high, low, close, absolute_range=False), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * wilder(plus_dm, period) / atr_series
+        minus_di = 100 * wilder(minus_dm, period) / atr_series
+        total = plus_di + minus_di
+        total[total == 0] = NAN
+        dx = np.abs(plus_di - minus_di) / total * 100
+    out = wilder(dx, period, out=out)
+    out[np.isnan(out)] = 0.0
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9,
+         out: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+         ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """``(macd_line, signal_line, hist)``; ``out`` is an optional triple of buffers."""
+    close = _f64(close)
+    line_out, signal_out, hist_out = out if out is not None else (None, None, None)
+    line = ema(close, fast, out=line_out)
+    line -= ema(close, slow)
+    signal_line = ema(line, signal, out=signal_out)
+    hist = _out(hist_out, close.shape)
+    np.subtract(line, signal_line, out=hist)
+    return line, signal_line, hist
+
+
+def rolling_mean(values, window: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    ``Series.rolling(window).mean()``: pandas' Kahan-compensated running sum
+    (separate compensation for removals and additions), NaN until full.
+    """
+    values = _f64(values)
+    if values.ndim > 1:
+        return _rolling_mean_panel(values, window, out)
+    vals = values.tolist()
+    res = [NAN] * len(vals)
+    nobs, total, comp_add, comp_rm, neg, same, last = 0, 0.0, 0.0, 0.0, 0, 0, NAN
+    for i, x in enumerate(vals):
+        if i >= window:
+            old = vals[i - window]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_rm
+                t = total + y
+                comp_rm = t - total - y
+                total = t
+                if old < 0:
+                    neg -= 1
+        if x == x:
+            nobs += 1
+            y = x - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
+            if x < 0:
+                neg += 1
+            same = same + 1 if x == last else 1
+            last = x
+        if nobs >= window:
+            if same >= nobs:
+                res[i] = last
+            else:
+                mean = total / nobs
+                res[i] = 0.0 if (neg == 0 and mean < 0) or (neg == nobs and mean > 0) else mean
+    out = _out(out, len(res))
+    out[:] = res
+    return out
+
+
+def _rolling_mean_panel(values: np.ndarray, window: int, out: Optional[np.ndarray]) -> np.ndarray:
+    """``rolling_mean`` for every row of a 2D panel, one vectorized step per column."""
+    out = _out(out, values.shape)
+    cols = np.ascontiguousarray(values.T)
+    res = np.full_like(cols, NAN)
+    m = cols.shape[1]
+    nobs, neg, same = np.zeros(m, dtype=np.int64), np.zeros(m, dtype=np.int64), np.zeros(m, dtype=np.int64)
+    total, comp_add, comp_rm, last = np.zeros(m), np.zeros(m), np.zeros(m), np.full(m, NAN)
+    for t, x in enumerate(cols):
+        if t >= window:
+            old = cols[t - window]
+            gone = old == old
+            nobs -= gone
+            y = np.where(gone, -old - comp_rm, 0.0)
+            s = total + y
+            np.copyto(comp_rm, s - total - y, where=gone)
+            np.copyto(total, s, where=gone)
+            neg -= gone & (old < 0)
+        seen = x == x
+        nobs += seen
+        y = np.where(seen, x - comp_add, 0.0)
+        s = total + y
+        np.copyto(comp_add, s - total - y, where=seen)
+        np.copyto(total, s, where=seen)
+        neg += seen & (x < 0)
+        np.copyto(same, np.where(x == last, same + 1, 1), where=seen)
+        np.copyto(last, x, where=seen)
+        full = nobs >= window
+        if full.any():
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total / nobs
+            mean[((neg == 0) & (mean < 0)) | ((neg == nobs) & (mean > 0))] = 0.0
+            res[t] = np.where(full, np.where(same >= nobs, last, mean), NAN)
+    out[...] = res.T
+    return out
+
+
+def _rolling_extreme(values, window: int, out: Optional[np.ndarray], reduce) -> np.ndarray:
+    values = _f64(values)
+    out = _out(out, values.shape)
+    out[..., :window - 1] = NAN
+    if values.shape[-1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+        reduce(windows, axis=-1, out=out[..., window - 1:])
+    return out
+
+
+def rolling_max(values, window: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """``Series.rolling(window).max()`` for NaN-free input."""
+    return _rolling_extreme(values, window, out, np.max)
+
+
+def rolling_min(values, window: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """``Series.rolling(window).min()`` for NaN-free input."""
+    return _rolling_extreme(values, window, out, np.min)
+
+
+def tail_mean(values, n: int) -> float:
+    """``Series.tail(n).mean()``."""
+    tail = _f64(values)[-n:]
+    return float(tail.mean()) if len(tail) else NAN
+
+
+def tail_means(panel, n: int, lengths=None) -> np.ndarray:
+    """``tail_mean`` of each row of a left-padded panel; ``lengths`` are the rows' unpadded lengths."""
+    panel = _f64(panel)
+    res = panel[:, -n:].mean(axis=1)
+    if lengths is not None:
+        for i in np.flatnonzero(np.asarray(lengths) < n):  # padding reaches into the tail
+            res[i] = tail_mean(panel[i, panel.shape[1] - lengths[i]:], n)
+    return res
+
+
+def trailing_means(values, n: int) -> np.ndarray:
+    """``tail_mean`` of every prefix: element ``i`` is ``tail_mean(values[:i + 1], n)``."""
+    values = _f64(values)
+    res = np.empty(len(values))
+    head = min(n - 1, len(values))
+    for i in range(head):  # prefixes shorter than the window
+        res[i] = values[:i + 1].mean()
+    if len(values) >= n:
+        res[n - 1:] = np.lib.stride_tricks.sliding_window_view(values, n).mean(axis=-1)
+    return res
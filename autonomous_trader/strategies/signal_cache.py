@@ -0,0 +1,98 @@
+"""Memoized strategy signals.
+
+The trading loop re-scores every symbol every pass, but between two passes
+most frames are unchanged: nothing traded, so the hub built the same bars.
+``SignalCache`` remembers the signal computed for a frame, keyed by symbol,
+timeframe, a fingerprint of the frame's bars and a fingerprint of the
+strategy/risk config. The same inputs return the stored result without
+recomputation; any new trade, new bar or config change is a different key.
+Entries are evicted least recently used first.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def frame_fingerprint(df) -> bytes:
+    """Digest of every value in ``df``; any changed, added or dropped bar changes it."""
+    # one whole-frame conversion is several times cheaper than pulling columns one by one
+    values = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(",".join(map(str, df.columns)).encode())
+    h.update(values.tobytes())
+    return h.digest()
+
+
+def config_fingerprint(cfg: dict) -> str:
+    """Digest of the config sections ``generate_signal`` reads (strategy and risk)."""
+    relevant = {"strategy": cfg.get("strategy", {}), "risk": cfg.get("risk", {})}
+    return hashlib.blake2b(json.dumps(relevant, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+class SignalCache:
+    """
+    LRU cache of signal dicts.
+
+    ``key`` builds the lookup key, ``get``/``put`` read and store, and
+    ``get_or_compute`` does both around a callable. Cached dicts are copied
+    on the way in and out, so callers may modify what they get back.
+    ``hits``/``misses``/``evictions`` are running totals.
+    """
+    def __init__(self, max_entries: int = 2048):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = int(max_entries)
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(symbol: str, timeframe: str, df, config_hash: str) -> Tuple[str, str, bytes, str]:
+        return symbol, timeframe, frame_fingerprint(df), config_hash
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        sig = self._entries.get(key)
+        if sig is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(sig)
+
+    def put(self, key: Hashable, sig: dict) -> None:
+        self._entries[key] = dict(sig)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], dict]) -> dict:
+        sig = self.get(key)
+        if sig is None:
+            sig = compute()
+            self.put(key, sig)
+        return sig
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else None}
+
+    def heartbeat(self) -> str:
+        """One-line digest for the trading loop's ``[HB]`` line."""
+        s = self.summary()
+        if s["hit_rate"] is None:
+            return "sig_cache=idle"
+        return (f"sig_cache={s['hit_rate']:.0%} hits={s['hits']} misses={s['misses']} "
+                f"size={s['size']}")
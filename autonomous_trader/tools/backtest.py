@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Backtest the bot's strategy and broker on CSV history.
+
+    python tools/backtest.py history/BTC-USD_5m.csv history/ETH-USD_5m.csv --timeframe 5m
+    python tools/backtest.py history/*.csv --trades-out trades.csv --equity-out equity.csv
+    python tools/backtest.py history/*.csv --workers 32
+
+Each CSV is read with ``read_csv_ohlcv(with_time=True)``; the symbol is the
+file name up to the first ``_`` with ``-`` read as ``/`` (``BTC-USD_5m.csv``
+is ``BTC/USD``). All files share one simulated broker, as in the live loop.
+With ``--workers`` above 1, signals are computed on that many processes
+(``ParallelBacktester``) before the shared replay.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.append(ROOT)
+
+from utils.backtester import Backtester
+from utils.csv_ohlc_feed import read_csv_ohlcv
+from utils.parallel_backtest import ParallelBacktester
+
+
+def symbol_from_path(path: str) -> str:
+    return os.path.basename(path).split(".")[0].split("_")[0].replace("-", "/")
+
+
+def main(args) -> None:
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    frames = {symbol_from_path(p): read_csv_ohlcv(p, with_time=True) for p in args.csv}
+    if args.workers > 1:
+        bt = ParallelBacktester(cfg, timeframe=args.timeframe, intrabar=not args.closes_only, workers=args.workers)
+    else:
+        bt = Backtester(cfg, timeframe=args.timeframe, intrabar=not args.closes_only)
+    result = bt.run(frames)
+
+    s = result.summary()
+    print(f"[BT] {len(frames)} symbols, {s['bars']} bars in {result.elapsed_sec:.2f}s "
+          f"({s['bars_per_sec']:,.0f} bars/s)")
+    win_rate = "n/a" if s["win_rate"] is None else f"{s['win_rate']:.1%}"
+    print(f"[BT] trades={s['trades']} win_rate={win_rate} pnl={s['total_pnl']:.2f} "
+          f"equity={s['final_equity']:.2f} return={s['return_pct']:.2%} "
+          f"max_dd={s['max_drawdown_pct']:.2%} open={s['open_positions']}")
+    if args.trades_out:
+        result.trades_df().to_csv(args.trades_out, index=False)
+    if args.equity_out:
+        result.equity.to_csv(args.equity_out, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the strategy and PaperBroker on CSV bars.")
+    parser.add_argument("csv", nargs="+", help="OHLCV CSV files with a timestamp column")
+    parser.add_argument("--timeframe", default="5m", help="bar size of the files")
+    parser.add_argument("--config", default=os.path.join(ROOT, "config", "config.json"))
+    parser.add_argument("--closes-only", action="store_true", help="check exits on bar closes only")
+    parser.add_argument("--workers", type=int, default=1, help="processes for signal generation")
+    parser.add_argument("--trades-out", help="write the trades list to this CSV")
+    parser.add_argument("--equity-out", help="write the equity curve to this CSV")
+    main(parser.parse_args())
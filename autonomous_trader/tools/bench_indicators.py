@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Per-call cost of the strategy indicators: pandas vs the NumPy kernels.
+
+Times each pandas indicator in ``ai_combo_strategy`` against its
+``indicator_kernels`` counterpart (with and without preallocated ``out``
+buffers), then one ``generate_signal`` call per backend and with an
+``IndicatorEngine``:
+
+    python tools/bench_indicators.py --bars 200 --repeat 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.append(ROOT)
+
+from strategies import ai_combo_strategy as s
+from strategies import indicator_kernels as K
+from strategies.indicator_engine import IndicatorEngine
+
+CFG = {"strategy": {"buy_score_threshold": 0.8,
+                    "filters": {"avg_volume_period": 30, "min_avg_volume": 0, "max_atr_pct": 1.0,
+                                "adx_period": 14, "min_adx": 1}}}
+
+
+def _bars(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0002, 0.004, n))
+    spread = np.abs(rng.normal(0, 0.002, (2, n)))
+    return pd.DataFrame({
+        "time": 1_700_000_000_000 + np.arange(n) * 60_000,
+        "open": np.r_[close[0], close[:-1]],
+        "high": close * (1 + spread[0]),
+        "low": close * (1 - spread[1]),
+        "close": close,
+        "volume": rng.uniform(50, 150, n),
+    })
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    fn()  # warm up
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / repeat * 1e6
+
+
+def main(args) -> None:
+    df = _bars(args.bars)
+    h, l, c, v = (df[k].to_numpy() for k in ("high", "low", "close", "volume"))
+    buf = np.empty(len(df))
+    bufs = (np.empty(len(df)), np.empty(len(df)), np.empty(len(df)))
+
+    cases = [
+        ("ema(20)", lambda: s.ema(df["close"], 20), lambda: K.ema(c, 20), lambda: K.ema(c, 20, out=buf)),
+        ("rsi(14)", lambda: s.rsi(df["close"], 14), lambda: K.rsi(c, 14), lambda: K.rsi(c, 14, out=buf)),
+        ("atr(14)", lambda: s.atr(df, 14), lambda: K.atr(h, l, c, 14), lambda: K.atr(h, l, c, 14, out=buf)),
+        ("adx(14)", lambda: s.adx(df, 14), lambda: K.adx(h, l, c, 14), lambda: K.adx(h, l, c, 14, out=buf)),
+        ("macd", lambda: s.macd(df["close"]), lambda: K.macd(c), lambda: K.macd(c, out=bufs)),
+        ("rolling mean(20)", lambda: df["volume"].rolling(20).mean(),
+         lambda: K.rolling_mean(v, 20), lambda: K.rolling_mean(v, 20, out=buf)),
+        ("rolling max(20)", lambda: df["high"].rolling(20).max(),
+         lambda: K.rolling_max(h, 20), lambda: K.rolling_max(h, 20, out=buf)),
+    ]
+    print(f"[BENCH] {args.bars} bars, best of 3 x {args.repeat} calls, microseconds per call")
+    print(f"{'indicator':>18} {'pandas':>10} {'numpy':>10} {'numpy+out':>10} {'speedup':>8}")
+    for name, ref, kernel, kernel_out in cases:
+        t_ref, t_k, t_out = (_per_call_us(fn, args.repeat) for fn in (ref, kernel, kernel_out))
+        print(f"{name:>18} {t_ref:>10.1f} {t_k:>10.1f} {t_out:>10.1f} {t_ref / t_out:>7.1f}x")
+
+    pandas_cfg = {**CFG, "strategy": {**CFG["strategy"], "indicator_backend": "pandas"}}
+    engine = IndicatorEngine.from_config(CFG)
+    engine.sync(df)
+    t_pandas = _per_call_us(lambda: s.generate_signal(df, pandas_cfg), args.repeat)
+    t_numpy = _per_call_us(lambda: s.generate_signal(df, CFG), args.repeat)
+    t_engine = _per_call_us(lambda: s.generate_signal(df, CFG, engine), args.repeat)
+    print(f"[BENCH] generate_signal: pandas {t_pandas:.0f}us, numpy {t_numpy:.0f}us "
+          f"({t_pandas / t_numpy:.1f}x), engine {t_engine:.0f}us ({t_pandas / t_engine:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call indicator cost, pandas vs NumPy kernels.")
+    parser.add_argument("--bars", type=int, default=200, help="bars per frame")
+    parser.add_argument("--repeat", type=int, default=200, help="calls per timing run")
+    main(parser.parse_args())
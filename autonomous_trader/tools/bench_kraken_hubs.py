@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Benchmark the Kraken hubs against a local Kraken websocket stand-in.
+
+Streams the same Kraken-format frames (synthetic, or rebuilt from a
+FeedRecorder file) over a localhost websocket to each hub and reports how
+many messages per second it ingests end to end:
+
+    python tools/bench_kraken_hubs.py --frames 50000 --pairs 8
+    python tools/bench_kraken_hubs.py --recording data/recordings/feed_20260101.csv.gz
+
+``native`` is ``KrakenWsHub``. ``cryptofeed`` is ``KrakenHub`` behind
+cryptofeed's Kraken message parser, with its 2.x object callbacks adapted
+onto the hub's positional ``_on_trade``/``_on_ticker``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.append(ROOT)
+
+from utils.kraken_ws_standin import KrakenStandIn, frames_from_recording, synthetic_frames
+from utils.market_data_kraken import KrakenHub, norm_to_slash, slash_to_norm
+from utils.market_data_kraken_ws import KrakenWsHub
+
+ALT_BASES = ["XBT", "ETH", "SOL", "ADA", "XRP", "DOT", "LTC", "LINK", "ATOM", "AVAX", "UNI", "XLM"]
+
+
+def _count_messages(frames):
+    n = 0
+    for raw in frames:
+        msg = json.loads(raw)
+        n += len(msg[1]) if msg[2] == "trade" else 1
+    return n
+
+
+async def _wait_ingested(server, hub, total_msgs, timeout):
+    await asyncio.wait_for(server.done.wait(), timeout)
+    deadline = time.perf_counter() + timeout
+    while hub.stats.total() < total_msgs and time.perf_counter() < deadline:
+        await asyncio.sleep(0.005)
+
+
+async def bench_native(frames, pairs, total_msgs, timeout):
+    async with KrakenStandIn(frames) as server:
+        hub = KrakenWsHub(symbols=pairs, url=server.url)
+        started = time.perf_counter()
+        runner = asyncio.ensure_future(hub.run_async())
+        await _wait_ingested(server, hub, total_msgs, timeout)
+        elapsed = time.perf_counter() - started
+        hub.stop()
+        await asyncio.wait_for(runner, 5)
+    return hub, elapsed
+
+
+async def bench_cryptofeed(frames, pairs, _total_msgs, timeout):
+    import websockets
+    from cryptofeed.defines import KRAKEN, SPOT, TICKER, TRADES
+    from cryptofeed.exchanges import Kraken
+    from cryptofeed.symbols import Symbols
+
+    # cryptofeed normalizes XBT to BTC; pre-load its symbol table so no REST lookup happens
+    std = {p.replace("XBT", "BTC").replace("/", "-"): p for p in pairs}
+    Symbols.set(KRAKEN, std, {"instrument_type": {s: SPOT for s in std}})
+    hub = KrakenHub(symbols=pairs)
+    back = {s: slash_to_norm(p) for s, p in std.items()}  # keep the hub's XBT naming
+
+    # cryptofeed hands over Decimals; the hub works in floats
+    async def on_trade(t, receipt):
+        await hub._on_trade(None, back[t.symbol], t.id, t.timestamp, t.side, t.amount, t.price, receipt)
+
+    async def on_ticker(t, receipt):
+        await hub._on_ticker(None, back[t.symbol], float(t.bid), float(t.ask), t.timestamp or receipt, receipt)
+
+    feed = Kraken(subscription={TICKER: list(std), TRADES: list(std)},
+                  callbacks={TRADES: on_trade, TICKER: on_ticker})
+    handle = feed.message_handler
+
+    # cryptofeed's own connection only accepts wss:// endpoints, so frames from
+    # the stand-in go straight into Kraken.message_handler, its parse path
+    async with KrakenStandIn(frames) as server:
+        started = time.perf_counter()
+        async with websockets.connect(server.url, max_size=None) as ws:
+            for name in ("ticker", "trade"):
+                await ws.send(json.dumps({"event": "subscribe", "pair": pairs, "subscription": {"name": name}}))
+            pending = len(frames)
+            while pending and time.perf_counter() - started < timeout:
+                raw = await ws.recv()
+                if raw[0] == "[":
+                    pending -= 1
+                await handle(raw, None, time.time())
+        elapsed = time.perf_counter() - started
+    return hub, elapsed
+
+
+def main(args) -> None:
+    if args.recording:
+        frames = list(frames_from_recording(args.recording))
+        pairs = sorted({json.loads(f)[3] for f in frames})
+    else:
+        pairs = [f"{b}/USDT" for b in ALT_BASES[:args.pairs]]
+        frames = synthetic_frames(pairs, args.frames, max_trades_per_frame=args.batch)
+    total = _count_messages(frames)
+    print(f"[BENCH] {len(frames)} frames, {total} messages, {len(pairs)} pairs")
+
+    results = {}
+    for name in args.hubs:
+        runner = bench_native if name == "native" else bench_cryptofeed
+        try:
+            hub, elapsed = asyncio.run(runner(frames, pairs, total, args.timeout))
+        except ImportError as e:
+            print(f"[BENCH] {name}: skipped ({e})")
+            continue
+        got = hub.stats.total()
+        results[name] = got / elapsed
+        sym = norm_to_slash(slash_to_norm(pairs[0]))
+        bars = len(hub.ohlcv_df(sym, timeframe="1m", limit=100000))
+        print(f"[BENCH] {name:>10}: {got}/{total} msgs in {elapsed:.2f}s = {results[name]:,.0f} msg/s "
+              f"({bars} 1m bars for {sym}; cb_p99={hub.stats.summary()['all']['processing_p99_ms'] * 1000:.0f}us)")
+    if len(results) == 2:
+        print(f"[BENCH] native / cryptofeed = {results['native'] / results['cryptofeed']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kraken hub throughput against a local websocket stand-in.")
+    parser.add_argument("--frames", type=int, default=20000, help="synthetic frames to stream")
+    parser.add_argument("--pairs", type=int, default=8, help="synthetic pairs (max %d)" % len(ALT_BASES))
+    parser.add_argument("--batch", type=int, default=4, help="max trades per synthetic trade frame")
+    parser.add_argument("--recording", help="stream frames rebuilt from a FeedRecorder file instead")
+    parser.add_argument("--hubs", nargs="+", choices=["native", "cryptofeed"], default=["native", "cryptofeed"])
+    parser.add_argument("--timeout", type=float, default=120.0)
+    main(parser.parse_args())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Replay a recorded feed through a hub and report throughput.
+
+Feeds a ``data/recordings/feed_*.csv.gz`` file (see ``feed_recorder.enable``
+in config.json) through the hub callbacks with no network, then times one
+``generate_signal`` call per symbol on the resulting bars:
+
+    python tools/replay_feed.py data/recordings/feed_20260101.csv.gz --speed 0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.append(ROOT)
+
+from utils.feed_recorder import read_records, run_replay
+
+
+def _make_hub(kind: str, symbols):
+    if kind == "kraken":
+        from utils.market_data_kraken import KrakenHub
+        return KrakenHub(symbols=symbols)
+    from utils.market_data_cryptofeed import CryptoFeedHub
+    return CryptoFeedHub({"data_feeds": {"symbols": symbols}})
+
+
+def main(path: str, speed: float, hub_kind: str, timeframe: str) -> None:
+    symbols = sorted({sym for _, _, sym, _ in read_records(path)})
+    hub = _make_hub(hub_kind, symbols)
+    run_replay(path, hub, speed or None)
+    print(f"[REPLAY] {hub.stats.heartbeat()}")
+
+    from strategies.ai_combo_strategy import generate_signal
+    with open(os.path.join(ROOT, "config", "config.json"), "r") as f:
+        cfg = json.load(f)
+    for sym in hub.list_symbols():
+        df = hub.ohlcv_df(sym, timeframe=timeframe, limit=200)
+        if df.empty:
+            continue
+        started = time.perf_counter()
+        sig = generate_signal(df, cfg)
+        took = (time.perf_counter() - started) * 1000
+        print(f"[SIG] {sym}: {len(df)} bars -> {sig.get('signal')} in {took:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded market data feed.")
+    parser.add_argument("path", help="recording (.csv.gz) written by FeedRecorder")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, N = N x faster, 0 = max")
+    parser.add_argument("--hub", choices=["kraken", "cryptofeed"], default="kraken")
+    parser.add_argument("--timeframe", default="5m")
+    args = parser.parse_args()
+    main(args.path, args.speed, args.hub, args.timeframe)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Sweep config parameters over backtests of CSV history and rank the results.
+
+    python tools/sweep.py history/*.csv --space space.json --timeframe 5m
+    python tools/sweep.py history/*.csv --space space.json --random 2000 --seed 7 --top 20 --out sweep.csv
+    python tools/sweep.py history/*.csv --space space.json --train 30d --test 7d --equity-out oos.csv
+
+``space.json`` maps dotted config paths to a list of values or a
+``{"low", "high", "step"}`` range (``step`` only needed for a grid), see
+``utils/param_sweep.py``. Without ``--random`` every combination is run.
+CSV files are read as in ``tools/backtest.py``. With ``--train`` and
+``--test`` the sweep runs walk-forward (``utils/walk_forward.py``): each
+training span picks the best combination, which is then traded on the
+following test span, and the test spans are stitched together.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.append(ROOT)
+
+from tools.backtest import symbol_from_path
+from utils.csv_ohlc_feed import read_csv_ohlcv
+from utils.param_sweep import RESULT_FIELDS, grid_space, random_space, run_sweep
+from utils.walk_forward import run_walk_forward
+
+
+def main(args) -> None:
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    with open(args.space, "r", encoding="utf-8") as f:
+        space = json.load(f)
+    frames = {symbol_from_path(p): read_csv_ohlcv(p, with_time=True) for p in args.csv}
+    combos = random_space(space, args.random, args.seed) if args.random else grid_space(space)
+
+    if args.train:
+        walk_forward(args, cfg, frames, combos)
+        return
+    table = run_sweep(cfg, frames, combos, timeframe=args.timeframe, intrabar=not args.closes_only,
+                      workers=args.workers, rank_by=args.rank_by)
+    bars = sum(len(df) for df in frames.values())
+    print(f"[SWEEP] {len(combos)} combinations x {bars} bars in {table.attrs['elapsed_sec']:.1f}s")
+    print(table.head(args.top).to_string(index=False))
+    if args.out:
+        table.to_csv(args.out, index=False)
+
+
+def walk_forward(args, cfg, frames, combos) -> None:
+    if not args.test:
+        raise SystemExit("--train needs --test")
+    result = run_walk_forward(cfg, frames, combos, args.train, args.test, step=args.step,
+                              timeframe=args.timeframe, intrabar=not args.closes_only,
+                              workers=args.workers, rank_by=args.rank_by)
+    windows = result.windows.copy()
+    for col in ("train_start", "train_end", "test_start", "test_end"):
+        windows[col] = pd.to_datetime(windows[col], unit="s")
+    s = result.summary()
+    print(f"[WF] {s['windows']} windows x {len(combos)} combinations in {result.oos.elapsed_sec:.1f}s")
+    print(windows.to_string(index=False))
+    print(f"[WF] out-of-sample trades={s['trades']} equity={s['final_equity']:.2f} "
+          f"return={s['return_pct']:.2%} max_dd={s['max_drawdown_pct']:.2%}")
+    if args.out:
+        result.windows.to_csv(args.out, index=False)
+    if args.equity_out:
+        result.oos.equity.to_csv(args.equity_out, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank config parameter combinations by backtest results.")
+    parser.add_argument("csv", nargs="+", help="OHLCV CSV files with a timestamp column")
+    parser.add_argument("--space", required=True, help="JSON file of {dotted.config.path: values or range}")
+    parser.add_argument("--random", type=int, default=0, help="draw this many combinations instead of the grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--timeframe", default="5m", help="bar size of the files")
+    parser.add_argument("--config", default=os.path.join(ROOT, "config", "config.json"))
+    parser.add_argument("--closes-only", action="store_true", help="check exits on bar closes only")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--rank-by", default="return_pct", choices=RESULT_FIELDS)
+    parser.add_argument("--top", type=int, default=25, help="rows to print")
+    parser.add_argument("--out", help="write the full ranked table (walk-forward: the windows) to this CSV")
+    parser.add_argument("--train", help="walk-forward training span, e.g. 30d")
+    parser.add_argument("--test", help="walk-forward test span, e.g. 7d")
+    parser.add_argument("--step", help="walk-forward step between windows (default: the test span)")
+    parser.add_argument("--equity-out", help="walk-forward: write the stitched out-of-sample equity to this CSV")
+    main(parser.parse_args())
@@ -0,0 +1,137 @@
+# utils/atr_estimator.py
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+SMA, WILDER, EMA = "sma", "wilder", "ema"
+MODES = (SMA, WILDER, EMA)
+DEFAULT_MODE = WILDER  # matches strategies.ai_combo_strategy.atr (ewm alpha=1/period)
+
+
+class _AtrWindow:
+    """
+    Running SMA, Wilder and EMA of true range over one window length.
+
+    Wilder/EMA follow pandas ``ewm(adjust=False)`` seeded with the first true
+    range, so they agree with the strategy's vectorized ``atr()`` bar for bar.
+    The SMA keeps a running sum that is re-summed once per full window to
+    stop floating-point drift, which keeps updates amortized O(1).
+    """
+    __slots__ = ("n", "count", "wilder", "ema", "_wilder_alpha", "_ema_alpha", "_values", "_sum", "_since_resum")
+
+    def __init__(self, n: int):
+        if n <= 0:
+            raise ValueError("ATR window must be positive")
+        self.n = int(n)
+        self.count = 0
+        self.wilder: Optional[float] = None
+        self.ema: Optional[float] = None
+        self._wilder_alpha = 1.0 / self.n
+        self._ema_alpha = 2.0 / (self.n + 1)
+        self._values: Deque[float] = deque(maxlen=self.n)
+        self._sum = 0.0
+        self._since_resum = 0
+
+    def update(self, tr: float) -> None:
+        self.count += 1
+        if self.wilder is None:
+            self.wilder = self.ema = tr
+        else:
+            self.wilder += (tr - self.wilder) * self._wilder_alpha
+            self.ema += (tr - self.ema) * self._ema_alpha
+        if len(self._values) == self.n:
+            self._sum -= self._values[0]
+        self._values.append(tr)
+        self._sum += tr
+        self._since_resum += 1
+        if self._since_resum >= self.n:
+            self._sum = sum(self._values)
+            self._since_resum = 0
+
+    @property
+    def sma(self) -> Optional[float]:
+        return self._sum / len(self._values) if self._values else None
+
+    def value(self, mode: str) -> Optional[float]:
+        if mode == WILDER:
+            return self.wilder
+        if mode == EMA:
+            return self.ema
+        if mode == SMA:
+            return self.sma
+        raise ValueError(f"unknown ATR mode: {mode!r}")
+
+
+class AtrEstimator:
+    """
+    Streaming ATR on synthetic bars built from trades.
+
+    Keeps the forming bar's OHLC and, each time a bar closes, folds its true
+    range into every configured window in all three smoothing modes. Updates
+    and reads are O(1) no matter how long the history is, so ranking hundreds
+    of symbols costs one lookup each. ``atr`` reads the default window and mode
+    and stays ``None`` until ``min_periods`` bars have closed.
+    """
+    def __init__(self, minutes: int = 14, windows: Iterable[int] = (), mode: str = DEFAULT_MODE,
+                 step_sec: int = 60, min_periods: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"unknown ATR mode: {mode!r}")
+        self.window = int(minutes)
+        self.mode = mode
+        self.step = int(step_sec)
+        self.min_periods = max(1, self.window // 2) if min_periods is None else int(min_periods)
+        self._windows: Dict[int, _AtrWindow] = {n: _AtrWindow(n) for n in sorted({self.window, *windows})}
+        self._series: List[_AtrWindow] = list(self._windows.values())
+        self.curr_bucket: Optional[int] = None
+        self.ohlc: Optional[List[float]] = None  # [o, h, l, c] of the forming bar
+        self.last_close: Optional[float] = None
+
+    @property
+    def windows(self) -> List[int]:
+        return list(self._windows)
+
+    def on_trade(self, ts_sec: float, price: float) -> None:
+        bucket = int(ts_sec // self.step)
+        ohlc = self.ohlc
+        if ohlc is None:
+            self.curr_bucket = bucket
+            self.ohlc = [price, price, price, price]
+            return
+        if bucket != self.curr_bucket:
+            self._close_bar()
+            self.curr_bucket = bucket
+            self.ohlc = [price, price, price, price]
+            return
+        if price > ohlc[1]:
+            ohlc[1] = price
+        if price < ohlc[2]:
+            ohlc[2] = price
+        ohlc[3] = price
+
+    def on_bar(self, high: float, low: float, close: float) -> None:
+        """Fold one finished bar directly (e.g. history loaded from the bar store)."""
+        prev_close = self.last_close if self.last_close is not None else close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        for series in self._series:
+            series.update(tr)
+        self.last_close = close
+
+    def _close_bar(self) -> None:
+        o, h, l, c = self.ohlc  # type: ignore[misc]
+        prev_close = self.last_close if self.last_close is not None else o
+        tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
+        for series in self._series:
+            series.update(tr)
+        self.last_close = c
+
+    def value(self, window: Optional[int] = None, mode: Optional[str] = None) -> Optional[float]:
+        """ATR for ``window`` bars in ``mode`` (defaults: the estimator's own)."""
+        series = self._windows.get(self.window if window is None else int(window))
+        if series is None:
+            raise KeyError(f"ATR window {window} is not tracked (have {self.windows})")
+        if series.count < min(self.min_periods, series.n):
+            return None
+        return series.value(mode or self.mode)
+
+    @property
+    def atr(self) -> Optional[float]:
+        return self.value()
@@ -0,0 +1,265 @@
+"""Event-driven backtests of the live strategy and broker.
+
+``Backtester`` replays OHLCV bars through the same pieces the trading loop
+uses: ``generate_signal`` (via its full-history form
+``generate_signal_series``), ``apply_momentum_entry`` and ``PaperBroker``
+with its sizing, stops, take-profit, trailing, cooldowns and daily limits.
+The broker runs on a simulated clock (each bar's close time) and keeps its
+state in memory, so nothing under ``data/`` is read or written.
+
+Bars of all symbols are merged into one time-ordered event stream with one
+broker, as in the live loop. At each bar:
+
+* a symbol with an open position is checked for an exit. With
+  ``intrabar=True`` the check walks the bar as open, low, high, close (or
+  open, high, low, close on down bars). A stop or target crossed within the
+  bar fills at its level, and one gapped through at the open fills at the
+  open;
+* a flat symbol whose signal for that bar is BUY is bought at the close if
+  the broker allows it, with the same entry meta ``main.py`` passes.
+
+Signals for a symbol depend only on its own bars. ``compute_signals`` can
+therefore run ahead of time (or elsewhere), and its results can be passed to
+``run``, or as BUY masks and scores to ``replay``.
+``utils.parallel_backtest`` computes them on a process pool.
+"""
+
+import heapq
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from strategies.ai_combo_strategy import generate_signal_series
+from utils.bar_builder import parse_timeframe
+from utils.momentum import apply_momentum_series
+from utils.trade_executor import PaperBroker
+
+
+class QuietLogger:
+    """Drop-in for ``Notifier`` that discards messages (risk refusals repeat every bar)."""
+    def send(self, msg: str) -> None:
+        pass
+
+
+def compute_signals(df: pd.DataFrame, cfg: dict, features: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Per-bar signals as the live loop would see them: strategy plus momentum
+    override. ``features`` may supply ``series_features(df)`` reused across configs.
+    """
+    return apply_momentum_series(df, generate_signal_series(df, cfg, features), cfg)
+
+
+def entry_meta(cfg: dict, score: float) -> dict:
+    """The ``broker.buy`` meta ``main.trading_loop`` builds from ``exits``/``trailing_stop``."""
+    exits = cfg.get("exits", {})
+    trailing = cfg.get("trailing_stop", {})
+    return {
+        "score": score,
+        "take_profit_pct": exits.get("take_profit_pct"),
+        "stop_loss_pct": exits.get("stop_loss_pct"),
+        "breakeven_trigger_pct": trailing.get("breakeven_pct"),
+        "trailing_stop_pct": trailing.get("trail_pct"),
+        "trailing_enable": trailing.get("enable", True),
+        "activate_profit_pct": trailing.get("activate_profit_pct"),
+        "atr_trail_multiplier": trailing.get("atr_trail_multiplier"),
+    }
+
+
+def bar_open_times(df: pd.DataFrame, timeframe: str, start: float = 0.0) -> np.ndarray:
+    """Bar open times in epoch seconds: from the ``time`` column (ms), else spaced from ``start``."""
+    if "time" in df.columns:
+        return df["time"].to_numpy(dtype=np.float64) / 1000.0
+    return start + np.arange(len(df), dtype=np.float64) * parse_timeframe(timeframe)
+
+
+TRADE_FIELDS = ["symbol", "entry_time", "entry_price", "exit_time", "exit_price", "qty", "pnl", "reason", "score"]
+
+
+class BacktestResult:
+    """
+    Outcome of a run. ``trades`` holds one dict per closed trade,
+    ``open_positions`` the broker's positions left at the end, and
+    ``equity`` a frame of ``time`` (epoch seconds), ``balance`` and
+    ``equity`` (cash plus open positions marked at their last close) after
+    every timestamp.
+    """
+    def __init__(self, trades: List[dict], equity: pd.DataFrame, open_positions: dict,
+                 starting_balance: float, bars: int, elapsed_sec: float = 0.0):
+        self.trades = trades
+        self.equity = equity
+        self.open_positions = open_positions
+        self.starting_balance = starting_balance
+        self.bars = bars
+        self.elapsed_sec = elapsed_sec
+
+    def trades_df(self) -> pd.DataFrame:
+        return pd.DataFrame(self.trades, columns=TRADE_FIELDS)
+
+    def summary(self) -> dict:
+        pnl = np.array([t["pnl"] for t in self.trades], dtype=np.float64)
+        curve = self.equity["equity"].to_numpy() if len(self.equity) else np.array([self.starting_balance])
+        peak = np.maximum.accumulate(np.concatenate(([self.starting_balance], curve)))[1:]
+        final = float(curve[-1])
+        return {
+            "bars": self.bars,
+            "trades": len(pnl),
+            "win_rate": float((pnl > 0).mean()) if len(pnl) else None,
+            "total_pnl": float(pnl.sum()),
+            "final_equity": final,
+            "return_pct": final / self.starting_balance - 1.0,
+            "max_drawdown_pct": float(((peak - curve) / peak).max()),
+            "open_positions": len(self.open_positions),
+            "bars_per_sec": self.bars / self.elapsed_sec if self.elapsed_sec else None,
+        }
+
+
+class Backtester:
+    """
+    Replays bars through ``PaperBroker`` on a simulated clock.
+
+    ``cfg`` is a full bot config (``strategy``, ``risk``, ``exits``,
+    ``trailing_stop``, ...). Frames need ``open``/``high``/``low``/``close``/
+    ``volume`` and, for real dates, a ``time`` column in epoch ms (see
+    ``read_csv_ohlcv(with_time=True)``); without one, bars are spaced by
+    ``timeframe`` from the epoch.
+    """
+    def __init__(self, cfg: dict, timeframe: str = "5m", intrabar: bool = True, logger=None):
+        self.cfg = cfg
+        self.timeframe = timeframe
+        self.intrabar = intrabar
+        self.logger = logger or QuietLogger()
+
+    def run(self, frames: Dict[str, pd.DataFrame],
+            signals: Optional[Dict[str, pd.DataFrame]] = None) -> BacktestResult:
+        """Backtest ``{symbol: bars}``; ``signals`` may supply precomputed ``compute_signals`` output."""
+        started = time.perf_counter()
+        symbols = list(frames)
+        if not symbols:
+            raise ValueError("no frames to backtest")
+        signals = dict(signals or {})
+        for sym in symbols:
+            if sym not in signals:
+                signals[sym] = compute_signals(frames[sym], self.cfg)
+        buy = {s: (signals[s]["signal"] == "BUY").to_numpy() for s in symbols}
+        score = {s: signals[s]["score"].to_numpy(dtype=np.float64) for s in symbols}
+        return self.replay(frames, buy, score, started)
+
+    def replay(self, frames: Dict[str, pd.DataFrame], buy: Dict[str, np.ndarray],
+               score: Dict[str, np.ndarray], started: Optional[float] = None,
+               tape: Optional[dict] = None) -> BacktestResult:
+        """
+        The portfolio simulation of ``run`` given each symbol's per-bar BUY
+        mask and score. ``started`` (a ``time.perf_counter()`` value) lets
+        the reported elapsed time include signal generation done elsewhere.
+        ``tape`` may supply ``self.tape(frames)`` reused across replays.
+        """
+        started = time.perf_counter() if started is None else started
+        tape = tape or self.tape(frames)
+        symbols = tape["symbols"]
+        buy = [np.asarray(buy[s], dtype=bool) for s in symbols]
+        score = [np.asarray(score[s], dtype=np.float64) for s in symbols]
+        return self._simulate(symbols, tape["bars"], buy, score, tape["close_times"], started)
+
+    def tape(self, frames: Dict[str, pd.DataFrame]) -> dict:
+        """The bars and close times ``replay`` walks; they depend only on the frames and timeframe."""
+        symbols = list(frames)
+        if not symbols:
+            raise ValueError("no frames to backtest")
+        step = parse_timeframe(self.timeframe)
+        # plain lists: per-bar indexing in the event loop is faster than on arrays
+        bars = [{k: frames[s][k].to_numpy(dtype=np.float64).tolist() for k in ("open", "high", "low", "close")}
+                for s in symbols]
+        close_times = [bar_open_times(frames[s], self.timeframe) + step for s in symbols]
+        return {"symbols": symbols, "bars": bars, "close_times": close_times}
+
+    def _simulate(self, symbols, bars, buy, score, close_times, started) -> BacktestResult:
+        clock = [0.0]
+        broker = PaperBroker(clock=lambda: clock[0], persist=False, cfg=self.cfg, logger=self.logger)
+        starting_balance = broker.balance
+
+        # Only two kinds of bar can change the broker: a BUY bar of a flat
+        # symbol and any bar of a held one. Entry bars are queued up front and
+        # a held symbol queues its next bar after each check. At equal close
+        # times every held bar (kind 0) goes before any entry (kind 1), as the
+        # live loop runs exits first; within a kind, symbols order.
+        times = [t.tolist() for t in close_times]
+        events = [(times[k][i], 1, k, i) for k in range(len(symbols)) for i in np.flatnonzero(buy[k]).tolist()]
+        heapq.heapify(events)
+        checked = [-1] * len(symbols)
+        open_trades: Dict[str, dict] = {}
+        trades: List[dict] = []
+        fills_t, fills_balance = [], []
+        held, held_at = [], {}  # [symbol index, qty, entry time, exit time] in entry order
+
+        while events:
+            t, kind, k, i = heapq.heappop(events)
+            clock[0] = t
+            sym = symbols[k]
+            b = bars[k]
+            if kind == 0:
+                checked[k] = i
+                fill = self._exit_check(broker, sym, b["open"][i], b["high"][i], b["low"][i], b["close"][i])
+                if fill is not None:
+                    price, reason = fill
+                    broker.roll_day()
+                    r = broker.sell(sym, price)
+                    if r:
+                        fills_t.append(t)
+                        fills_balance.append(broker.balance)
+                        held[held_at.pop(sym)][3] = t
+                        trade = open_trades.pop(sym)
+                        trade.update(exit_time=t, exit_price=r["price"], pnl=r["pnl"], reason=reason)
+                        trades.append(trade)
+                if sym in broker.positions and i + 1 < len(times[k]):
+                    heapq.heappush(events, (times[k][i + 1], 0, k, i + 1))
+            elif checked[k] != i and sym not in broker.positions and broker.can_open():
+                s = float(score[k][i])
+                o = broker.buy(sym, b["close"][i], entry_meta(self.cfg, s))
+                if o:
+                    fills_t.append(t)
+                    fills_balance.append(broker.balance)
+                    open_trades[sym] = {"symbol": sym, "entry_time": t, "entry_price": o["price"],
+                                        "qty": o["qty"], "score": s}
+                    held_at[sym] = len(held)
+                    held.append([k, o["qty"], t, np.inf])
+                    if i + 1 < len(times[k]):
+                        heapq.heappush(events, (times[k][i + 1], 0, k, i + 1))
+
+        equity = self._equity_curve(bars, close_times, starting_balance, fills_t, fills_balance, held)
+        return BacktestResult(trades, equity, broker.positions, starting_balance,
+                              sum(len(t) for t in times), time.perf_counter() - started)
+
+    @staticmethod
+    def _equity_curve(bars, close_times, starting_balance, fills_t, fills_balance, held) -> pd.DataFrame:
+        """Balance and marked equity after every timestamp, rebuilt from the fills."""
+        times = np.unique(np.concatenate(close_times))
+        after_fill = np.searchsorted(np.asarray(fills_t, dtype=np.float64), times, side="right")
+        balance = np.asarray([starting_balance] + fills_balance, dtype=np.float64)[after_fill]
+        # positions are added in entry order, the order broker.positions iterates in
+        value = np.zeros(len(times))
+        closes = {}
+        for k, qty, entry_t, exit_t in held:
+            if k not in closes:
+                closes[k] = np.asarray(bars[k]["close"], dtype=np.float64)
+            lo, hi = np.searchsorted(times, [entry_t, exit_t])
+            last = np.searchsorted(close_times[k], times[lo:hi], side="right") - 1
+            value[lo:hi] += qty * closes[k][last]
+        return pd.DataFrame({"time": times, "balance": balance, "equity": balance + value})
+
+    def _exit_check(self, broker: PaperBroker, sym: str, o: float, h: float, l: float, c: float):
+        """``(fill price, reason)`` if the position exits during this bar, else None."""
+        if not self.intrabar:
+            should_exit, reason = broker.should_exit(sym, c)
+            return (c, reason) if should_exit else None
+        path = (o, l, h, c) if c >= o else (o, h, l, c)
+        for j, price in enumerate(path):
+            pos = broker.positions[sym]
+            should_exit, reason = broker.should_exit(sym, price)
+            if should_exit:
+                if j == 0:  # gapped through the level at the open
+                    return price, reason
+                level = pos["tp_price"] if reason == "tp" else pos["stop"]
+                return level, reason
+        return None
@@ -0,0 +1,236 @@
+# utils/bar_builder.py
+import re
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional
+
+import pandas as pd
+
+from utils.seqlock import SeqLock
+
+OHLCV_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+BASE_STEP = 60          # every symbol keeps one 1-minute base series
+BASE_MAX_BARS = 5000    # ~3.5 days of 1m history
+ROLLUP_MAX_BARS = 1000  # per derived timeframe
+
+# ccxt timeframe units (ccxt treats a month as 30 days)
+_TF_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "M": 2592000}
+_TF_RE = re.compile(r"^(\d+)([smhdwM])$")
+
+
+def parse_timeframe(timeframe: str) -> int:
+    """Convert a ccxt-style timeframe ("5m", "4h", "1d") to seconds."""
+    m = _TF_RE.match(str(timeframe).strip())
+    if not m or int(m.group(1)) <= 0:
+        raise ValueError(f"unsupported timeframe: {timeframe!r}")
+    return int(m.group(1)) * _TF_UNITS[m.group(2)]
+
+
+def bars_to_df(rows: List[List[float]]) -> pd.DataFrame:
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+
+
+class BarBuilder:
+    """
+    Incremental OHLCV bars for a single symbol and bucket size.
+
+    Trades (or finished lower-timeframe bars) are folded into the forming bar
+    as they arrive, so reading the last N bars never rescans the history.
+    Bars are stored as ``[time_ms, open, high, low, close, volume]`` lists;
+    the forming bar is always the last element of ``bars``.
+    """
+    def __init__(self, step_sec: int, max_bars: int = ROLLUP_MAX_BARS):
+        self.step = int(step_sec)
+        self.bars: Deque[List[float]] = deque(maxlen=max_bars)
+        self._curr_bucket: Optional[int] = None
+
+    @property
+    def current_bucket(self) -> Optional[int]:
+        """Start (in seconds) of the forming bar, or None before the first print."""
+        return self._curr_bucket
+
+    def on_trade(self, ts_sec: float, price: float, size: float) -> Optional[List[float]]:
+        """Fold one print; returns the bar it closed when it opens a new bucket."""
+        bucket = int(ts_sec // self.step) * self.step
+        curr = self._curr_bucket
+        if curr is None or bucket > curr:
+            closed = self.bars[-1] if self.bars else None
+            self.bars.append([bucket * 1000, price, price, price, price, size])
+            self._curr_bucket = bucket
+            return closed
+
+        if bucket < curr:
+            self.on_late_trade(ts_sec, price, size)
+            return None
+
+        bar = self.bars[-1]
+        if price > bar[2]:
+            bar[2] = price
+        if price < bar[3]:
+            bar[3] = price
+        bar[4] = price
+        bar[5] += size
+        return None
+
+    def on_late_trade(self, ts_sec: float, price: float, size: float) -> None:
+        """
+        Fold a print that arrived after later ones into its bar, if still
+        held (old bars are never reopened). It widens high/low and adds
+        volume; the close stays the bar's latest print.
+        """
+        bar = self._find_bar(int(ts_sec // self.step) * self.step * 1000)
+        if bar is None:
+            return
+        if price > bar[2]:
+            bar[2] = price
+        if price < bar[3]:
+            bar[3] = price
+        bar[5] += size
+
+    def on_bar(self, bar: List[float]) -> None:
+        """Fold a finished bar of a smaller timeframe into this series."""
+        bucket = int(bar[0] // 1000 // self.step) * self.step
+        curr = self._curr_bucket
+        if curr is None or bucket > curr:
+            self.bars.append([bucket * 1000, bar[1], bar[2], bar[3], bar[4], bar[5]])
+            self._curr_bucket = bucket
+            return
+        target = self.bars[-1] if bucket == curr else self._find_bar(bucket * 1000)
+        if target is None:
+            return
+        if bar[2] > target[2]:
+            target[2] = bar[2]
+        if bar[3] < target[3]:
+            target[3] = bar[3]
+        target[4] = bar[4]
+        target[5] += bar[5]
+
+    def _find_bar(self, time_ms: int) -> Optional[List[float]]:
+        for bar in reversed(self.bars):
+            if bar[0] == time_ms:
+                return bar
+            if bar[0] < time_ms:
+                break
+        return None
+
+    def __len__(self) -> int:
+        return len(self.bars)
+
+    def tail(self, limit: Optional[int] = None) -> List[List[float]]:
+        """Copies of the last ``limit`` bars (all bars when falsy), oldest first."""
+        if limit and len(self.bars) > limit:
+            rows = [list(b) for b in islice(reversed(self.bars), limit)]
+            rows.reverse()
+            return rows
+        return [list(b) for b in self.bars]
+
+    def to_df(self, limit: Optional[int] = None) -> pd.DataFrame:
+        return bars_to_df(self.tail(limit))
+
+
+class TimeframeBars:
+    """
+    One 1-minute base series per symbol plus cached rollups.
+
+    Derived timeframes are registered on first request (seeded from the base
+    history) and then updated incrementally as each base bar closes, so any
+    number of readers can ask for different timeframes without re-aggregating.
+    Reads merge the still-forming base bar into the derived forming bar.
+
+    Mutations (``on_trade``/``load``) belong to a single writer thread that
+    brackets them with ``seq``; ``tail`` may run on any thread. ``_rollups``
+    is copy-on-write so a reader registering a new timeframe never resizes
+    the dict the writer is iterating.
+    """
+    def __init__(self, base_max_bars: int = BASE_MAX_BARS, rollup_max_bars: int = ROLLUP_MAX_BARS,
+                 seq: Optional[SeqLock] = None):
+        self.base = BarBuilder(BASE_STEP, base_max_bars)
+        self.rollup_max_bars = rollup_max_bars
+        self.seq = seq or SeqLock()
+        self._rollups: Dict[int, BarBuilder] = {}
+
+    def on_trade(self, ts_sec: float, price: float, size: float) -> Optional[List[float]]:
+        """Fold one print; returns the base bar it closed, if any."""
+        curr = self.base.current_bucket
+        late = curr is not None and ts_sec < curr
+        closed = self.base.on_trade(ts_sec, price, size)
+        if closed is not None:
+            for rollup in self._rollups.values():
+                rollup.on_bar(closed)
+        elif late:
+            # the base bar was already folded into the rollups; patch them too
+            for rollup in self._rollups.values():
+                rollup.on_late_trade(ts_sec, price, size)
+        return closed
+
+    def load(self, rows) -> None:
+        """Extend the base series with finished 1m bars (disk store, backfill)."""
+        for row in rows:
+            bar = [int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])]
+            curr = self.base.current_bucket
+            if curr is not None and bar[0] // 1000 <= curr:
+                continue  # history only extends the series forward
+            closed = self.base.bars[-1] if self.base.bars else None
+            self.base.on_bar(bar)
+            if closed is not None:
+                for rollup in self._rollups.values():
+                    rollup.on_bar(closed)
+
+    def timeframes(self) -> List[int]:
+        return sorted(self._rollups)
+
+    def rollup(self, step_sec: int) -> BarBuilder:
+        rollup = self._rollups.get(step_sec)
+        if rollup is not None:
+            return rollup
+        if step_sec % BASE_STEP:
+            raise ValueError(f"timeframe of {step_sec}s is not a multiple of the 1m base series")
+        while True:
+            start = self.seq.version
+            if start & 1:
+                time.sleep(0)
+                continue
+            try:
+                rollup = BarBuilder(step_sec, self.rollup_max_bars)
+                # seed from closed base bars; the forming one is merged on read
+                for bar in islice(self.base.bars, max(0, len(self.base.bars) - 1)):
+                    rollup.on_bar(bar)
+            except RuntimeError:
+                continue  # base mutated while seeding
+            rollups = dict(self._rollups)
+            rollups[step_sec] = rollup
+            self._rollups = rollups
+            # a write that overlapped the seed/publish may have missed this rollup
+            if self.seq.version == start:
+                return rollup
+
+    def tail(self, step_sec: int, limit: Optional[int] = None) -> List[List[float]]:
+        if step_sec == BASE_STEP:
+            return self.base.tail(limit)
+        rows = self.rollup(step_sec).tail(limit)
+        if not self.base.bars:
+            return rows
+        forming = self.base.bars[-1]
+        bucket_ms = int(forming[0] // 1000 // step_sec) * step_sec * 1000
+        if rows and rows[-1][0] == bucket_ms:
+            last = rows[-1]
+            last[2] = max(last[2], forming[2])
+            last[3] = min(last[3], forming[3])
+            last[4] = forming[4]
+            last[5] += forming[5]
+        elif not rows or rows[-1][0] < bucket_ms:
+            rows.append([bucket_ms, forming[1], forming[2], forming[3], forming[4], forming[5]])
+            if limit and len(rows) > limit:
+                rows = rows[-limit:]
+        return rows
+
+    def snapshot(self, step_sec: int, limit: Optional[int] = None) -> List[List[float]]:
+        """Consistent copy of ``tail`` that is safe to take from any thread."""
+        return self.seq.read(self.tail, step_sec, limit)
+
+    def to_df(self, step_sec: int, limit: Optional[int] = None) -> pd.DataFrame:
+        return bars_to_df(self.snapshot(step_sec, limit))
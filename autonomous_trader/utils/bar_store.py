@@ -0,0 +1,173 @@
+# utils/bar_store.py
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.bar_builder import parse_timeframe
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+BARS_DIR = os.path.join(BASE_DIR, "data", "bars")
+
+MAGIC = b"ATBARS01"
+VERSION = 1
+# fixed 64-byte header followed by ``capacity`` records of 6 little-endian float64
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("step", "<u4"),
+    ("capacity", "<u8"),
+    ("count", "<u8"),
+    ("head", "<u8"),
+    ("reserved", "V24"),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+RECORD_FIELDS = 6  # time_ms, open, high, low, close, volume
+
+DEFAULT_CAPACITY = 10080  # one week of 1m bars, ~480 KB per file
+MAX_GAP_BARS = 2  # missing bars live data may still continue (hub warm starts, the loop)
+
+
+class BarStore:
+    """
+    Fixed-width, memory-mapped ring of closed OHLCV bars for one symbol and
+    timeframe.
+
+    Records are ``[time_ms, open, high, low, close, volume]`` float64 rows.
+    Appends are idempotent on time: an older bar is ignored and a bar with the
+    same time as the newest record overwrites it, so replaying history after
+    a restart never duplicates rows.
+    """
+    def __init__(self, path: str, step_sec: int, capacity: int = DEFAULT_CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            self._create(path, step_sec, capacity)
+        self._header = np.memmap(path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        hdr = self._header[0]
+        if bytes(hdr["magic"]) != MAGIC or int(hdr["version"]) != VERSION:
+            raise ValueError(f"{path}: not a bar store file")
+        if int(hdr["step"]) != int(step_sec):
+            raise ValueError(f"{path}: stored step {int(hdr['step'])}s != requested {step_sec}s")
+        self.step = int(hdr["step"])
+        self.capacity = int(hdr["capacity"])
+        expected = HEADER_SIZE + self.capacity * RECORD_FIELDS * 8
+        if os.path.getsize(path) != expected:
+            raise ValueError(f"{path}: truncated bar store")
+        self._records = np.memmap(path, dtype="<f8", mode="r+", offset=HEADER_SIZE,
+                                  shape=(self.capacity, RECORD_FIELDS))
+
+    @staticmethod
+    def _create(path: str, step_sec: int, capacity: int) -> None:
+        hdr = np.zeros(1, dtype=HEADER_DTYPE)
+        hdr["magic"] = MAGIC
+        hdr["version"] = VERSION
+        hdr["step"] = step_sec
+        hdr["capacity"] = capacity
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(hdr.tobytes())
+            f.truncate(HEADER_SIZE + capacity * RECORD_FIELDS * 8)
+        os.replace(tmp, path)
+
+    def __len__(self) -> int:
+        return int(self._header[0]["count"])
+
+    def _last_slot(self) -> Optional[int]:
+        if not len(self):
+            return None
+        return (int(self._header[0]["head"]) - 1) % self.capacity
+
+    def last_time(self) -> Optional[int]:
+        slot = self._last_slot()
+        return None if slot is None else int(self._records[slot, 0])
+
+    def append(self, bar) -> bool:
+        """Store one closed bar; returns False when it is older than the newest record."""
+        with self._lock:
+            hdr = self._header[0]
+            slot = self._last_slot()
+            if slot is not None:
+                last_t = self._records[slot, 0]
+                if bar[0] < last_t:
+                    return False
+                if bar[0] == last_t:
+                    self._records[slot] = bar[:RECORD_FIELDS]
+                    return True
+            head = int(hdr["head"])
+            # write the record before publishing it through the header
+            self._records[head] = bar[:RECORD_FIELDS]
+            hdr["head"] = (head + 1) % self.capacity
+            hdr["count"] = min(self.capacity, int(hdr["count"]) + 1)
+            return True
+
+    def extend(self, rows) -> int:
+        return sum(1 for row in rows if self.append(row))
+
+    def read(self, limit: Optional[int] = None) -> np.ndarray:
+        """Copy of the newest ``limit`` bars (all when falsy), oldest first."""
+        with self._lock:
+            count = len(self)
+            n = count if not limit else min(limit, count)
+            if n == 0:
+                return np.empty((0, RECORD_FIELDS), dtype=np.float64)
+            end = int(self._header[0]["head"])
+            idx = (np.arange(end - n, end)) % self.capacity
+            return np.array(self._records[idx], dtype=np.float64)
+
+    def flush(self) -> None:
+        self._records.flush()
+        self._header.flush()
+
+
+# -------- per-process registry of open stores
+_STORES: Dict[Tuple[str, str, int], BarStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def store_path(symbol: str, timeframe: str, base_dir: str = BARS_DIR) -> str:
+    name = symbol.upper().replace("/", "-")
+    return os.path.join(base_dir, f"{name}_{timeframe}.bin")
+
+
+def open_bar_store(symbol: str, timeframe: str, base_dir: str = BARS_DIR,
+                   capacity: int = DEFAULT_CAPACITY) -> BarStore:
+    """Open (creating if needed) the shared store for ``symbol``/``timeframe``."""
+    step = parse_timeframe(timeframe)
+    path = store_path(symbol, timeframe, base_dir)
+    key = (os.path.abspath(path), timeframe, step)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = BarStore(path, step, capacity)
+            _STORES[key] = store
+        return store
+
+
+def load_recent_bars(symbol: str, timeframe: str, now: float, limit: int,
+                     base_dir: str = BARS_DIR, max_gap_bars: int = MAX_GAP_BARS) -> np.ndarray:
+    """
+    Stored bars for ``symbol`` if the newest one is recent enough to be
+    continued by live data (within ``max_gap_bars`` bars of ``now``).
+    Never creates a file; returns an empty array otherwise.
+    """
+    empty = np.empty((0, RECORD_FIELDS), dtype=np.float64)
+    if not os.path.exists(store_path(symbol, timeframe, base_dir)):
+        return empty
+    try:
+        store = open_bar_store(symbol, timeframe, base_dir)
+    except (OSError, ValueError) as e:
+        print(f"[STORE] cannot open {symbol} {timeframe}: {e}")
+        return empty
+    last = store.last_time()
+    if last is None or (now * 1000 - last) > (max_gap_bars + 1) * store.step * 1000:
+        return empty
+    return store.read(limit)
+
+
+def flush_all() -> None:
+    with _STORES_LOCK:
+        for store in _STORES.values():
+            store.flush()
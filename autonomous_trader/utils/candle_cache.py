@@ -0,0 +1,136 @@
+"""REST candle history kept between loop passes, topped up with ``since``.
+
+``fetch_candles`` used to request the full ``limit`` bars on every backfill,
+although it had fetched all but the newest one a pass earlier.
+``CandleCache`` keeps the REST bars per ``(symbol, timeframe)`` as one
+sorted ``(n, 6)`` array of time (ms), open, high, low, close, volume.
+``request`` says what to fetch next: everything when nothing usable is
+cached, else only the bars from the last cached one on (it may still have
+been forming). ``update`` splices the reply in and ``frame`` splices the
+live hub's bars over the tail; either one drops cached bars that the new
+ones do not continue, so a frame never has a hole. Both are a ``searchsorted`` and a
+concatenate on sorted arrays, with no concat, de-duplication or sort of
+DataFrames. ``seed`` starts a key from bars stored on disk, so the first
+request is already a top-up. ``retain`` drops symbols that left the active list.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+DEFAULT_CAPACITY = 1000  # bars kept per key
+
+
+def splice_bars(history: np.ndarray, recent: np.ndarray) -> np.ndarray:
+    """``history`` rows older than ``recent``'s first bar, then ``recent`` (both sorted by time)."""
+    if not len(recent):
+        return history
+    if not len(history):
+        return recent
+    cut = np.searchsorted(history[:, 0], recent[0, 0], side="left")
+    return np.concatenate((history[:cut], recent))
+
+
+def bars_array(bars) -> np.ndarray:
+    """ccxt-style rows or an OHLCV DataFrame as an ``(n, 6)`` float64 array."""
+    if isinstance(bars, pd.DataFrame):
+        return bars[OHLCV_COLUMNS].to_numpy(dtype=np.float64) if len(bars) else np.empty((0, 6))
+    return np.asarray(bars, dtype=np.float64).reshape(-1, 6)
+
+
+def bars_frame(arr: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(arr, columns=OHLCV_COLUMNS)
+    df["time"] = df["time"].astype("int64")
+    return df
+
+
+def _continue(history: Optional[np.ndarray], recent: np.ndarray, step_ms: int) -> np.ndarray:
+    """``splice_bars`` when ``recent`` continues ``history``, else ``recent`` alone (no gap)."""
+    if history is None or not len(history):
+        return recent
+    if len(recent) and recent[0, 0] > history[-1, 0] + step_ms:
+        return recent
+    return splice_bars(history, recent)
+
+
+class CandleCache:
+    """
+    REST bars per ``(symbol, timeframe)``, at most ``capacity`` each.
+    ``topups``/``full_fetches`` count the requests ``request`` planned.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = int(capacity)
+        self._bars: Dict[Tuple[str, str], np.ndarray] = {}
+        self.topups = 0
+        self.full_fetches = 0
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    def bars(self, symbol: str, timeframe: str) -> np.ndarray:
+        return self._bars.get((symbol, timeframe), np.empty((0, 6)))
+
+    def request(self, symbol: str, timeframe: str, limit: int, now_ms: float,
+                step_ms: int) -> Tuple[Optional[int], int]:
+        """
+        ``(since, limit)`` for the next ``fetch_ohlcv``: ``(None, limit)``
+        when fewer than ``limit`` bars are cached or they end more than
+        ``limit`` bars ago, else the last cached bar's time and enough bars
+        to reach ``now_ms``.
+        """
+        cached = self.bars(symbol, timeframe)
+        if len(cached) >= limit:
+            last = int(cached[-1, 0])
+            missing = int((now_ms - last) // step_ms) + 1
+            if missing < limit:
+                self.topups += 1
+                return last, missing + 1
+        self.full_fetches += 1
+        return None, limit
+
+    def update(self, symbol: str, timeframe: str, rows, step_ms: int) -> np.ndarray:
+        """
+        Merge a ``fetch_ohlcv`` reply; returns the rows as an array. Rows
+        that overlap the cache replace it from their first bar on; rows that
+        leave a gap after it replace it entirely.
+        """
+        new = bars_array(rows)
+        if not len(new):
+            return new
+        key = (symbol, timeframe)
+        self._bars[key] = _continue(self._bars.get(key), new, step_ms)[-self.capacity:]
+        return new
+
+    def seed(self, symbol: str, timeframe: str, rows, step_ms: int) -> None:
+        """
+        Older closed bars (the bar store) for a key whose cache ends before
+        them; a cache that already reaches as far is left alone, so seeding
+        never drops newer REST bars.
+        """
+        new = bars_array(rows)
+        key = (symbol, timeframe)
+        cached = self._bars.get(key)
+        if not len(new) or (cached is not None and len(cached) and cached[-1, 0] >= new[-1, 0]):
+            return
+        self._bars[key] = _continue(cached, new, step_ms)[-self.capacity:]
+
+    def frame(self, symbol: str, timeframe: str, live: Optional[pd.DataFrame], limit: int,
+              step_ms: int) -> pd.DataFrame:
+        """
+        The last ``limit`` bars: cached REST history with ``live`` bars over
+        the newest. Live bars that start more than a bar after the cache are
+        returned alone (the next ``request`` tops the cache up to them).
+        """
+        live_bars = bars_array(live) if live is not None else np.empty((0, 6))
+        merged = _continue(self.bars(symbol, timeframe), live_bars, step_ms)
+        if not len(merged):
+            return pd.DataFrame()
+        return bars_frame(merged[-limit:])
+
+    def retain(self, symbols: Iterable[str]) -> None:
+        """Forget every symbol not in ``symbols``."""
+        keep = set(symbols)
+        for key in [k for k in self._bars if k[0] not in keep]:
+            del self._bars[key]
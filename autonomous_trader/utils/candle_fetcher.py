@@ -0,0 +1,121 @@
+"""Concurrent REST candle backfill behind one shared rate limiter.
+
+``CandleFetcher.fetch_many`` runs ``fetch_ohlcv`` for many symbols on a
+bounded thread pool and yields each result as soon as it arrives, so the
+trading loop can evaluate the first symbols while the rest are in flight.
+Every request first takes a token from a ``RateLimiter`` shared by all
+threads. Kraken allows public REST calls at about one per second with a
+small burst, and a rate-limit error from the exchange pauses every thread
+for a while.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE_PER_SEC = 1.0
+DEFAULT_BURST = 3
+RATE_LIMIT_BACKOFF_SEC = 5.0
+
+# ccxt errors that mean "slow down" (matched by name so ccxt stays optional)
+RATE_LIMIT_ERRORS = {"RateLimitExceeded", "DDoSProtection"}
+
+
+class RateLimiter:
+    """
+    Token bucket shared between threads: ``rate_per_sec`` tokens a second,
+    at most ``burst`` saved up. ``acquire`` blocks until a token is free;
+    ``backoff`` holds every caller for ``seconds``.
+    """
+    def __init__(self, rate_per_sec: float = DEFAULT_RATE_PER_SEC, burst: int = DEFAULT_BURST,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate_per_sec <= 0 or burst < 1:
+            raise ValueError("rate_per_sec must be positive and burst at least 1")
+        self.rate = float(rate_per_sec)
+        self.burst = float(burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as needed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    # no tokens accrue during a pause: _updated is the pause's end
+                    self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+                    self._updated = max(self._updated, now)
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return waited
+                    wait = (1.0 - self._tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+    def backoff(self, seconds: float = RATE_LIMIT_BACKOFF_SEC) -> None:
+        with self._lock:
+            now = self.clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class CandleFetcher:
+    """
+    Runs ``fetch(symbol, timeframe=..., limit=...)`` (e.g. a ccxt
+    exchange's ``fetch_ohlcv``) for many symbols at once, at most
+    ``workers`` in flight, each after a ``limiter`` token. A rate-limit
+    error pauses the limiter for ``backoff_sec``.
+    """
+    def __init__(self, fetch: Callable[..., list], workers: int = DEFAULT_WORKERS,
+                 limiter: Optional[RateLimiter] = None, backoff_sec: float = RATE_LIMIT_BACKOFF_SEC):
+        self.fetch = fetch
+        self.workers = max(1, int(workers))
+        self.limiter = limiter or RateLimiter()
+        self.backoff_sec = backoff_sec
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="candles")
+
+    @classmethod
+    def from_config(cls, fetch: Callable[..., list], cfg: dict) -> "CandleFetcher":
+        rest = cfg.get("rest", {})
+        limiter = RateLimiter(rest.get("rate_per_sec", DEFAULT_RATE_PER_SEC), rest.get("burst", DEFAULT_BURST))
+        return cls(fetch, rest.get("max_concurrency", DEFAULT_WORKERS), limiter,
+                   rest.get("backoff_sec", RATE_LIMIT_BACKOFF_SEC))
+
+    def fetch_one(self, symbol: str, timeframe: str = "5m", limit: int = 200, since: Optional[int] = None) -> list:
+        """One rate-limited request on the calling thread."""
+        self.limiter.acquire()
+        try:
+            if since is None:
+                return self.fetch(symbol, timeframe=timeframe, limit=limit)
+            return self.fetch(symbol, timeframe=timeframe, since=since, limit=limit)
+        except Exception as e:
+            if any(c.__name__ in RATE_LIMIT_ERRORS for c in type(e).__mro__):
+                self.limiter.backoff(self.backoff_sec)
+            raise
+
+    def fetch_many(self, requests: Iterable[Tuple[str, Optional[int], int]],
+                   timeframe: str = "5m") -> Iterator[Tuple[str, Optional[list], Optional[Exception]]]:
+        """
+        Run ``(symbol, since, limit)`` requests and yield ``(symbol, ohlcv,
+        None)`` or ``(symbol, None, error)`` for each in completion order.
+        Requests start in the given order.
+        """
+        futures = {self._pool.submit(self.fetch_one, s, timeframe, limit, since): s for s, since, limit in requests}
+        for fut in as_completed(futures):
+            sym = futures[fut]
+            try:
+                yield sym, fut.result(), None
+            except Exception as e:
+                yield sym, None, e
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -6,9 +6,10 @@ from typing import IO, Union
 import pandas as pd
 
 REQUIRED_COLUMNS = ["open", "high", "low", "close", "volume"]
+TIME_COLUMNS = ["timestamp", "time", "date", "datetime"]
 
 
-def read_csv_ohlcv(path: Union[str, Path, IO[str]]) -> pd.DataFrame:
+def read_csv_ohlcv(path: Union[str, Path, IO[str]], with_time: bool = False) -> pd.DataFrame:
     """Read OHLCV bars from a CSV file and validate integrity.
 
     Parameters
@@ -18,14 +19,22 @@ def read_csv_ohlcv(path: Union[str, Path, IO[str]]) -> pd.DataFrame:
         contain ``open``, ``high``, ``low``, ``close`` and ``volume``
         columns. Optional timestamp columns such as ``timestamp`` or
         ``date`` are used to ensure the data are ordered chronologically.
+    with_time:
+        Also return the timestamp column as ``time`` in epoch milliseconds
+        (the bot's bar convention), e.g. for
+        :class:`utils.backtester.Backtester`. Numeric timestamps are read as
+        epoch seconds, or milliseconds when they are too large for seconds.
 
     Returns
     -------
     pandas.DataFrame
-        DataFrame containing only the required OHLCV columns sorted in
+        DataFrame containing only the required OHLCV columns (plus ``time``
+        with ``with_time``) sorted in
         chronological order. The data types are coerced to ``float`` so the
         frame can be fed directly into
-        :func:`strategies.ai_combo_strategy.generate_signal`.
+        :func:`strategies.ai_combo_strategy.generate_signal`, or into
+        :func:`strategies.ai_combo_strategy.generate_signal_series` for
+        the signal at every bar.
 
     Raises
     ------
@@ -50,15 +59,25 @@ def read_csv_ohlcv(path: Union[str, Path, IO[str]]) -> pd.DataFrame:
     missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
     if missing:
         raise ValueError(f"missing required columns: {', '.join(missing)}")
+    if with_time and not any(c in df.columns for c in TIME_COLUMNS):
+        raise ValueError("with_time needs a timestamp, time, date or datetime column")
 
-    time_col = next(
-        (c for c in ["timestamp", "time", "date", "datetime"] if c in df.columns),
-        None,
-    )
+    time_col = next((c for c in TIME_COLUMNS if c in df.columns), None)
     if time_col is not None:
         ts = pd.to_datetime(df[time_col])
         if not ts.is_monotonic_increasing:
             raise ValueError("CSV rows must be in chronological order")
         df = df.sort_values(time_col)
 
-    return df[REQUIRED_COLUMNS].astype(float).reset_index(drop=True)
+    out = df[REQUIRED_COLUMNS].astype(float).reset_index(drop=True)
+    if with_time:
+        out.insert(0, "time", _epoch_ms(df[time_col]).to_numpy())
+    return out
+
+
+def _epoch_ms(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        scale = 1 if values.abs().max() >= 1e11 else 1000  # seconds until the year 5138
+        return (values * scale).astype("int64")
+    ts = pd.to_datetime(values, utc=True)
+    return (ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
@@ -0,0 +1,145 @@
+# utils/event_scheduler.py
+"""Bar-close and price events from the live hub, for the trading loop.
+
+The trading loop used to sleep 10 seconds and then evaluate every symbol,
+changed or not, so a 5m bar close waited up to 10s for its decision. The
+hub now publishes two events from its callbacks and the loop waits on an
+``EventScheduler`` instead:
+
+* ``bar_closed``: a print opened a new 1m bar. If that also starts a new
+  bar of the trading timeframe, the symbol's entry signal is due.
+* ``price``: a trade or ticker price. Only symbols with an open position
+  (``watch``) are kept; their exit check is due.
+
+Events for one symbol coalesce until the loop takes them. A symbol that
+has not been evaluated for ``fallback_sec`` (no prints, or no hub at all)
+is due on a timer; ``from_config`` reads it from ``scheduler.fallback_sec``. Every decision records the time from its event to the
+decision, per kind, in a ``LogHistogram``.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.bar_builder import parse_timeframe
+from utils.feed_stats import LogHistogram, _ms
+
+DEFAULT_FALLBACK_SEC = 30.0  # only when scheduler.fallback_sec is not configured
+EVENT_KINDS = ("bar", "price")
+
+
+class EventScheduler:
+    """
+    Pending entry and exit work per symbol. The hub thread publishes
+    (``bar_closed``, ``price``), the trading thread ``wait``s, acts and
+    ``record``s. Times come from ``clock`` (monotonic seconds).
+    """
+    def __init__(self, timeframe: str = "5m", fallback_sec: float = DEFAULT_FALLBACK_SEC,
+                 clock: Callable[[], float] = time.monotonic):
+        self.step = parse_timeframe(timeframe)
+        self.fallback_sec = float(fallback_sec)
+        self.clock = clock
+        self.latency = {kind: LogHistogram() for kind in EVENT_KINDS}
+        self.events = {kind: 0 for kind in EVENT_KINDS}
+        self.timer_runs = 0
+        self._cond = threading.Condition()
+        self._bars: Dict[str, float] = {}                   # symbol -> first pending bar close
+        self._prices: Dict[str, Tuple[float, float]] = {}   # symbol -> (latest price, first pending update)
+        self._watched: frozenset = frozenset()
+        self._evaluated: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "EventScheduler":
+        """Scheduler for ``timeframe_crypto`` with ``scheduler.fallback_sec``."""
+        sched = cfg.get("scheduler", {})
+        return cls(cfg.get("timeframe_crypto", "5m"), sched.get("fallback_sec", DEFAULT_FALLBACK_SEC))
+
+    # ---------- hub side (feed thread)
+    def bar_closed(self, symbol: str, bar_ms: float, bucket_sec: float) -> None:
+        """
+        The 1m bar opened at ``bar_ms`` closed and the one at ``bucket_sec``
+        is forming; queues an entry check when they straddle a trading bar.
+        """
+        if int(bucket_sec // self.step) <= int(bar_ms // 1000 // self.step):
+            return
+        with self._cond:
+            self.events["bar"] += 1
+            self._bars.setdefault(symbol, self.clock())
+            self._cond.notify()
+
+    def price(self, symbol: str, price: float) -> None:
+        """A new price; queues an exit check if ``symbol`` is watched."""
+        if symbol not in self._watched:
+            return
+        with self._cond:
+            self.events["price"] += 1
+            pending = self._prices.get(symbol)
+            self._prices[symbol] = (price, pending[1] if pending else self.clock())
+            self._cond.notify()
+
+    # ---------- trading loop side
+    def watch(self, symbols: Iterable[str]) -> None:
+        """Publish price events for these symbols only (the open positions)."""
+        self._watched = frozenset(symbols)
+
+    def _next_due(self, symbols: List[str]) -> float:
+        return min((self._evaluated.get(s, -math.inf) + self.fallback_sec for s in symbols), default=math.inf)
+
+    def wait(self, symbols: Iterable[str],
+             timeout: float) -> Tuple[Dict[str, Optional[float]], Dict[str, Tuple[float, float]]]:
+        """
+        Block until an event is pending, one of ``symbols`` is due on the
+        fallback timer, or ``timeout`` passes. Returns ``(entries, exits)``:
+        ``{symbol: event time, or None when due on the timer}`` for the
+        ``symbols`` to evaluate, in their order, and ``{symbol: (price,
+        event time)}`` for the watched symbols to check. Bar closes of other
+        symbols stay pending until a call that asks for them.
+        """
+        symbols = list(symbols)
+        with self._cond:
+            deadline = self.clock() + max(0.0, timeout)
+            while True:
+                now = self.clock()
+                next_due = self._next_due(symbols)
+                if (self._prices or next_due <= now or now >= deadline
+                        or any(sym in self._bars for sym in symbols)):
+                    break
+                self._cond.wait(min(deadline, next_due) - now)
+            entries: Dict[str, Optional[float]] = {}
+            for sym in symbols:
+                if sym in self._bars:
+                    entries[sym] = self._bars.pop(sym)
+                elif self._evaluated.get(sym, -math.inf) + self.fallback_sec <= now:
+                    entries[sym] = None
+                    self.timer_runs += 1
+                else:
+                    continue
+                self._evaluated[sym] = now
+            exits, self._prices = self._prices, {}
+        active = set(symbols)
+        for sym in [s for s in self._evaluated if s not in active]:
+            del self._evaluated[sym]  # left the list: due at once if it returns
+        return entries, exits
+
+    def record(self, kind: str, event_time: Optional[float]) -> None:
+        """A decision on a ``kind`` event published at ``event_time`` (None: timer, not recorded)."""
+        if event_time is not None:
+            self.latency[kind].record(max(0.0, self.clock() - event_time))
+
+    def summary(self) -> Dict[str, object]:
+        out: Dict[str, object] = {"timer_runs": self.timer_runs}
+        for kind, hist in self.latency.items():
+            out[f"{kind}_events"] = self.events[kind]
+            out[f"{kind}_decisions"] = hist.count
+            for q in (50, 99):
+                value = hist.quantile(q / 100)
+                out[f"{kind}_p{q}_ms"] = None if value is None else value * 1000.0
+        return out
+
+    def heartbeat(self) -> str:
+        """One-line digest for the trading loop's ``[HB]`` line."""
+        s = self.summary()
+        return (f"sched bar={_ms(s['bar_p50_ms'])}/{_ms(s['bar_p99_ms'])} "
+                f"px={_ms(s['price_p50_ms'])}/{_ms(s['price_p99_ms'])} "
+                f"decisions={s['bar_decisions']}+{s['price_decisions']} timer={s['timer_runs']}")
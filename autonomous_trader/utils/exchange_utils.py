@@ -1,5 +1,8 @@
 # utils/exchange_utils.py
-import os, json
+import os, json, threading
+
+from utils.market_catalog import CATALOG_PATH, MarketCatalog
+
 BASE = os.path.dirname(os.path.dirname(__file__))
 CFG = json.load(open(os.path.join(BASE, "config", "config.json"), "r"))
 
@@ -21,7 +24,7 @@ class DummyExchange:
         # Not used in cryptofeed mode
         return {}
 
-    def fetch_ohlcv(self, symbol, timeframe="5m", limit=200):
+    def fetch_ohlcv(self, symbol, timeframe="5m", since=None, limit=200):
         try:
             from utils.market_data_cryptofeed import get_global_hub
             hub = get_global_hub()
@@ -47,20 +50,41 @@ def get_exchange():
     exchange = ex_class({"enableRateLimit": CFG.get("rate_limit", True)})
     return exchange
 
+# one market catalog per process, shared by the trading loop and the trending feed
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_market_catalog(exchange=None):
+    """
+    The process-wide ``MarketCatalog``. It loads markets through
+    ``exchange`` (the first caller's, else a new ``get_exchange()``) and is
+    kept for ``market_catalog.ttl_minutes`` in data/runtime/markets.json.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            ex = exchange if exchange is not None else get_exchange()
+            ttl_min = float((CFG.get("market_catalog") or {}).get("ttl_minutes", 720))
+            # ccxt caches markets on the exchange; reload, or refreshes return the same dict
+            _catalog = MarketCatalog(lambda: ex.load_markets(True), exchange=(CFG.get("exchange") or "").lower(),
+                                     path=CATALOG_PATH, ttl_sec=ttl_min * 60)
+        return _catalog
+
 def filter_supported_symbols(exchange, symbols):
     """
     Filters the provided symbols for those supported by the exchange.
     In cryptofeed (DummyExchange) mode, skips ccxt REST entirely and just
-    does a basic format check.
+    does a basic format check. Otherwise symbols are looked up in the
+    market catalog (no REST call unless it is stale) and returned under
+    the exchange's own name (``XBT/USDT`` -> ``BTC/USDT`` on ccxt Kraken).
     """
     if isinstance(exchange, DummyExchange):
         # Basic sanity check: keep only symbols that look like "XXX/YYY"
         return [s for s in symbols if "/" in s]
 
-    # ccxt path (calls REST)
-    markets = exchange.load_markets()
+    catalog = get_market_catalog(exchange)
     ok = []
     for s in symbols:
-        if s in markets and markets[s].get("spot", False):
-            ok.append(s)
+        if catalog.is_spot(s):
+            ok.append(catalog.resolve(s))
     return ok
@@ -0,0 +1,158 @@
+# utils/exit_engine.py
+"""Stops and take-profits checked on every trade print.
+
+Exits used to be checked only when the trading loop visited a symbol, so a
+fast move could run well past ``stop`` or ``tp_price`` before the sell.
+``ExitEngine`` is fed directly by the hub's trade callbacks. It sells with
+``PaperBroker.sell`` on the print that crosses a level.
+
+Checking every print with ``should_exit`` would be correct but wasteful:
+almost every print changes nothing. The engine keeps a price band per open
+position, ``PaperBroker.exit_levels``. Its low end is the stop. Its high
+end is the lowest price that hits the take-profit or changes the trailing
+state: a new peak, the trail activating, or the move to breakeven. A print
+inside the band is two comparisons. A print on or outside it runs
+``should_exit`` exactly as the loop would. That updates the trailing state
+or sells, and the band is then rebuilt from the position. Trailing
+therefore behaves as if ``should_exit`` had seen every print.
+
+Only the band comparison runs on the hub thread. A print on or outside the
+band is queued, and a worker thread runs ``should_exit``, the sell and
+``on_exit`` (trade log, notifications), so file and network I/O never
+stall the feed. While a symbol has queued prints its band may be stale,
+so every later print for it is queued too, and the worker sees them in
+order.
+
+``PaperBroker`` holds at most one position per symbol, so the level index
+is one band per symbol. A trade batch is first tested against the band
+with its min and max.
+
+The broker is shared by the worker and the trading thread, and both call
+it under ``lock``. The hub thread never takes it. The trading loop exits
+through ``check``. It checks capacity and buys under the lock, then calls
+``sync``, so the bands never lag the positions.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from utils.feed_stats import LogHistogram, _ms
+
+
+class ExitEngine:
+    """
+    Exit checks for ``broker``'s open positions. ``on_exit(symbol, price,
+    result, reason)`` runs after each sell, outside the lock, on the thread
+    that sold (the worker for hub prints).
+    """
+    def __init__(self, broker, on_exit: Optional[Callable[[str, float, dict, str], None]] = None):
+        self.broker = broker
+        self.on_exit = on_exit
+        self.lock = threading.RLock()
+        self.prints = 0      # prints seen for symbols with a position
+        self.checks = 0      # ... that left the band and ran should_exit
+        self.exits = 0
+        self.check_time = LogHistogram()  # should_exit (+ sell) per check
+        self._bands: Dict[str, Tuple[float, float]] = {}
+        self._queue: "queue.Queue[Tuple[str, float]]" = queue.Queue()
+        self._queued: Dict[str, int] = {}  # symbol -> prints waiting for the worker
+        self._queued_lock = threading.Lock()  # guards _queued only; never held across I/O
+        self._worker: Optional[threading.Thread] = None
+
+    def sync(self) -> None:
+        """Rebuild every band from the broker's positions (after buys, or a restart)."""
+        with self.lock:
+            self._bands = {sym: self.broker.exit_levels(sym) for sym in list(self.broker.positions)}
+
+    def band(self, symbol: str) -> Optional[Tuple[float, float]]:
+        return self._bands.get(symbol)
+
+    def check(self, symbol: str, price: float) -> Optional[dict]:
+        """``should_exit`` at ``price``; sells on a hit and returns ``sell``'s result."""
+        started = time.perf_counter()
+        with self.lock:
+            if symbol not in self.broker.positions:
+                self._bands.pop(symbol, None)
+                return None
+            self.checks += 1
+            should_exit, reason = self.broker.should_exit(symbol, price)
+            result = self.broker.sell(symbol, price) if should_exit else None
+            if symbol in self.broker.positions:
+                self._bands[symbol] = self.broker.exit_levels(symbol)
+            else:
+                self._bands.pop(symbol, None)
+            if result:
+                self.exits += 1
+            self.check_time.record(time.perf_counter() - started)
+        if result and self.on_exit is not None:
+            self.on_exit(symbol, price, result, reason)
+        return result
+
+    # ---------- hub thread
+    def on_trade(self, symbol: str, price: float) -> bool:
+        """One print; queues a check when it leaves the band. Returns whether it was queued."""
+        # read the queue count before the band: the worker refreshes the band first
+        behind = symbol in self._queued
+        band = self._bands.get(symbol)
+        if band is None:
+            return False
+        self.prints += 1
+        if not behind and band[0] < price < band[1]:
+            return False
+        with self._queued_lock:
+            self._queued[symbol] = self._queued.get(symbol, 0) + 1
+        self._queue.put((symbol, price))
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="exit-engine", daemon=True)
+            self._worker.start()
+        return True
+
+    def on_trades(self, symbol: str, prices: Iterable[float]) -> bool:
+        """A batch of prints in time order; returns whether any was queued."""
+        behind = symbol in self._queued
+        band = self._bands.get(symbol)
+        if band is None:
+            return False
+        prices = list(prices)
+        if prices and not behind and band[0] < min(prices) and max(prices) < band[1]:
+            self.prints += len(prices)
+            return False
+        queued = False
+        for price in prices:
+            queued = self.on_trade(symbol, price) or queued
+        return queued
+
+    # ---------- worker thread
+    def _run(self) -> None:
+        while True:
+            symbol, price = self._queue.get()
+            try:
+                self.check(symbol, price)
+            except Exception as e:
+                print(f"[EXIT] check failed for {symbol} @ {price}: {e}")
+            finally:
+                with self._queued_lock:
+                    left = self._queued[symbol] - 1
+                    if left:
+                        self._queued[symbol] = left
+                    else:
+                        del self._queued[symbol]
+                self._queue.task_done()
+
+    def drain(self) -> None:
+        """Block until every queued print has been checked (tests, shutdown)."""
+        self._queue.join()
+
+    def summary(self) -> Dict[str, object]:
+        p99 = self.check_time.quantile(0.99)
+        return {"positions": len(self._bands), "prints": self.prints, "checks": self.checks,
+                "exits": self.exits, "queued": self._queue.qsize(),
+                "check_p99_ms": None if p99 is None else p99 * 1000.0}
+
+    def heartbeat(self) -> str:
+        """One-line digest for the trading loop's ``[HB]`` line."""
+        s = self.summary()
+        return (f"exits prints={s['prints']} checks={s['checks']} sold={s['exits']} "
+                f"queued={s['queued']} chk_p99={_ms(s['check_p99_ms'])}")
@@ -0,0 +1,147 @@
+# utils/feed_recorder.py
+import asyncio
+import gzip
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+RECORDINGS_DIR = os.path.join(BASE_DIR, "data", "recordings")
+
+FORMAT_HEADER = "# atfeed v1"
+FLUSH_LINES = 1000      # buffered messages per compressed write
+FLUSH_SEC = 2.0         # ... or at most this old
+YIELD_EVERY = 1000      # max-speed replay yields to the loop this often
+
+# One message per line, comma separated (symbols never contain commas):
+#   t,<receipt>,<symbol>,<ts>,<side>,<amount>,<price>
+#   k,<receipt>,<symbol>,<ts>,<bid>,<ask>,<last>,<volume>
+# Missing values are written as empty fields.
+
+
+def _num(x) -> str:
+    return "" if x is None else repr(float(x))
+
+
+def _opt(s: str) -> Optional[float]:
+    return float(s) if s else None
+
+
+def recording_path(base_dir: str = RECORDINGS_DIR, now: Optional[float] = None) -> str:
+    """Default file for today's recording (one file per UTC day, appended to)."""
+    day = time.strftime("%Y%m%d", time.gmtime(now if now is not None else time.time()))
+    return os.path.join(base_dir, f"feed_{day}.csv.gz")
+
+
+class FeedRecorder:
+    """
+    Append-only, gzip-compressed log of every ticker and trade message a hub
+    receives, written from the feed callbacks.
+
+    Messages are buffered and compressed in batches so recording costs the
+    callback one string format. Each open appends a new gzip member, which
+    ``gzip`` readers treat as one continuous stream, so a recording can span
+    restarts; a crash loses at most the unflushed buffer.
+    """
+    def __init__(self, path: str, flush_lines: int = FLUSH_LINES, flush_sec: float = FLUSH_SEC):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = gzip.open(path, "ab", compresslevel=5)
+        self._buf: List[str] = [f"{FORMAT_HEADER} started={time.time():.3f}"]
+        self._flush_lines = flush_lines
+        self._flush_sec = flush_sec
+        self._last_flush = time.monotonic()
+        self.count = 0
+
+    def trade(self, symbol: str, ts, side, amount, price, receipt) -> None:
+        self._append(f"t,{_num(receipt)},{symbol},{_num(ts)},{side or ''},{_num(amount)},{_num(price)}")
+
+    def ticker(self, symbol: str, ts, bid, ask, receipt, last=None, volume=None) -> None:
+        self._append(f"k,{_num(receipt)},{symbol},{_num(ts)},{_num(bid)},{_num(ask)},{_num(last)},{_num(volume)}")
+
+    def _append(self, line: str) -> None:
+        self._buf.append(line)
+        self.count += 1
+        if len(self._buf) >= self._flush_lines or time.monotonic() - self._last_flush >= self._flush_sec:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buf:
+            self._fh.write(("\n".join(self._buf) + "\n").encode())
+            self._buf = []
+        self._fh.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self._fh is None:
+            return
+        self.flush()
+        self._fh.close()
+        self._fh = None
+
+
+Record = Tuple[str, float, str, tuple]
+
+
+def read_records(path: str) -> Iterator[Record]:
+    """
+    Yield ``(kind, receipt, symbol, fields)`` from a recording, where kind is
+    ``"t"`` (fields: ts, side, amount, price) or ``"k"`` (fields: ts, bid,
+    ask, last, volume). A truncated tail (the writer crashed) ends the stream.
+    """
+    with gzip.open(path, "rt") as f:
+        try:
+            for line in f:
+                if not line or line[0] == "#":
+                    continue
+                parts = line.rstrip("\n").split(",")
+                kind = parts[0]
+                if kind == "t" and len(parts) == 7:
+                    yield kind, float(parts[1]), parts[2], (
+                        _opt(parts[3]), parts[4] or None, float(parts[5]), float(parts[6]))
+                elif kind == "k" and len(parts) == 8:
+                    yield kind, float(parts[1]), parts[2], (
+                        _opt(parts[3]), _opt(parts[4]), _opt(parts[5]), _opt(parts[6]), _opt(parts[7]))
+        except (EOFError, gzip.BadGzipFile):
+            return
+
+
+async def replay(path: str, hub, speed: Optional[float] = 1.0) -> int:
+    """
+    Feed a recording through ``hub._on_trade``/``hub._on_ticker`` using the
+    legacy positional callback signature both hubs accept. ``speed`` scales
+    the recorded receipt-time gaps (1 = real time, 60 = a minute per second);
+    ``None`` or ``0`` replays as fast as the hub can take it. Returns the
+    number of messages delivered.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first_receipt = None
+    n = 0
+    for kind, receipt, symbol, fields in read_records(path):
+        if speed:
+            if first_receipt is None:
+                first_receipt = receipt
+            delay = started + (receipt - first_receipt) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif n % YIELD_EVERY == 0:
+            await asyncio.sleep(0)  # let other tasks on the loop run
+        if kind == "t":
+            ts, side, amount, price = fields
+            await hub._on_trade(None, symbol, None, ts, side, amount, price, receipt)
+        else:
+            ts, bid, ask, last, volume = fields
+            await hub._on_ticker(None, symbol, bid, ask, ts, receipt, last=last, volume=volume)
+        n += 1
+    return n
+
+
+def run_replay(path: str, hub, speed: Optional[float] = 1.0) -> int:
+    """Blocking replay on a fresh event loop (drop-in for ``hub.run()``)."""
+    print(f"[REPLAY] {path} at {'max' if not speed else f'{speed:g}x'} speed")
+    started = time.perf_counter()
+    n = asyncio.run(replay(path, hub, speed))
+    elapsed = time.perf_counter() - started
+    print(f"[REPLAY] {n} messages in {elapsed:.1f}s ({n / max(elapsed, 1e-9):,.0f} msg/s)")
+    return n
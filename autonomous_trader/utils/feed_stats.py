@@ -0,0 +1,193 @@
+# utils/feed_stats.py
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+# log-spaced histogram: 4 buckets per decade from 1µs up to 100s
+HIST_MIN_SEC = 1e-6
+HIST_BUCKETS_PER_DECADE = 4
+HIST_DECADES = 8
+HIST_SIZE = HIST_BUCKETS_PER_DECADE * HIST_DECADES + 2  # + underflow/overflow
+
+RATE_WINDOW_SEC = 60    # message rates are averaged over the last minute
+
+
+class LogHistogram:
+    """
+    Fixed-size histogram of durations in seconds with log-spaced buckets.
+
+    Recording is O(1) and allocation free, so it is cheap enough to run in
+    every feed callback. Quantiles are reported as the upper edge of the
+    bucket they fall in (within ~78% of the true value at 4 buckets/decade).
+    """
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * HIST_SIZE
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_of(value: float) -> int:
+        if value < HIST_MIN_SEC:
+            return 0
+        idx = int(math.log10(value / HIST_MIN_SEC) * HIST_BUCKETS_PER_DECADE) + 1
+        return idx if idx < HIST_SIZE else HIST_SIZE - 1
+
+    @staticmethod
+    def upper_edge(idx: int) -> float:
+        if idx >= HIST_SIZE - 1:
+            return math.inf
+        return HIST_MIN_SEC * 10 ** (idx / HIST_BUCKETS_PER_DECADE)
+
+    def record(self, value: float) -> None:
+        self.counts[self.bucket_of(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LogHistogram") -> None:
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        counts = list(self.counts)  # copy: the feed thread keeps recording
+        n = sum(counts)
+        if not n:
+            return None
+        target = q * n
+        seen = 0
+        for idx, c in enumerate(counts):
+            seen += c
+            if seen >= target and c:
+                return min(self.upper_edge(idx), self.max) if idx else HIST_MIN_SEC
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class ChannelStats:
+    """Counters for one (symbol, channel) stream."""
+    __slots__ = ("count", "latency", "processing", "clock_skew", "_rate_sec", "_rate_counts")
+
+    def __init__(self):
+        self.count = 0
+        self.latency = LogHistogram()      # receipt - exchange timestamp
+        self.processing = LogHistogram()   # time spent inside the callback
+        self.clock_skew = 0                # messages stamped after they were received
+        self._rate_sec = [0] * RATE_WINDOW_SEC
+        self._rate_counts = [0] * RATE_WINDOW_SEC
+
+    def record(self, now: float, latency: Optional[float], processing: float, n: int = 1) -> None:
+        self.count += n
+        sec = int(now)
+        slot = sec % RATE_WINDOW_SEC
+        if self._rate_sec[slot] != sec:
+            self._rate_sec[slot] = sec
+            self._rate_counts[slot] = 0
+        self._rate_counts[slot] += n
+        if latency is not None:
+            if latency < 0:
+                self.clock_skew += 1
+                latency = 0.0
+            self.latency.record(latency)
+        self.processing.record(processing)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Messages per second over the last ``RATE_WINDOW_SEC`` seconds."""
+        sec = int(now if now is not None else time.time())
+        oldest = sec - RATE_WINDOW_SEC
+        total = sum(c for s, c in zip(list(self._rate_sec), list(self._rate_counts)) if oldest < s <= sec)
+        return total / RATE_WINDOW_SEC
+
+
+class FeedStats:
+    """
+    Per-symbol, per-channel message rates plus latency and callback-time
+    histograms for a live hub.
+
+    Only the feed thread records; any thread may read. Readers work on
+    copies, so a summary can be off by the handful of messages recorded
+    while it was being built, which is fine for monitoring.
+    """
+    def __init__(self):
+        self._channels: Dict[Tuple[str, str], ChannelStats] = {}
+        self.started = time.time()
+
+    def record(self, symbol: str, channel: str, exchange_ts: Optional[float],
+               receipt_ts: Optional[float], processing_sec: float, n: int = 1) -> None:
+        """Record one callback; ``n`` > 1 counts a batch of messages handled in it."""
+        key = (symbol, channel)
+        stats = self._channels.get(key)
+        if stats is None:
+            stats = self._channels[key] = ChannelStats()
+        latency = None
+        if exchange_ts and receipt_ts:
+            latency = float(receipt_ts) - float(exchange_ts)
+        stats.record(receipt_ts or time.time(), latency, processing_sec, n)
+
+    def channels(self) -> List[Tuple[str, str]]:
+        return sorted(self._channels.copy())
+
+    def total(self) -> int:
+        """Messages recorded so far across every stream (cheap enough to poll)."""
+        return sum(stats.count for stats in self._channels.copy().values())
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, dict]:
+        """``{"SYM/channel": {...}}`` plus an ``"all"`` entry aggregating every stream."""
+        now = now if now is not None else time.time()
+        out: Dict[str, dict] = {}
+        total_lat, total_proc = LogHistogram(), LogHistogram()
+        total_rate, total_count = 0.0, 0
+        for (symbol, channel), stats in sorted(self._channels.copy().items()):
+            rate = stats.rate(now)
+            out[f"{symbol}/{channel}"] = _describe(stats.count, rate, stats.latency, stats.processing,
+                                                   stats.clock_skew)
+            total_lat.merge(stats.latency)
+            total_proc.merge(stats.processing)
+            total_rate += rate
+            total_count += stats.count
+        out["all"] = _describe(total_count, total_rate, total_lat, total_proc, None)
+        return out
+
+    def heartbeat(self, now: Optional[float] = None) -> str:
+        """One-line digest for the trading loop's ``[HB]`` line."""
+        summary = self.summary(now)
+        agg = summary.pop("all")
+        if not agg["count"]:
+            return "feed=idle"
+        worst = max(summary.items(), key=lambda kv: kv[1]["latency_p99_ms"] or 0.0)[0]
+        return (f"feed={agg['rate']:.1f}msg/s lat_p50={_ms(agg['latency_p50_ms'])} "
+                f"lat_p99={_ms(agg['latency_p99_ms'])} cb_p99={_ms(agg['processing_p99_ms'])} "
+                f"slowest={worst}")
+
+
+def _to_ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else value * 1000.0
+
+
+def _ms(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.1f}ms" if value >= 1 else f"{value * 1000:.0f}us"
+
+
+def _describe(count: int, rate: float, latency: LogHistogram, processing: LogHistogram,
+              clock_skew: Optional[int]) -> dict:
+    row = {
+        "count": count,
+        "rate": rate,
+        "latency_p50_ms": _to_ms(latency.quantile(0.5)),
+        "latency_p99_ms": _to_ms(latency.quantile(0.99)),
+        "latency_max_ms": _to_ms(latency.max if latency.count else None),
+        "processing_p50_ms": _to_ms(processing.quantile(0.5)),
+        "processing_p99_ms": _to_ms(processing.quantile(0.99)),
+        "processing_max_ms": _to_ms(processing.max if processing.count else None),
+    }
+    if clock_skew is not None:
+        row["clock_skew"] = clock_skew
+    return row
@@ -0,0 +1,123 @@
+# utils/hub_bars.py
+"""1m bar history shared by the live hubs.
+
+``KrakenHub`` (and ``KrakenWsHub``) and ``CryptoFeedHub`` keep the same
+per-symbol state for trades: a ``TimeframeBars`` series guarded by its
+SeqLock, an ``AtrEstimator``, a ``TradeRing`` and, when ``bar_store_dir``
+is set, a disk ``BarStore`` of closed 1m bars. ``HubBarsMixin`` builds,
+resumes and persists that state, so each hub only parses its feed.
+
+Stored bars are resumed on their own only when live data can continue them
+(``MAX_GAP_BARS``, the same threshold the trading loop uses). A hub with a
+REST backfill resumes older stored bars too: ``_stored_history`` names the
+first missing minute and the hub fetches from there, so only the gap is
+requested.
+"""
+
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from utils.bar_builder import TimeframeBars, BASE_MAX_BARS
+from utils.bar_store import MAX_GAP_BARS, open_bar_store, load_recent_bars
+
+BASE_STEP_MS = 60_000
+
+
+def _slash(sym: str) -> str:
+    return sym.replace("-", "/")  # "BTC-USDT" -> "BTC/USDT"
+
+
+class HubBarsMixin:
+    """
+    Bar history for a hub that has ``_bars``, ``_stores``, ``_trades``,
+    ``_atr``, ``_ticker``, ``_ready_evt``, ``_bar_store_dir``, ``events`` and
+    ``exit_engine``. Symbols are hub keys ("BTC-USDT").
+    """
+
+    def _bars_for(self, sym: str) -> TimeframeBars:
+        bars = self._bars.get(sym)
+        if bars is None:
+            bars = TimeframeBars()
+            if self._bar_store_dir:
+                # resume from disk only if live data can continue it
+                rows = load_recent_bars(_slash(sym), "1m", time.time(), BASE_MAX_BARS,
+                                        base_dir=self._bar_store_dir)
+                self._load_history(sym, bars, rows)
+            self._bars[sym] = bars
+        return bars
+
+    def _load_history(self, sym: str, bars: TimeframeBars, rows) -> list:
+        """Extend ``sym``'s bars and ATR with finished 1m rows newer than what it holds."""
+        curr = bars.base.current_bucket
+        fresh = [r for r in rows if curr is None or int(r[0]) // 1000 > curr]
+        bars.load(fresh)
+        est = self._atr[sym]
+        for r in fresh:
+            est.on_bar(float(r[2]), float(r[3]), float(r[4]))
+        return fresh
+
+    def _persist_bar(self, sym: str, bar: List[float]) -> None:
+        store = self._stores.get(sym)
+        try:
+            if store is None:
+                store = open_bar_store(_slash(sym), "1m", base_dir=self._bar_store_dir)
+                self._stores[sym] = store
+            store.append(bar)
+        except (OSError, ValueError) as e:
+            print(f"[STORE] {sym}: disabling bar persistence ({e})")
+            self._bar_store_dir = None
+
+    def _stored_history(self, sym: str, bars: TimeframeBars) -> Tuple[Sequence, Optional[int]]:
+        """
+        ``(rows, since_ms)`` for a REST top-up of ``sym``: stored rows too old
+        to resume on their own (``bars`` holds nothing yet) and the first
+        minute still missing after them. ``since_ms`` is None when there is no
+        history to continue.
+        """
+        curr = bars.base.current_bucket
+        if curr is not None:
+            return [], curr * 1000 + BASE_STEP_MS
+        if not self._bar_store_dir:
+            return [], None
+        rows = load_recent_bars(_slash(sym), "1m", time.time(), BASE_MAX_BARS,
+                                base_dir=self._bar_store_dir, max_gap_bars=BASE_MAX_BARS)
+        if not len(rows):
+            return [], None
+        return rows, int(rows[-1][0]) + BASE_STEP_MS
+
+    @staticmethod
+    def _top_up_reaches(rows: list, since_ms: int, now_ms: float) -> bool:
+        """Whether closed rows fetched from ``since_ms`` leave at most ``MAX_GAP_BARS`` missing on either side."""
+        if rows and rows[0][0] > since_ms:
+            return False
+        missing = rows[-1][0] + BASE_STEP_MS if rows else since_ms
+        forming = int(now_ms) // BASE_STEP_MS * BASE_STEP_MS
+        return forming - missing <= MAX_GAP_BARS * BASE_STEP_MS
+
+    def _fold_trade(self, sym: str, ts: float, px: float, sz: float) -> None:
+        """One print into ``sym``'s ring, ATR and bars; then exits, the bar store and ``events``."""
+        bars = self._bars_for(sym)
+        # single writer: bump the symbol's version so readers can detect overlap
+        bars.seq.write_begin()
+        try:
+            self._trades[sym].append(ts, px, sz)
+            self._atr[sym].on_trade(ts, px)
+            closed = bars.on_trade(ts, px, sz)
+        finally:
+            bars.seq.write_end()
+        if self.exit_engine is not None:
+            self.exit_engine.on_trade(_slash(sym), px)
+        self._publish_bars(sym, bars, [] if closed is None else [closed], px)
+
+    def _publish_bars(self, sym: str, bars: TimeframeBars, closed: List[list], price: float) -> None:
+        """Persist bars a fold closed and tell ``events``; a first trade also marks the hub ready."""
+        if closed and self._bar_store_dir:
+            for bar in closed:
+                self._persist_bar(sym, bar)
+        if self.events is not None:
+            if closed:
+                self.events.bar_closed(_slash(sym), closed[0][0], bars.base.current_bucket)
+            if self.exit_engine is None:
+                self.events.price(_slash(sym), price)
+        if sym not in self._ticker:
+            self._ready_evt.set()
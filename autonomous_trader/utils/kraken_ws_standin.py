@@ -0,0 +1,165 @@
+# utils/kraken_ws_standin.py
+import asyncio
+import json
+import random
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from utils.feed_recorder import read_records
+from utils.market_data_kraken_ws import to_ws_pair
+
+# channel ids are arbitrary but stable per (channel, pair), as on Kraken
+_CHANNEL_IDS = defaultdict(lambda: len(_CHANNEL_IDS) + 100)
+
+
+def trade_frame(pair: str, trades: Sequence[tuple]) -> str:
+    """Kraken v1 trade frame for ``(price, volume, ts, side)`` tuples."""
+    rows = [[f"{p:.5f}", f"{v:.8f}", f"{ts:.6f}", "b" if side in ("b", "buy") else "s", "l", ""]
+            for p, v, ts, side in trades]
+    return json.dumps([_CHANNEL_IDS[("trade", pair)], rows, "trade", pair])
+
+
+def ticker_frame(pair: str, bid: float, ask: float, volume_24h: float = 0.0) -> str:
+    payload = {
+        "a": [f"{ask:.5f}", 1, "1.00000000"],
+        "b": [f"{bid:.5f}", 1, "1.00000000"],
+        "c": [f"{(bid + ask) / 2:.5f}", "0.10000000"],
+        "v": [f"{volume_24h / 2:.8f}", f"{volume_24h:.8f}"],
+    }
+    return json.dumps([_CHANNEL_IDS[("ticker", pair)], payload, "ticker", pair])
+
+
+def synthetic_frames(pairs: Sequence[str], n_frames: int, max_trades_per_frame: int = 4,
+                     ticker_every: int = 10, start_ts: float = 1_700_000_000.0, seed: int = 1) -> List[str]:
+    """Random-walk trade frames (1..max trades each) with a ticker every ``ticker_every`` frames."""
+    rng = random.Random(seed)
+    prices = {p: 100.0 * (i + 1) for i, p in enumerate(pairs)}
+    ts = start_ts
+    frames = []
+    for i in range(n_frames):
+        pair = pairs[i % len(pairs)]
+        if ticker_every and i % ticker_every == ticker_every - 1:
+            px = prices[pair]
+            frames.append(ticker_frame(pair, px * 0.9999, px * 1.0001, 1000.0 + i))
+            continue
+        batch = []
+        for _ in range(rng.randint(1, max_trades_per_frame)):
+            ts += rng.expovariate(1 / 0.5)
+            prices[pair] *= 1 + rng.gauss(0, 0.0005)
+            batch.append((prices[pair], rng.uniform(0.01, 2.0), ts, rng.choice("bs")))
+        frames.append(trade_frame(pair, batch))
+    return frames
+
+
+def frames_from_recording(path: str) -> Iterator[str]:
+    """Turn a FeedRecorder file into Kraken frames (trades received together share a frame)."""
+    pending, key = [], None
+    for kind, receipt, sym, fields in read_records(path):
+        if kind == "t" and key == (sym, receipt):
+            pending.append(fields)
+            continue
+        if pending:
+            yield trade_frame(to_ws_pair(key[0]), [(p, a, ts, side or "b") for ts, side, a, p in pending])
+            pending, key = [], None
+        if kind == "t":
+            pending, key = [fields], (sym, receipt)
+        else:
+            ts, bid, ask, last, volume = fields
+            bid = bid if bid is not None else last
+            ask = ask if ask is not None else last
+            if bid is not None and ask is not None:
+                yield ticker_frame(to_ws_pair(sym), bid, ask, volume or 0.0)
+    if pending:
+        yield trade_frame(to_ws_pair(key[0]), [(p, a, ts, side or "b") for ts, side, a, p in pending])
+
+
+class KrakenStandIn:
+    """
+    Local websocket server that speaks enough of Kraken's public v1 protocol
+    for the hubs: it acknowledges ``subscribe``/``unsubscribe`` requests and,
+    once a client subscribes to trades, streams the given frames at ``rate``
+    frames per second (``None`` = as fast as the socket takes them).
+
+    Progress is shared across connections, so after ``drop_after`` frames the
+    first connection is closed and a reconnecting client resumes where it
+    left off. Pairs in ``reject`` get Kraken's subscription error reply.
+    """
+    def __init__(self, frames: Iterable[str], host: str = "127.0.0.1", port: int = 0,
+                 rate: Optional[float] = None, drop_after: Optional[int] = None,
+                 reject: Iterable[str] = ()):
+        self.frames = list(frames)
+        self.host, self.port = host, port
+        self.rate = rate
+        self.drop_after = drop_after
+        self.reject = set(reject)
+        self.sent = 0
+        self.connections = 0
+        self.requests: List[dict] = []
+        self.done = asyncio.Event()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> "KrakenStandIn":
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(self._handler, self.host, self.port, compression=None, max_queue=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "KrakenStandIn":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handler(self, ws) -> None:
+        self.connections += 1
+        first = self.connections == 1
+        await ws.send(json.dumps({"event": "systemStatus", "status": "online", "version": "1.9.0"}))
+        streamer = None
+        try:
+            async for raw in ws:
+                req = json.loads(raw)
+                self.requests.append(req)
+                event = req.get("event")
+                if event not in ("subscribe", "unsubscribe"):
+                    continue
+                name = req.get("subscription", {}).get("name")
+                for pair in req.get("pair", []):
+                    reply = {"channelID": _CHANNEL_IDS[(name, pair)], "channelName": name, "event": "subscriptionStatus",
+                             "pair": pair, "subscription": {"name": name},
+                             "status": "unsubscribed" if event == "unsubscribe" else "subscribed"}
+                    if pair in self.reject:
+                        reply = {"event": "subscriptionStatus", "pair": pair, "status": "error",
+                                 "errorMessage": f"Currency pair not supported {pair}",
+                                 "subscription": {"name": name}}
+                    await ws.send(json.dumps(reply))
+                if event == "subscribe" and name == "trade" and streamer is None:
+                    streamer = asyncio.ensure_future(self._stream(ws, drop=first))
+        finally:
+            if streamer is not None:
+                streamer.cancel()
+
+    async def _stream(self, ws, drop: bool) -> None:
+        loop = asyncio.get_running_loop()
+        started, base = loop.time(), self.sent
+        while self.sent < len(self.frames):
+            if drop and self.drop_after is not None and self.sent >= self.drop_after:
+                await ws.close()
+                return
+            await ws.send(self.frames[self.sent])
+            self.sent += 1
+            if self.rate:
+                delay = started + (self.sent - base) / self.rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        self.done.set()
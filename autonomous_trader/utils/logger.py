@@ -36,6 +36,11 @@ class Notifier:
             except Exception as e:
                 print("[WARN] Telegram send failed:", e)
 
+class ConsoleNotifier:
+    """Drop-in for Notifier that only prints (replays: no events.log, no Telegram)."""
+    def send(self, msg: str):
+        print(msg)
+
 def log_trade(side: str, symbol: str, qty: float, price: float, extra=None):
     """Record a trade in structured logs and stdout.
 
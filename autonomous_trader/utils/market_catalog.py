@@ -0,0 +1,197 @@
+"""Market metadata for the configured exchange, loaded once and kept fresh.
+
+``exchange.load_markets()`` is one large REST call. ``MarketCatalog`` makes
+it once, keeps a compact entry per market (spot flag, base/quote, price and
+amount precision, minimum amount and notional), and saves them to
+``data/runtime/markets.json`` with the fetch time. A restart within the TTL
+reads that file instead of calling REST. Once the TTL has passed, lookups
+keep answering from the current entries while one background thread
+reloads them.
+
+Lookups are dict reads. Each market is indexed under its ccxt symbol, its
+exchange id and its base aliases (``BTC/USD`` is also ``XBT/USD``, ``DOGE``
+is also ``XDG``), so ``resolve`` maps any of them to the exchange's symbol.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+CATALOG_PATH = os.path.join(BASE_DIR, "data", "runtime", "markets.json")
+DEFAULT_TTL_SEC = 12 * 3600
+RETRY_SEC = 60  # after a failed load
+
+# base currency spellings that name the same asset (Kraken uses the second)
+BASE_ALIASES = {"BTC": "XBT", "XBT": "BTC", "DOGE": "XDG", "XDG": "DOGE"}
+
+
+def market_entry(market: dict) -> dict:
+    """The fields kept from a ccxt market dict."""
+    limits = market.get("limits") or {}
+    precision = market.get("precision") or {}
+    return {
+        "symbol": market["symbol"],
+        "id": market.get("id"),
+        "base": market.get("base"),
+        "quote": market.get("quote"),
+        "spot": bool(market.get("spot")),
+        "active": market.get("active") is not False,
+        "price_precision": precision.get("price"),
+        "amount_precision": precision.get("amount"),
+        "min_amount": (limits.get("amount") or {}).get("min"),
+        "min_notional": (limits.get("cost") or {}).get("min"),
+    }
+
+
+def alias_symbols(symbol: str) -> List[str]:
+    """``symbol`` upper-cased, then with its base swapped for each alias."""
+    symbol = symbol.strip().upper().replace("-", "/")
+    out = [symbol]
+    base, sep, quote = symbol.partition("/")
+    if sep and base in BASE_ALIASES:
+        out.append(f"{BASE_ALIASES[base]}/{quote}")
+    return out
+
+
+def _build_index(entries: Dict[str, dict]) -> Dict[str, dict]:
+    index: Dict[str, dict] = {}
+    # aliases first, so a real market of the same name wins
+    for entry in entries.values():
+        for key in alias_symbols(entry["symbol"])[1:]:
+            index[key] = entry
+        if entry.get("id"):
+            index.setdefault(str(entry["id"]).upper(), entry)
+    for entry in entries.values():
+        index[entry["symbol"].upper()] = entry
+    return index
+
+
+class MarketCatalog:
+    """
+    Market entries from ``loader`` (a callable returning ccxt's
+    ``load_markets()`` dict), cached in ``path`` for ``ttl_sec``.
+
+    ``get``/``resolve``/``is_spot`` answer from memory. The first of them
+    loads synchronously when nothing is cached yet; after that a stale
+    catalog refreshes in a daemon thread while readers keep the old entries.
+    A failed load keeps whatever was there before and is retried after
+    ``RETRY_SEC``.
+    """
+    def __init__(self, loader: Callable[[], dict], exchange: str = "", path: Optional[str] = CATALOG_PATH,
+                 ttl_sec: float = DEFAULT_TTL_SEC, clock: Callable[[], float] = time.time):
+        self.loader = loader
+        self.exchange = exchange
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.clock = clock
+        self.fetched_at: Optional[float] = None  # never loaded
+        self.loads = 0
+        self._retry_at = 0.0
+        self._entries: Dict[str, dict] = {}
+        self._index: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._refreshing: Optional[threading.Thread] = None
+        self._read_file()
+
+    # ---------- lookups
+    def get(self, symbol: str) -> Optional[dict]:
+        """The market entry for ``symbol`` or any of its aliases, else None."""
+        index = self._fresh_index()
+        for key in alias_symbols(symbol):
+            entry = index.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def resolve(self, symbol: str) -> Optional[str]:
+        """The exchange's own symbol for ``symbol`` (e.g. ``XBT/USDT`` -> ``BTC/USDT``), else None."""
+        entry = self.get(symbol)
+        return entry["symbol"] if entry else None
+
+    def is_spot(self, symbol: str) -> bool:
+        entry = self.get(symbol)
+        return bool(entry and entry["spot"] and entry["active"])
+
+    def spot_symbols(self, quotes: Optional[Iterable[str]] = None) -> List[str]:
+        """Active spot symbols, optionally only those quoted in ``quotes``."""
+        self._fresh_index()
+        quotes = set(quotes) if quotes is not None else None
+        return [s for s, e in self._entries.items()
+                if e["spot"] and e["active"] and (quotes is None or e["quote"] in quotes)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- freshness
+    def is_stale(self) -> bool:
+        return self.fetched_at is None or self.clock() - self.fetched_at >= self.ttl_sec
+
+    def _fresh_index(self) -> Dict[str, dict]:
+        if self.is_stale() and self.clock() >= self._retry_at:
+            if self._entries:
+                self.refresh_async()
+            else:
+                self.refresh()
+        return self._index
+
+    def refresh(self) -> bool:
+        """Reload from the exchange now; False (entries unchanged) if the load fails."""
+        with self._lock:
+            try:
+                markets = self.loader() or {}
+            except Exception as e:
+                print(f"[MARKETS] load_markets failed: {e}")
+                self._retry_at = self.clock() + RETRY_SEC  # not on every lookup
+                return False
+            entries = {}
+            for sym, m in markets.items():
+                try:
+                    entries[sym] = market_entry({"symbol": sym, **m})
+                except Exception:
+                    pass
+            self._install(entries, self.clock())
+            self.loads += 1
+            self._write_file()
+            return True
+
+    def refresh_async(self) -> Optional[threading.Thread]:
+        """Start a background ``refresh`` unless one is running."""
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+            self._refreshing = threading.Thread(target=self.refresh, name="market-catalog", daemon=True)
+            self._refreshing.start()
+            return self._refreshing
+
+    def _install(self, entries: Dict[str, dict], fetched_at: float) -> None:
+        # readers hold the old dicts; swap in complete new ones
+        self._index = _build_index(entries)
+        self._entries = entries
+        self.fetched_at = fetched_at
+
+    # ---------- persistence
+    def _read_file(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("exchange") == self.exchange and data.get("markets"):
+                self._install(data["markets"], float(data.get("fetched_at", 0.0)))
+        except Exception as e:
+            print(f"[MARKETS] ignoring {self.path}: {e}")
+
+    def _write_file(self) -> None:
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"exchange": self.exchange, "fetched_at": self.fetched_at, "markets": self._entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[MARKETS] could not save {self.path}: {e}")
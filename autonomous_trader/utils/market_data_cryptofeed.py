@@ -1,10 +1,18 @@
 # utils/market_data_cryptofeed.py
 import asyncio
-from collections import defaultdict, deque
+import time
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, Deque, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 import pandas as pd
 
+from utils.atr_estimator import AtrEstimator
+from utils.bar_builder import TimeframeBars, parse_timeframe
+from utils.bar_store import BarStore
+from utils.feed_stats import FeedStats
+from utils.hub_bars import HubBarsMixin
+from utils.trade_ring import TradeRing, TRADE_RING_CAPACITY
+
 from cryptofeed import FeedHandler
 from cryptofeed.defines import TICKER, TRADES
 from cryptofeed import exchanges as CFEX  # dynamic class lookup
@@ -52,61 +60,37 @@ class TickerSnapshot:
     volume_24h: Optional[float]
     ts: float
 
-@dataclass
-class TradePrint:
-    price: float
-    size: float
-    ts: float
-
-class AtrEstimator:
-    def __init__(self, minutes: int = 14):
-        self.window = minutes
-        self.curr_minute: Optional[int] = None
-        self.ohlc: Optional[List[float]] = None  # [o, h, l, c]
-        self.last_close: Optional[float] = None
-        self.tr_values: Deque[float] = deque(maxlen=minutes)
-
-    def on_trade(self, ts_sec: float, price: float):
-        minute = int(ts_sec // 60)
-        if self.curr_minute is None:
-            self.curr_minute = minute
-            self.ohlc = [price, price, price, price]
-            return
-        if minute != self.curr_minute:
-            o, h, l, c = self.ohlc  # type: ignore
-            prev_close = self.last_close if self.last_close is not None else o
-            tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
-            self.tr_values.append(tr)
-            self.last_close = c
-            self.curr_minute = minute
-            self.ohlc = [price, price, price, price]
-        else:
-            o, h, l, _ = self.ohlc  # type: ignore
-            h = max(h, price)
-            l = min(l, price)
-            self.ohlc = [o, h, l, price]
-
-    @property
-    def atr(self) -> Optional[float]:
-        if len(self.tr_values) < max(1, (self.tr_values.maxlen or 1) // 2):
-            return None
-        return sum(self.tr_values) / len(self.tr_values)
-
-class CryptoFeedHub:
+class CryptoFeedHub(HubBarsMixin):
     """
     Maintains:
       - latest ticker per symbol
-      - rolling trades & ATR estimator
-      - simple OHLCV aggregation from trades (1m/5m/15m)
+      - columnar trade ring & ATR estimator
+      - 1m OHLCV bars from trades with cached rollups to any timeframe
+      - closed 1m bars persisted to the disk bar store (data_feeds.bar_store_dir)
+      - per-symbol/channel message rates, feed latency and callback time (feed_stats())
+      - bar closes and prices published to ``events`` (an EventScheduler) when set
+      - every trade fed to ``exit_engine`` (an ExitEngine) when set
     """
     def __init__(self, cfg):
         self.cfg = cfg
         self._ticker: Dict[str, TickerSnapshot] = {}          # keys normalized to "ETH-USDT"
-        self._trades: Dict[str, Deque[TradePrint]] = defaultdict(lambda: deque(maxlen=10000))
-        self._atr: Dict[str, AtrEstimator] = defaultdict(lambda: AtrEstimator(minutes=14))
+        trade_capacity = int(cfg.get("data_feeds", {}).get("trade_buffer_size", TRADE_RING_CAPACITY))
+        self._trades: Dict[str, TradeRing] = defaultdict(lambda: TradeRing(trade_capacity))
+        atr_windows = tuple(cfg.get("data_feeds", {}).get("atr_windows", (14,)))
+        self._atr: Dict[str, AtrEstimator] = defaultdict(lambda: AtrEstimator(minutes=14, windows=atr_windows))
+        self._bars: Dict[str, TimeframeBars] = {}
+        self._stores: Dict[str, BarStore] = {}
         self._fh: Optional[FeedHandler] = None
         self._ready_evt = asyncio.Event()
         self._printed_ready = False
+        df_cfg = cfg.get("data_feeds", {})
+        self._bar_store_dir: Optional[str] = df_cfg.get("bar_store_dir")
+        self.stats = FeedStats()
+        self.recorder = None  # optional utils.feed_recorder.FeedRecorder
+        self.events = None    # optional utils.event_scheduler.EventScheduler
+        self.exit_engine = None  # optional utils.exit_engine.ExitEngine, fed every trade
+        for sym in df_cfg.get("symbols", []):
+            self._bars_for(slash_to_norm(sym))  # warm start from the bar store
 
     # ---------- callbacks (adaptive to cryptofeed versions)
 
@@ -116,10 +100,12 @@ class CryptoFeedHub:
           - legacy: (feed, pair, bid, ask, ts, receipt, **kw)
           - object: (TickerObj, receipt)
         """
+        t0 = time.perf_counter()
         pair = None
         price = None
         vol = None
         ts = None
+        receipt = None
 
         if len(args) >= 2 and hasattr(args[0], "__class__") and args[0].__class__.__name__.lower() == "ticker":
             obj = args[0]
@@ -133,11 +119,13 @@ class CryptoFeedHub:
                 price = float(last)
             vol = getattr(obj, "volume", None)
             ts = float(getattr(obj, "timestamp", 0.0) or 0.0)
+            receipt = args[1]
         else:
             pair = args[1] if len(args) > 1 else kwargs.get("pair")
             bid = args[2] if len(args) > 2 else kwargs.get("bid")
             ask = args[3] if len(args) > 3 else kwargs.get("ask")
             ts  = args[4] if len(args) > 4 else kwargs.get("timestamp")
+            receipt = args[5] if len(args) > 5 else kwargs.get("receipt_timestamp")
             if bid is not None and ask is not None:
                 price = (float(bid) + float(ask)) / 2.0
             else:
@@ -150,15 +138,21 @@ class CryptoFeedHub:
             return
 
         norm = slash_to_norm(str(pair))
+        if self.recorder is not None:
+            last = price if bid is None or ask is None else None
+            self.recorder.ticker(norm, ts, bid, ask, receipt, last=last, volume=vol)
         self._ticker[norm] = TickerSnapshot(
             price=float(price),
             volume_24h=(float(vol) if vol is not None else None),
             ts=float(ts or 0.0),
         )
+        if self.events is not None:
+            self.events.price(norm_to_slash(norm), float(price))
         if not self._printed_ready:
             print(f"[FEED] First ticker received for {pair}")
             self._printed_ready = True
         self._ready_evt.set()
+        self.stats.record(norm, TICKER, ts, receipt, time.perf_counter() - t0)
 
     async def _on_trade(self, *args, **kwargs):
         """
@@ -166,10 +160,13 @@ class CryptoFeedHub:
           - legacy: (feed, pair, order_id, ts, side, amount, price, receipt, **kw)
           - object: (TradeObj, receipt)
         """
+        t0 = time.perf_counter()
         pair = None
         price = None
         size = None
         ts = None
+        side = None
+        receipt = None
 
         if len(args) >= 2 and hasattr(args[0], "__class__") and args[0].__class__.__name__.lower() == "trade":
             obj = args[0]
@@ -177,27 +174,31 @@ class CryptoFeedHub:
             price = getattr(obj, "price", None)
             size  = getattr(obj, "amount", None) or getattr(obj, "size", None)
             ts    = float(getattr(obj, "timestamp", 0.0) or 0.0)
+            side  = getattr(obj, "side", None)
+            receipt = args[1]
         else:
             pair  = args[1] if len(args) > 1 else kwargs.get("pair")
             ts    = args[3] if len(args) > 3 else kwargs.get("timestamp")
+            side  = args[4] if len(args) > 4 else kwargs.get("side")
             size  = args[5] if len(args) > 5 else kwargs.get("amount")
             price = args[6] if len(args) > 6 else kwargs.get("price")
+            receipt = args[7] if len(args) > 7 else kwargs.get("receipt_timestamp")
 
         if pair is None or price is None or size is None:
             return
 
         norm = slash_to_norm(str(pair))
-        tp = TradePrint(price=float(price), size=float(size), ts=float(ts or 0.0))
-        dq = self._trades[norm]
-        dq.append(tp)
-        self._atr[norm].on_trade(tp.ts, tp.price)
-        if norm not in self._ticker:
-            self._ready_evt.set()
+        if self.recorder is not None:
+            self.recorder.trade(norm, ts, side, size, price, receipt)
+        ts = float(ts or 0.0)
+        self._fold_trade(norm, ts, float(price), float(size))
+        self.stats.record(norm, TRADES, ts, receipt, time.perf_counter() - t0)
 
     # ---------- public API
 
     def list_symbols(self) -> List[str]:
-        syms = set(self._ticker.keys()) | set(self._trades.keys())
+        # dict.copy() is atomic, so this never races the feed thread adding a symbol
+        syms = set(self._ticker.copy()) | set(self._trades.copy())
         return [norm_to_slash(s) for s in sorted(syms)]
 
     def snapshot(self, slash_symbol: str) -> Tuple[Optional[float], Optional[float]]:
@@ -207,9 +208,18 @@ class CryptoFeedHub:
             return (None, None)
         return (tick.price, tick.volume_24h)
 
-    def atr_pct(self, slash_symbol: str) -> Optional[float]:
+    def feed_stats(self) -> Dict[str, dict]:
+        """Message rates plus latency/callback-time percentiles per "SYM/channel" (and "all")."""
+        return self.stats.summary()
+
+    def atr_pct(self, slash_symbol: str, window: Optional[int] = None, mode: Optional[str] = None) -> Optional[float]:
+        """Latest ATR as % of price; defaults to the 14-bar Wilder ATR on 1m bars."""
         key = slash_to_norm(slash_symbol)
-        atr = self._atr[key].atr
+        est = self._atr.get(key)
+        bars = self._bars.get(key)
+        if est is None or bars is None:
+            return None
+        atr = bars.seq.read(est.value, window, mode)
         tick = self._ticker.get(key)
         price = tick.price if tick else None
         if atr is None or price is None or price == 0:
@@ -218,34 +228,13 @@ class CryptoFeedHub:
 
     def ohlcv_df(self, slash_symbol: str, timeframe: str = "5m", limit: int = 200) -> Optional[pd.DataFrame]:
         key = slash_to_norm(slash_symbol)
-        trades = list(self._trades.get(key, []))
-        if not trades:
-            return pd.DataFrame()
-
-        tf_map = {"1m": 60, "5m": 300, "15m": 900}
-        step = tf_map.get(timeframe, 300)
-
-        buckets: Dict[int, List[float]] = {}
-        for t in trades:
-            b = int(t.ts // step) * step
-            if b not in buckets:
-                buckets[b] = [t.price, t.price, t.price, t.price, t.size]
-            else:
-                o, h, l, _, v = buckets[b]
-                h = max(h, t.price)
-                l = min(l, t.price)
-                c = t.price
-                v = v + t.size
-                buckets[b] = [o, h, l, c, v]
-
-        if not buckets:
+        step = parse_timeframe(timeframe)  # raises ValueError on unknown timeframes
+        bars = self._bars.get(key)
+        if bars is None:
             return pd.DataFrame()
 
-        rows = [[b * 1000, *buckets[b]] for b in sorted(buckets.keys())]
-        df = pd.DataFrame(rows, columns=["time","open","high","low","close","volume"])
-        if limit and len(df) > limit:
-            df = df.iloc[-limit:].reset_index(drop=True)
-        return df
+        # 1m base bars are built in _on_trade; other timeframes are cached rollups
+        return bars.to_df(step, limit)
 
     async def wait_ready(self, timeout: float = 10.0):
         try:
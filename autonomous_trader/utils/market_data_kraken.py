@@ -1,14 +1,28 @@
 # utils/market_data_kraken.py
 import asyncio
-from collections import defaultdict, deque
+import functools
+import threading
+import time
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, Deque, Optional, List, Tuple
+from typing import Callable, Dict, Iterable, Optional, List, Tuple
 import pandas as pd
 
+from utils.atr_estimator import AtrEstimator
+from utils.bar_builder import TimeframeBars, parse_timeframe
+from utils.bar_store import BarStore
+from utils.feed_stats import FeedStats
+from utils.hub_bars import HubBarsMixin
+from utils.trade_ring import TradeRing, TRADE_RING_CAPACITY
+
 # We’ll use cryptofeed but *only* the Kraken exchange to keep it simple & stable
-from cryptofeed import FeedHandler
-from cryptofeed.defines import TICKER, TRADES
-from cryptofeed.exchanges import Kraken
+try:
+    from cryptofeed import FeedHandler
+    from cryptofeed.defines import TICKER, TRADES
+    from cryptofeed.exchanges import Kraken
+except ImportError:  # the native websocket hub (market_data_kraken_ws) runs without it
+    FeedHandler = Kraken = None
+    TICKER, TRADES = "ticker", "trades"
 
 # -------- module-level hub registry (so other utils can access it)
 _GLOBAL_HUB = None
@@ -28,74 +42,64 @@ def slash_to_norm(sym: str) -> str:
     # "BTC/USDT" -> "BTC-USDT"
     return sym.replace("/", "-")
 
+# [(slash symbol, since ms or None)] -> (slash symbol, 1m OHLCV rows, error) per request,
+# in any order (CandleFetcher.fetch_many's contract)
+BackfillFn = Callable[[List[Tuple[str, Optional[int]]]], Iterable[Tuple[str, Optional[list], Optional[Exception]]]]
+
 @dataclass
 class TickerSnapshot:
     price: float
     volume_24h: Optional[float]
     ts: float
 
-@dataclass
-class TradePrint:
-    price: float
-    size: float
-    ts: float
-
-class AtrEstimator:
-    """Very small ATR estimator on synthetic 1m bars from trades."""
-    def __init__(self, minutes: int = 14):
-        self.window = minutes
-        self.curr_minute: Optional[int] = None
-        self.ohlc: Optional[List[float]] = None  # [o, h, l, c]
-        self.last_close: Optional[float] = None
-        self.tr_values: Deque[float] = deque(maxlen=minutes)
-
-    def on_trade(self, ts_sec: float, price: float):
-        minute = int(ts_sec // 60)
-        if self.curr_minute is None:
-            self.curr_minute = minute
-            self.ohlc = [price, price, price, price]
-            return
-
-        if minute != self.curr_minute:
-            o, h, l, c = self.ohlc  # type: ignore
-            prev_close = self.last_close if self.last_close is not None else o
-            tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
-            self.tr_values.append(tr)
-            self.last_close = c
-            self.curr_minute = minute
-            self.ohlc = [price, price, price, price]
-        else:
-            o, h, l, _ = self.ohlc  # type: ignore
-            h = max(h, price)
-            l = min(l, price)
-            self.ohlc = [o, h, l, price]
-
-    @property
-    def atr(self) -> Optional[float]:
-        if len(self.tr_values) < max(1, (self.tr_values.maxlen or 1) // 2):
-            return None
-        return sum(self.tr_values) / len(self.tr_values)
-
-class KrakenHub:
+class KrakenHub(HubBarsMixin):
     """
     Minimal Kraken-only live data hub.
-    - Subscribes to ticker + trades for a provided symbol list
-    - Maintains last price, 24h base volume (when available), rolling trades
-    - Exposes snapshot(), atr_pct(), ohlcv_df(), list_symbols(), wait_ready()
+    - Subscribes to ticker + trades for a provided symbol list, and adds/drops
+      subscriptions at runtime via update_subscriptions()
+    - Maintains last price, 24h base volume (when available), a columnar trade ring
+    - Persists closed 1m bars to the disk bar store when ``bar_store_dir`` is set
+    - Records per-symbol/channel message rates, feed latency and callback time
+    - Publishes bar closes and prices to ``events`` (an EventScheduler) when set
+    - Feeds every trade to ``exit_engine`` (an ExitEngine) when set
+    - Exposes snapshot(), atr_pct(), ohlcv_df(), list_symbols(), feed_stats(), wait_ready()
     """
-    def __init__(self, symbols: List[str]):
+    def __init__(self, symbols: List[str], trade_capacity: int = TRADE_RING_CAPACITY,
+                 bar_store_dir: Optional[str] = None,
+                 backfill: Optional[BackfillFn] = None,
+                 atr_windows: Iterable[int] = (14,)):
         # Input symbols can be "BTC-USDT" / "ETH-USDT" / ...
         # Cryptofeed’s Kraken adapter handles common aliasing (BTC<->XBT) for these pairs.
         self.symbols_norm = [slash_to_norm(s) if "/" in s else s for s in symbols]
         self._ticker: Dict[str, TickerSnapshot] = {}
-        self._trades: Dict[str, Deque[TradePrint]] = defaultdict(lambda: deque(maxlen=10000))
-        self._atr: Dict[str, AtrEstimator] = defaultdict(lambda: AtrEstimator(minutes=14))
+        self._trades: Dict[str, TradeRing] = defaultdict(lambda: TradeRing(trade_capacity))
+        atr_windows = tuple(atr_windows)
+        self._atr: Dict[str, AtrEstimator] = defaultdict(lambda: AtrEstimator(minutes=14, windows=atr_windows))
+        self._bars: Dict[str, TimeframeBars] = {}
+        self._stores: Dict[str, BarStore] = {}
         self._fh: Optional[FeedHandler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._feeds: Dict[str, Kraken] = {}   # symbol -> feed carrying it (feeds are shared by batch)
+        self._sub_lock = threading.Lock()     # short: symbol lists and feeds, never held across REST
+        self._rejected: set = set()            # symbols Kraken refused; never retried
+        self._backfilling: set = set()         # symbols between their REST backfill and subscription
+        self._backfill = backfill             # batched REST 1m candles (BackfillFn)
         self._ready_evt = asyncio.Event()
         self._printed_any = False
+        self._bar_store_dir = bar_store_dir
+        self.stats = FeedStats()
+        self.recorder = None  # optional utils.feed_recorder.FeedRecorder
+        self.events = None    # optional utils.event_scheduler.EventScheduler
+        self.exit_engine = None  # optional utils.exit_engine.ExitEngine, fed every trade
+        for sym in self.symbols_norm:
+            self._bars_for(sym)  # warm start from the bar store
 
     # -------- cryptofeed callbacks
     async def _on_ticker(self, feed, pair, bid, ask, timestamp, receipt_timestamp, **kwargs):
+        t0 = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.ticker(pair, timestamp, bid, ask, receipt_timestamp,
+                                 last=kwargs.get('last'), volume=kwargs.get('volume'))
         # Prefer mid if bid/ask present; else try 'last'
         price = None
         if bid is not None and ask is not None:
@@ -110,23 +114,27 @@ class KrakenHub:
             volume_24h=(float(vol) if vol is not None else None),
             ts=float(timestamp),
         )
+        if self.events is not None:
+            self.events.price(norm_to_slash(pair), float(price))
         if not self._printed_any:
             print(f"[KRAKEN] First update: {pair} price={price}")
             self._printed_any = True
         self._ready_evt.set()
+        self.stats.record(pair, TICKER, timestamp, receipt_timestamp, time.perf_counter() - t0)
 
     async def _on_trade(self, feed, pair, order_id, timestamp, side, amount, price, receipt_timestamp, **kwargs):
-        tp = TradePrint(price=float(price), size=float(amount), ts=float(timestamp))
-        dq = self._trades[pair]
-        dq.append(tp)
-        self._atr[pair].on_trade(tp.ts, tp.price)
-        if pair not in self._ticker:
-            self._ready_evt.set()
+        t0 = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.trade(pair, timestamp, side, amount, price, receipt_timestamp)
+        ts = float(timestamp)
+        self._fold_trade(pair, ts, float(price), float(amount))
+        self.stats.record(pair, TRADES, ts, receipt_timestamp, time.perf_counter() - t0)
 
     # -------- public API
     def list_symbols(self) -> List[str]:
         # Use whatever we’ve actually seen so far
-        syms = set(self._ticker.keys()) | set(self._trades.keys())
+        # dict.copy() is atomic, so this never races the feed thread adding a symbol
+        syms = set(self._ticker.copy()) | set(self._trades.copy())
         return [norm_to_slash(s) for s in sorted(syms)]
 
     def snapshot(self, slash_symbol: str) -> Tuple[Optional[float], Optional[float]]:
@@ -136,44 +144,33 @@ class KrakenHub:
             return (None, None)
         return (tick.price, tick.volume_24h)
 
-    def atr_pct(self, slash_symbol: str) -> Optional[float]:
+    def feed_stats(self) -> Dict[str, dict]:
+        """Message rates plus latency/callback-time percentiles per "SYM/channel" (and "all")."""
+        return self.stats.summary()
+
+    def atr_pct(self, slash_symbol: str, window: Optional[int] = None, mode: Optional[str] = None) -> Optional[float]:
+        """Latest ATR as % of price; defaults to the 14-bar Wilder ATR on 1m bars."""
         sym = slash_to_norm(slash_symbol)
-        atr = self._atr[sym].atr
-        price = self._ticker.get(sym).price if self._ticker.get(sym) else None
+        est = self._atr.get(sym)
+        bars = self._bars.get(sym)
+        if est is None or bars is None:
+            return None
+        atr = bars.seq.read(est.value, window, mode)
+        tick = self._ticker.get(sym)
+        price = tick.price if tick else None
         if atr is None or price is None or price == 0:
             return None
         return (atr / price) * 100.0
 
     def ohlcv_df(self, slash_symbol: str, timeframe: str = "5m", limit: int = 200) -> pd.DataFrame:
         sym = slash_to_norm(slash_symbol)
-        trades = list(self._trades.get(sym, []))
-        if not trades:
-            return pd.DataFrame()
-
-        # Simple trade-to-bar aggregation for 1m/5m/15m
-        tf_map = {"1m": 60, "5m": 300, "15m": 900}
-        step = tf_map.get(timeframe, 300)
-        buckets: Dict[int, List[float]] = {}
-        for t in trades:
-            b = int(t.ts // step) * step
-            if b not in buckets:
-                buckets[b] = [t.price, t.price, t.price, t.price, t.size]
-            else:
-                o, h, l, _, v = buckets[b]
-                h = max(h, t.price)
-                l = min(l, t.price)
-                c = t.price
-                v = v + t.size
-                buckets[b] = [o, h, l, c, v]
-
-        if not buckets:
+        step = parse_timeframe(timeframe)  # raises ValueError on unknown timeframes
+        bars = self._bars.get(sym)
+        if bars is None:
             return pd.DataFrame()
 
-        rows = [[b * 1000, *buckets[b]] for b in sorted(buckets.keys())]
-        df = pd.DataFrame(rows, columns=["time", "open", "high", "low", "close", "volume"])
-        if limit and len(df) > limit:
-            df = df.iloc[-limit:].reset_index(drop=True)
-        return df
+        # 1m base bars are built in _on_trade; other timeframes are cached rollups
+        return bars.to_df(step, limit)
 
     async def wait_ready(self, timeout: float = 10.0):
         try:
@@ -181,26 +178,182 @@ class KrakenHub:
         except asyncio.TimeoutError:
             pass
 
+    # -------- runtime subscriptions
+    def _make_feed(self, symbols: List[str]) -> Tuple[Optional[Kraken], List[str]]:
+        """One Kraken feed for ``symbols``; symbols Kraken rejects are dropped."""
+        cbs = {TICKER: self._on_ticker, TRADES: self._on_trade}
+        try:
+            return Kraken(subscribe={TICKER: symbols, TRADES: symbols}, callbacks=cbs), symbols
+        except Exception as e:
+            if len(symbols) == 1:
+                print(f"[KRAKEN] Cannot subscribe {symbols[0]}: {e}")
+                self._rejected.add(symbols[0])
+                return None, []
+        ok = [s for s in symbols if self._make_feed([s])[0] is not None]
+        if not ok:
+            return None, []
+        return Kraken(subscribe={TICKER: ok, TRADES: ok}, callbacks=cbs), ok
+
+    def _start_feed(self, symbols: List[str]) -> None:
+        feed, ok = self._make_feed(symbols)
+        for sym in set(symbols) - set(ok):
+            self._forget(sym)  # never streamed, so no writer can race this
+        if feed is None:
+            return
+        for sym in ok:
+            self._feeds[sym] = feed
+        if self._loop is not None:
+            # FeedHandler.add_feed must run on the hub loop once it is running
+            self._loop.call_soon_threadsafe(functools.partial(self._fh.add_feed, feed, loop=self._loop))
+        else:
+            self._fh.add_feed(feed)
+
+    def _stop_feed(self, feed: Kraken) -> None:
+        async def shutdown():
+            feed.stop()
+            await feed.shutdown()
+            if feed in self._fh.feeds:
+                self._fh.feeds.remove(feed)
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+
+    def _forget(self, sym: str) -> None:
+        """Drop live state so an unsubscribed symbol never serves stale prices or bars."""
+        for table in (self._ticker, self._trades, self._atr, self._bars, self._stores):
+            table.pop(sym, None)
+
+    def _forget_unless_live(self, symbols: List[str]) -> None:
+        """Deferred ``_forget`` (hub loop): skips symbols subscribed or being backfilled again since."""
+        with self._sub_lock:
+            for sym in symbols:
+                if sym not in self.symbols_norm and sym not in self._backfilling:
+                    self._forget(sym)
+
+    def _fetch_closed(self, requests: Dict[str, Optional[int]]) -> Iterable[Tuple[str, List[List[float]]]]:
+        """``(sym, closed rows from since)`` per ``{sym: since_ms}`` request that succeeds."""
+        now_ms = time.time() * 1000
+        by_slash = {norm_to_slash(s): s for s in requests}
+        for slash, rows, err in self._backfill([(norm_to_slash(s), since) for s, since in requests.items()]):
+            sym = by_slash[slash]
+            if err is not None:
+                print(f"[KRAKEN] Backfill failed for {sym}: {err}")
+                continue
+            since = requests[sym]
+            yield sym, [r for r in rows or [] if r[0] + 60_000 <= now_ms and (since is None or r[0] >= since)]
+
+    def _seed_history(self, sym: str, stored, rows: List[List[float]]) -> None:
+        self._load_history(sym, self._bars_for(sym), list(stored) + rows)
+        if self._bar_store_dir:
+            for row in rows:  # the store ignores rows older than its newest
+                self._persist_bar(sym, row)
+
+    def _backfill_history(self, symbols: List[str]) -> None:
+        """
+        Seed symbols that are not subscribed yet with closed 1m bars: stored
+        history topped up from REST with only the minutes it misses, or a full
+        REST backfill when there is none (or the gap outgrew one request).
+        The requests go out together through ``backfill``.
+        """
+        history = {sym: self._stored_history(sym, self._bars_for(sym)) for sym in symbols}
+        if self._backfill is None or not history:
+            return
+        now_ms = time.time() * 1000
+        refetch = {}
+        for sym, rows in self._fetch_closed({sym: since for sym, (_, since) in history.items()}):
+            stored, since = history[sym]
+            if since is not None and not self._top_up_reaches(rows, since, now_ms):
+                refetch[sym] = None
+                continue
+            self._seed_history(sym, stored, rows)
+        for sym, rows in self._fetch_closed(refetch) if refetch else ():
+            self._seed_history(sym, [], rows)
+
+    def _live_symbols(self) -> set:
+        return set(self._feeds) if self._fh is not None else set(self.symbols_norm)
+
+    def update_subscriptions(self, slash_symbols: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Make ``slash_symbols`` the live set: subscribe ticker + trades for new
+        symbols (backfilling them from REST first, without holding the
+        subscription lock) and unsubscribe the rest. Safe to call from any
+        thread; returns ``(added, removed)``.
+        """
+        wanted = {slash_to_norm(s) for s in slash_symbols}
+        with self._sub_lock:
+            backfill = sorted(wanted - self._live_symbols() - self._rejected - self._backfilling)
+            self._backfilling.update(backfill)
+        try:
+            self._backfill_history(backfill)  # before any live print can reach them
+        except Exception:
+            with self._sub_lock:
+                self._backfilling.difference_update(backfill)
+            raise
+        with self._sub_lock:
+            self._backfilling.difference_update(backfill)
+            return self._apply_subscriptions(wanted, backfill)
+
+    def _plan_subscriptions(self, wanted: set, backfilled: List[str]) -> Tuple[set, List[str], List[str]]:
+        """
+        ``(current, added, removed)`` against the live set as it is now (under
+        ``_sub_lock``): a concurrent call may have changed it during the
+        backfill. Backfilled symbols left out are forgotten; nothing streams them.
+        """
+        current = self._live_symbols()
+        added = sorted(set(backfilled) & (wanted - current - self._rejected))
+        removed = sorted(current - wanted)
+        for sym in backfilled:
+            if sym not in added and sym not in current:
+                self._forget(sym)
+        return current, added, removed
+
+    def _apply_subscriptions(self, wanted: set, backfilled: List[str]) -> Tuple[List[str], List[str]]:
+        """Second half of ``update_subscriptions``, under ``_sub_lock``."""
+        current, added, removed = self._plan_subscriptions(wanted, backfilled)
+        if not added and not removed:
+            return [], []
+        if self._fh is None:
+            # not running yet: run() subscribes whatever is configured by then
+            self.symbols_norm = sorted((current - set(removed)) | set(added))
+            for sym in removed:
+                self._forget(sym)
+            return added, removed
+
+        # rebuild every feed that carries a removed symbol with what is left of it
+        stale = {id(self._feeds[s]): self._feeds[s] for s in removed}
+        for feed in stale.values():
+            keep = [s for s, f in self._feeds.items() if f is feed and s in wanted]
+            for s in [s for s, f in self._feeds.items() if f is feed]:
+                del self._feeds[s]
+            self._stop_feed(feed)
+            if keep:
+                self._start_feed(keep)
+        if added:
+            self._start_feed(added)
+        self.symbols_norm = sorted(self._feeds)
+
+        if removed and self._loop is not None:
+            # runs after the feeds stop; the symbol may be live again by then
+            self._loop.call_soon_threadsafe(self._forget_unless_live, removed)
+        print(f"[KRAKEN] Subscriptions +{added or '[]'} -{removed or '[]'} ({len(self.symbols_norm)} live)")
+        return added, removed
+
     # -------- runner (to be called in the main thread)
     def run(self):
         """
         Start Kraken feed for the configured symbols. This call blocks and
         owns the event loop (so call it from your main thread).
         """
-        if not self.symbols_norm:
-            print("[KRAKEN] No symbols provided; nothing to run.")
-            return
-
-        self._fh = FeedHandler()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)  # FeedHandler.run() picks this loop up
 
-        chans = {
-            TICKER: self.symbols_norm,
-            TRADES: self.symbols_norm
-        }
-        cbs = {TICKER: self._on_ticker, TRADES: self._on_trade}
-
-        print(f"[KRAKEN] Subscribing to {sorted(set(self.symbols_norm))}")
-        self._fh.add_feed(Kraken(subscribe=chans, callbacks=cbs))
+        with self._sub_lock:
+            self._fh = FeedHandler()
+            if self.symbols_norm:
+                print(f"[KRAKEN] Subscribing to {sorted(set(self.symbols_norm))}")
+                self._start_feed(sorted(set(self.symbols_norm)))
+            else:
+                print("[KRAKEN] No symbols yet; waiting for update_subscriptions().")
+            # from here on feeds are added/removed on the running loop
+            self._loop = loop
 
         # Let cryptofeed run/own its loop here (blocking)
         try:
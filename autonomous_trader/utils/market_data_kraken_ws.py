@@ -0,0 +1,247 @@
+# utils/market_data_kraken_ws.py
+import asyncio
+import json
+import time
+from typing import Dict, List, Tuple
+
+from utils.market_data_kraken import (
+    KrakenHub, TickerSnapshot, TICKER, TRADES, norm_to_slash, slash_to_norm,
+)
+
+WS_URL = "wss://ws.kraken.com"
+
+IDLE_TIMEOUT_SEC = 30.0   # Kraken sends a heartbeat every second when idle
+RECONNECT_DELAY_SEC = 1.0
+MAX_BACKOFF_SEC = 30.0
+BATCH_EXTEND_MIN = 8      # trade arrays at least this long go into the ring in one copy
+
+# Kraken's websocket pair names use its legacy asset codes
+_WS_ALIASES = {"BTC": "XBT", "DOGE": "XDG"}
+
+
+def to_ws_pair(sym: str) -> str:
+    """"BTC-USDT" / "BTC/USDT" -> "XBT/USDT" (Kraken websocket pair name)."""
+    base, _, quote = norm_to_slash(sym).partition("/")
+    return f"{_WS_ALIASES.get(base, base)}/{_WS_ALIASES.get(quote, quote)}"
+
+
+class KrakenWsHub(KrakenHub):
+    """
+    Kraken hub that talks to Kraken's public websocket directly.
+
+    Same state and public API as ``KrakenHub`` (snapshot, ohlcv_df, atr_pct,
+    list_symbols, feed_stats, wait_ready, update_subscriptions), but frames
+    are parsed here: each trade array is folded into the symbol's ring, bars
+    and ATR inside one write section, with no per-trade objects or callback
+    signature sniffing. The connection is re-established with exponential
+    backoff and every live symbol is re-subscribed on reconnect.
+    """
+    def __init__(self, symbols: List[str], url: str = WS_URL, idle_timeout: float = IDLE_TIMEOUT_SEC,
+                 reconnect_delay: float = RECONNECT_DELAY_SEC, max_backoff: float = MAX_BACKOFF_SEC, **kwargs):
+        super().__init__(symbols, **kwargs)
+        self.url = url
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_backoff = max_backoff
+        self.reconnects = 0
+        self.bad_frames = 0
+        self._ws = None
+        self._stopping = False
+        self._last_frame = 0.0
+        self._pair_to_sym: Dict[str, str] = {}  # ws pair name -> hub symbol
+
+    # -------- frame handling (hot path, runs on the hub loop)
+    def _handle_frame(self, raw, receipt: float) -> None:
+        msg = json.loads(raw)
+        if type(msg) is list:
+            # [channelID, payload, channelName, pair]
+            channel, pair = msg[-2], msg[-1]
+            sym = self._pair_to_sym.get(pair) or slash_to_norm(pair)
+            if sym not in self.symbols_norm:
+                return  # in flight when it was unsubscribed; don't bring its state back
+            if channel == "trade":
+                self._on_trade_batch(sym, msg[1], receipt)
+            elif channel == "ticker":
+                self._on_ticker_frame(sym, msg[1], receipt)
+        elif msg.get("event") == "subscriptionStatus" and msg.get("status") == "error":
+            self._on_subscription_error(msg)
+
+    def _on_trade_batch(self, sym: str, trades: list, receipt: float) -> None:
+        t0 = time.perf_counter()
+        # [price, volume, time, side, orderType, misc(, tradeId)] as strings
+        px = [float(t[0]) for t in trades]
+        sz = [float(t[1]) for t in trades]
+        ts = [float(t[2]) for t in trades]
+        n = len(ts)
+        if not n:
+            return
+        bars = self._bars_for(sym)
+        ring, est = self._trades[sym], self._atr[sym]
+        closed = []
+        bars.seq.write_begin()
+        try:
+            if n >= BATCH_EXTEND_MIN:
+                ring.extend(ts, px, sz)
+            else:
+                for i in range(n):
+                    ring.append(ts[i], px[i], sz[i])
+            for i in range(n):
+                est.on_trade(ts[i], px[i])
+                bar = bars.on_trade(ts[i], px[i], sz[i])
+                if bar is not None:
+                    closed.append(bar)
+        finally:
+            bars.seq.write_end()
+        if self.exit_engine is not None:
+            self.exit_engine.on_trades(norm_to_slash(sym), px)
+        self._publish_bars(sym, bars, closed, px[-1])
+        if self.recorder is not None:
+            for i, t in enumerate(trades):
+                self.recorder.trade(sym, ts[i], "buy" if t[3] == "b" else "sell", sz[i], px[i], receipt)
+        self.stats.record(sym, TRADES, ts[-1], receipt, time.perf_counter() - t0, n)
+
+    def _on_ticker_frame(self, sym: str, payload: dict, receipt: float) -> None:
+        t0 = time.perf_counter()
+        bid, ask = float(payload["b"][0]), float(payload["a"][0])
+        vol = payload.get("v")
+        if self.recorder is not None:
+            self.recorder.ticker(sym, receipt, bid, ask, receipt, volume=float(vol[1]) if vol else None)
+        self._ticker[sym] = TickerSnapshot(
+            price=(bid + ask) / 2.0,
+            volume_24h=float(vol[1]) if vol else None,  # rolling 24h base volume
+            ts=receipt,  # Kraken ticker frames carry no exchange timestamp
+        )
+        if self.events is not None:
+            self.events.price(norm_to_slash(sym), (bid + ask) / 2.0)
+        if not self._printed_any:
+            print(f"[KRAKEN-WS] First update: {sym} price={(bid + ask) / 2.0}")
+            self._printed_any = True
+        self._ready_evt.set()
+        self.stats.record(sym, TICKER, None, receipt, time.perf_counter() - t0)
+
+    def _on_subscription_error(self, msg: dict) -> None:
+        pair = msg.get("pair")
+        sym = self._pair_to_sym.get(pair) or (slash_to_norm(pair) if pair else None)
+        print(f"[KRAKEN-WS] Subscription rejected for {pair}: {msg.get('errorMessage')}")
+        if sym is None:
+            return
+        with self._sub_lock:  # short: update_subscriptions backfills outside it
+            self._rejected.add(sym)
+            self.symbols_norm = [s for s in self.symbols_norm if s != sym]
+            self._forget(sym)
+
+    # -------- connection
+    async def _send_subscription(self, symbols: List[str], event: str = "subscribe") -> None:
+        ws = self._ws
+        if ws is None or not symbols:
+            return
+        pairs = []
+        for sym in symbols:
+            pair = to_ws_pair(sym)
+            self._pair_to_sym[pair] = sym
+            pairs.append(pair)
+        for name in ("ticker", "trade"):
+            await ws.send(json.dumps({"event": event, "pair": pairs, "subscription": {"name": name}}))
+
+    async def _read_frames(self, ws) -> None:
+        handle, clock = self._handle_frame, time.time
+        async for raw in ws:
+            self._last_frame = receipt = clock()
+            try:
+                handle(raw, receipt)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                # one malformed frame is not worth a reconnect
+                self.bad_frames += 1
+                if self.bad_frames == 1:
+                    print(f"[KRAKEN-WS] Skipping malformed frame ({e!r}): {str(raw)[:120]}")
+
+    async def _watchdog(self, ws) -> None:
+        """Close a connection that went silent; Kraken sends heartbeats every second."""
+        self._last_frame = time.time()
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 5.0))
+            if time.time() - self._last_frame > self.idle_timeout:
+                print(f"[KRAKEN-WS] No frames for {self.idle_timeout:.0f}s; reconnecting")
+                await ws.close()
+                return
+
+    async def run_async(self) -> None:
+        """Connect, subscribe and process frames until stop(); reconnects on any failure."""
+        import websockets
+
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        backoff = self.reconnect_delay
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.url, ping_interval=15, ping_timeout=15,
+                                              max_size=2 ** 22) as ws:
+                    self._ws = ws
+                    backoff = self.reconnect_delay
+                    live = list(self.symbols_norm)
+                    print(f"[KRAKEN-WS] Connected to {self.url}; subscribing to {live}")
+                    await self._send_subscription(live)
+                    watchdog = asyncio.ensure_future(self._watchdog(ws))
+                    try:
+                        await self._read_frames(ws)
+                    finally:
+                        watchdog.cancel()
+                    if not self._stopping:
+                        raise ConnectionError(f"closed by server ({ws.close_code})")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._stopping:
+                    break
+                self.reconnects += 1
+                print(f"[KRAKEN-WS] Connection lost ({e!r}); reconnecting in {backoff:.1f}s")
+            finally:
+                self._ws = None
+            if self._stopping:
+                break
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def run(self):
+        """Blocking: owns its event loop (call from the main thread, like KrakenHub.run)."""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            print("\n[KRAKEN-WS] Stopping feed…")
+
+    def stop(self) -> None:
+        """Close the connection and end run(); safe from any thread."""
+        self._stopping = True
+        loop = self._loop
+        if loop is None:
+            return
+
+        def _close():
+            if self._ws is not None:
+                asyncio.ensure_future(self._ws.close())
+        loop.call_soon_threadsafe(_close)
+
+    # -------- runtime subscriptions
+    # update_subscriptions (KrakenHub) backfills new symbols outside _sub_lock,
+    # then applies the change here under it
+    def _live_symbols(self) -> set:
+        return set(self.symbols_norm)
+
+    def _apply_subscriptions(self, wanted: set, backfilled: List[str]) -> Tuple[List[str], List[str]]:
+        current, added, removed = self._plan_subscriptions(wanted, backfilled)
+        if not added and not removed:
+            return [], []
+        self.symbols_norm = sorted((current | set(added)) - set(removed))
+
+        loop = self._loop
+        if loop is not None:
+            async def apply():
+                await self._send_subscription(removed, "unsubscribe")
+                self._forget_unless_live(removed)  # may have been re-added meanwhile
+                await self._send_subscription(added)
+            asyncio.run_coroutine_threadsafe(apply(), loop)
+        else:
+            for sym in removed:
+                self._forget(sym)
+        print(f"[KRAKEN-WS] Subscriptions +{added or '[]'} -{removed or '[]'} ({len(self.symbols_norm)} live)")
+        return added, removed
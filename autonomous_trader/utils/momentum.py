@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -41,3 +42,39 @@ def apply_momentum_entry(df: pd.DataFrame, base_sig: dict, cfg: dict, debug: boo
         base_sig["score"] = momo
         return base_sig
     return base_sig
+
+
+def apply_momentum_series(df: pd.DataFrame, signals: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+    """Apply :func:`apply_momentum_entry` to a whole signal series.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        OHLCV data with at least a 'close' column.
+    signals : pandas.DataFrame
+        Per-bar signals aligned with ``df``, as returned by
+        ``strategies.ai_combo_strategy.generate_signal_series``.
+    cfg : dict
+        Global configuration; expects 'strategy.momentum_pct'.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Copy of ``signals`` where row ``i`` is what ``apply_momentum_entry``
+        returns for ``df.iloc[:i + 1]`` and that bar's signal. Momentum BUYs
+        have no failed gate and no sl_pct/tp_pct.
+    """
+    out = signals.copy()
+    momentum_pct = (cfg.get("strategy") or {}).get("momentum_pct")
+    if momentum_pct is None or momentum_pct <= 0 or len(df) < 4:
+        return out
+    c = df["close"].to_numpy(dtype=float)
+    momo = np.full(len(c), np.nan)
+    momo[3:] = c[3:] / c[:-3] - 1.0
+    hold = (out["signal"] == "HOLD").to_numpy() & ~np.isnan(momo)
+    buy = hold & (momo >= momentum_pct)
+    out.loc[hold, "score"] = momo[hold]
+    out.loc[buy, "signal"] = "BUY"
+    out.loc[buy, "failed"] = None
+    out.loc[buy, ["sl_pct", "tp_pct"]] = np.nan
+    return out
@@ -0,0 +1,143 @@
+"""Universe backtests with signal generation spread over a process pool.
+
+A symbol's signals depend only on its own bars, so ``ParallelBacktester``
+splits a backtest in two:
+
+* workers run ``compute_signals`` one symbol at a time. All bars are packed
+  into one shared-memory block before the pool starts, and each worker
+  attaches to it once. A task is only a symbol index. Each worker writes
+  its BUY mask and scores into a second shared block, so no DataFrame is
+  pickled in either direction;
+* the parent then replays every symbol through one ``PaperBroker``
+  (``Backtester.replay``), so ``max_open_trades``, ``max_trades_per_day``,
+  ``daily_loss_limit`` and the cooldowns apply across the whole universe,
+  as in the live loop.
+
+Signal generation is nearly all of a run's time, and the replay only visits
+entry bars and bars of held symbols. A run therefore scales with the number
+of workers until there are fewer symbols than workers.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.backtester import BacktestResult, Backtester, bar_open_times, compute_signals
+
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+
+class SharedFrames:
+    """
+    OHLCV frames packed into one float64 shared-memory block.
+
+    Symbol ``k`` occupies columns ``offsets[k]:offsets[k + 1]`` of a
+    ``(len(COLUMNS), total bars)`` array. The owner creates the block and
+    unlinks it in ``close``; workers ``attach`` by name and only detach.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, symbols: List[str], offsets: np.ndarray, owner: bool):
+        self.shm = shm
+        self.symbols = symbols
+        self.offsets = offsets
+        self.owner = owner
+        self.data = np.ndarray((len(COLUMNS), int(offsets[-1])), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, frames: Dict[str, pd.DataFrame], timeframe: str) -> "SharedFrames":
+        symbols = list(frames)
+        offsets = np.concatenate(([0], np.cumsum([len(frames[s]) for s in symbols]))).astype(np.int64)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(COLUMNS) * int(offsets[-1]) * 8))
+        packed = cls(shm, symbols, offsets, owner=True)
+        for k, sym in enumerate(symbols):
+            df = frames[sym]
+            lo, hi = offsets[k], offsets[k + 1]
+            packed.data[0, lo:hi] = bar_open_times(df, timeframe) * 1000.0
+            for j, col in enumerate(COLUMNS[1:], start=1):
+                packed.data[j, lo:hi] = df[col].to_numpy(dtype=np.float64)
+        return packed
+
+    @classmethod
+    def attach(cls, name: str, symbols: List[str], offsets: np.ndarray) -> "SharedFrames":
+        return cls(shared_memory.SharedMemory(name=name), symbols, offsets, owner=False)
+
+    def frame(self, k: int) -> pd.DataFrame:
+        """Symbol ``k``'s bars as a DataFrame over views of the block (no copy)."""
+        lo, hi = self.offsets[k], self.offsets[k + 1]
+        return pd.DataFrame({col: self.data[j, lo:hi] for j, col in enumerate(COLUMNS)}, copy=False)
+
+    def close(self) -> None:
+        self.data = None  # drop the view before the buffer goes away
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# per-process state set by _init_worker
+_worker: dict = {}
+
+
+def _init_worker(frames_name: str, signals_name: str, symbols: List[str], offsets: np.ndarray, cfg: dict) -> None:
+    frames = SharedFrames.attach(frames_name, symbols, offsets)
+    signals_shm = shared_memory.SharedMemory(name=signals_name)
+    _worker.update(frames=frames, cfg=cfg, signals_shm=signals_shm,
+                   signals=np.ndarray((2, int(offsets[-1])), dtype=np.float64, buffer=signals_shm.buf))
+
+
+def _signals_task(k: int) -> float:
+    """Write symbol ``k``'s BUY mask (row 0) and score (row 1) into the signals block; returns seconds."""
+    started = time.perf_counter()
+    frames = _worker["frames"]
+    sig = compute_signals(frames.frame(k), _worker["cfg"])
+    lo, hi = frames.offsets[k], frames.offsets[k + 1]
+    _worker["signals"][0, lo:hi] = (sig["signal"] == "BUY").to_numpy()
+    _worker["signals"][1, lo:hi] = sig["score"].to_numpy(dtype=np.float64)
+    return time.perf_counter() - started
+
+
+class ParallelBacktester(Backtester):
+    """
+    ``Backtester`` whose ``run`` computes signals on ``workers`` processes
+    (default: one per CPU). Results match ``Backtester.run`` exactly.
+    With one worker or one symbol, signals are computed in-process.
+    """
+    def __init__(self, cfg: dict, timeframe: str = "5m", intrabar: bool = True, logger=None,
+                 workers: Optional[int] = None):
+        super().__init__(cfg, timeframe=timeframe, intrabar=intrabar, logger=logger)
+        self.workers = workers or os.cpu_count() or 1
+        self.signal_sec = 0.0  # summed worker time of the last run
+
+    def run(self, frames: Dict[str, pd.DataFrame],
+            signals: Optional[Dict[str, pd.DataFrame]] = None) -> BacktestResult:
+        started = time.perf_counter()
+        pending = [s for s in frames if s not in (signals or {})]
+        workers = min(self.workers, len(pending))
+        if workers <= 1:
+            self.signal_sec = 0.0
+            return super().run(frames, signals)
+
+        buy = {s: (sig["signal"] == "BUY").to_numpy() for s, sig in (signals or {}).items() if s in frames}
+        score = {s: sig["score"].to_numpy(dtype=np.float64) for s, sig in (signals or {}).items() if s in frames}
+        packed = SharedFrames.create({s: frames[s] for s in pending}, self.timeframe)
+        out = shared_memory.SharedMemory(create=True, size=max(1, 2 * int(packed.offsets[-1]) * 8))
+        try:
+            out_arr = np.ndarray((2, int(packed.offsets[-1])), dtype=np.float64, buffer=out.buf)
+            # longest series first so no worker is left with a big one at the end
+            order = sorted(range(len(pending)), key=lambda k: packed.offsets[k] - packed.offsets[k + 1])
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(packed.shm.name, out.name, pending, packed.offsets, self.cfg)) as pool:
+                self.signal_sec = sum(pool.map(_signals_task, order))
+            for k, sym in enumerate(pending):
+                lo, hi = packed.offsets[k], packed.offsets[k + 1]
+                buy[sym] = out_arr[0, lo:hi] > 0
+                score[sym] = out_arr[1, lo:hi].copy()
+            del out_arr
+        finally:
+            out.close()
+            out.unlink()
+            packed.close()
+        return self.replay(frames, buy, score, started)
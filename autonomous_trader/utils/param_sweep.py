@@ -0,0 +1,258 @@
+"""Parameter sweeps of the strategy and risk config over backtests.
+
+A space maps dotted config paths to values::
+
+    {"strategy.buy_score_threshold": [0.9, 1.1, 1.3],
+     "strategy.momentum_pct": {"low": 0.01, "high": 0.05, "step": 0.01},
+     "trailing_stop.trail_pct": {"low": 0.004, "high": 0.02}}
+
+``grid_space`` takes every combination (lists as given, ranges from ``low``
+to ``high`` inclusive by ``step``). ``random_space`` draws ``n`` combinations
+(lists uniformly by item, ranges uniformly in ``[low, high]``, integers when
+both ends are ints).
+
+``run_sweep`` backtests each combination as ``Backtester.run`` would, on a
+process pool. Most of a single backtest is shared between combinations, so
+each worker keeps it:
+
+* the indicator columns depend only on the bars. Each worker builds them
+  once per symbol (``series_features``), and only the config's gates run
+  per combination;
+* the BUY masks and scores depend only on the ``strategy`` section.
+  They are cached by it, and combinations are ordered by it, so a run of
+  risk, exit or trailing variants reuses one set of signals;
+* the replay tape (bars as lists, close times) is built once per worker.
+
+``SweepEvaluator`` can also backtest a time window of the frames, which
+``utils.walk_forward`` builds on.
+
+The bars reach the workers through ``parallel_backtest.SharedFrames``.
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from strategies.ai_combo_strategy import series_features
+from strategies.signal_cache import SignalCache, frame_fingerprint
+from utils.backtester import BacktestResult, Backtester, bar_open_times, compute_signals
+from utils.parallel_backtest import SharedFrames
+
+# summary() fields kept in the ranked table
+RESULT_FIELDS = ["trades", "win_rate", "total_pnl", "final_equity", "return_pct", "max_drawdown_pct"]
+
+
+def _range_values(spec: dict) -> list:
+    low, high, step = spec["low"], spec["high"], spec["step"]
+    if all(isinstance(v, int) for v in (low, high, step)):
+        return list(range(low, high + 1, step))
+    count = int(np.floor((high - low) / step + 1e-9)) + 1
+    return [round(low + j * step, 12) for j in range(count)]
+
+
+def grid_space(space: Dict[str, object]) -> List[dict]:
+    """Every combination of the space's values, as ``{path: value}`` dicts."""
+    axes = []
+    for path, spec in space.items():
+        if isinstance(spec, dict):
+            if "step" not in spec:
+                raise ValueError(f"{path}: a grid range needs low, high and step")
+            axes.append(_range_values(spec))
+        else:
+            axes.append(list(spec))
+    return [dict(zip(space, combo)) for combo in itertools.product(*axes)]
+
+
+def random_space(space: Dict[str, object], n: int, seed: Optional[int] = None) -> List[dict]:
+    """``n`` combinations drawn independently per path."""
+    rng = random.Random(seed)
+
+    def draw(spec):
+        if not isinstance(spec, dict):
+            return rng.choice(list(spec))
+        low, high = spec["low"], spec["high"]
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+
+    return [{path: draw(spec) for path, spec in space.items()} for _ in range(n)]
+
+
+def apply_params(cfg: dict, params: Dict[str, object]) -> dict:
+    """
+    A copy of ``cfg`` with each dotted path set. The section a path points
+    into must exist in ``cfg`` (so typos fail), the leaf key need not.
+    """
+    out = copy.deepcopy(cfg)
+    for path, value in params.items():
+        *parents, leaf = path.split(".")
+        node = out
+        for key in parents:
+            if not isinstance(node.get(key), dict):
+                raise ValueError(f"{path}: no config section {key!r}")
+            node = node[key]
+        node[leaf] = value
+    return out
+
+
+def strategy_key(cfg: dict) -> str:
+    """The part of a config that signals depend on, as a cache key."""
+    return json.dumps(cfg.get("strategy", {}), sort_keys=True, default=str)
+
+
+def params_hash(cfg: dict) -> str:
+    """Digest of a whole config, for result caches."""
+    return hashlib.blake2b(json.dumps(cfg, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+class SweepEvaluator:
+    """
+    Backtests configs over fixed frames, keeping everything that doesn't
+    depend on the config.
+
+    A ``window`` is ``(start, end)`` in epoch seconds of bar open time and
+    backtests only the bars inside it, with a fresh broker. Signals are
+    always computed over the full history and then sliced: every indicator
+    only looks back, so a window's signals are exactly those of its bars
+    with all earlier bars as warmup, and overlapping windows share them.
+    Signals are cached by strategy section, summaries by window and config
+    hash, tapes by window (least recently used evicted first).
+    """
+    def __init__(self, frames: Dict[str, pd.DataFrame], timeframe: str = "5m", intrabar: bool = True,
+                 cache_entries: int = 64):
+        self.timeframe = timeframe
+        self.intrabar = intrabar
+        self.open_times = {s: bar_open_times(df, timeframe) for s, df in frames.items()}
+        # slices need real times; without a time column bars are spaced from the epoch
+        self.frames = {s: df if "time" in df.columns else df.assign(time=self.open_times[s] * 1000.0)
+                       for s, df in frames.items()}
+        self.features = {s: series_features(df) for s, df in self.frames.items()}
+        self.data_key = b"".join(frame_fingerprint(df) for df in self.frames.values())
+        self.signal_cache = SignalCache(cache_entries)
+        self.result_cache = SignalCache(max(cache_entries, 4096))
+        self.tapes = SignalCache(cache_entries)
+
+    def signals(self, cfg: dict) -> dict:
+        """Full-history ``{"buy": {symbol: mask}, "score": {symbol: scores}}`` for ``cfg``."""
+        def compute():
+            buy, score = {}, {}
+            for sym, df in self.frames.items():
+                sig = compute_signals(df, cfg, self.features[sym])
+                buy[sym] = (sig["signal"] == "BUY").to_numpy()
+                score[sym] = sig["score"].to_numpy(dtype=np.float64)
+            return {"buy": buy, "score": score}
+        return self.signal_cache.get_or_compute((self.data_key, strategy_key(cfg)), compute)
+
+    def _slice(self, window: Optional[Tuple[float, float]]) -> dict:
+        def compute():
+            if window is None:
+                bounds = {s: (0, len(df)) for s, df in self.frames.items()}
+            else:
+                bounds = {s: tuple(np.searchsorted(t, window).tolist()) for s, t in self.open_times.items()}
+                bounds = {s: b for s, b in bounds.items() if b[1] > b[0]}
+            frames = {s: self.frames[s].iloc[lo:hi] for s, (lo, hi) in bounds.items()}
+            tape = Backtester({}, timeframe=self.timeframe).tape(frames) if frames else None
+            return {"bounds": bounds, "frames": frames, "tape": tape}
+        return self.tapes.get_or_compute(window, compute)
+
+    def backtest(self, cfg: dict, window: Optional[Tuple[float, float]] = None) -> Optional[BacktestResult]:
+        """``cfg``'s backtest over ``window`` (default: everything); None if no bars fall inside."""
+        part = self._slice(window)
+        if part["tape"] is None:
+            return None
+        sig = self.signals(cfg)
+        buy = {s: sig["buy"][s][lo:hi] for s, (lo, hi) in part["bounds"].items()}
+        score = {s: sig["score"][s][lo:hi] for s, (lo, hi) in part["bounds"].items()}
+        bt = Backtester(cfg, timeframe=self.timeframe, intrabar=self.intrabar)
+        return bt.replay(part["frames"], buy, score, tape=part["tape"])
+
+    def evaluate(self, cfg: dict, window: Optional[Tuple[float, float]] = None) -> dict:
+        """The ``RESULT_FIELDS`` of ``backtest``, cached by window and config hash."""
+        def compute():
+            result = self.backtest(cfg, window)
+            if result is None:
+                return {k: None for k in RESULT_FIELDS}
+            summary = result.summary()
+            return {k: summary[k] for k in RESULT_FIELDS}
+        return self.result_cache.get_or_compute((self.data_key, window, params_hash(cfg)), compute)
+
+
+# per-process evaluator set by _init_worker
+_worker: dict = {}
+
+
+def _init_worker(frames_name: str, symbols: List[str], offsets: np.ndarray, timeframe: str, intrabar: bool) -> None:
+    packed = SharedFrames.attach(frames_name, symbols, offsets)
+    frames = {s: packed.frame(k) for k, s in enumerate(symbols)}
+    _worker.update(packed=packed, evaluator=SweepEvaluator(frames, timeframe, intrabar))
+
+
+def worker_evaluator() -> SweepEvaluator:
+    """The ``SweepEvaluator`` of the current ``evaluator_pool`` worker."""
+    return _worker["evaluator"]
+
+
+@contextmanager
+def evaluator_pool(frames: Dict[str, pd.DataFrame], timeframe: str, intrabar: bool, workers: int):
+    """
+    A ``ProcessPoolExecutor`` whose workers each hold a ``SweepEvaluator``
+    of ``frames`` (see ``worker_evaluator``), with the bars passed through
+    shared memory.
+    """
+    packed = SharedFrames.create(frames, timeframe)
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(packed.shm.name, packed.symbols, packed.offsets,
+                                           timeframe, intrabar)) as pool:
+            yield pool
+    finally:
+        packed.close()
+
+
+def _evaluate_task(cfg: dict) -> dict:
+    return worker_evaluator().evaluate(cfg)
+
+
+def run_sweep(cfg: dict, frames: Dict[str, pd.DataFrame], combos: Iterable[dict], timeframe: str = "5m",
+              intrabar: bool = True, workers: Optional[int] = None, rank_by: str = "return_pct") -> pd.DataFrame:
+    """
+    Backtest ``cfg`` with each combination of ``combos`` applied and return
+    one row per combination (its params, then ``RESULT_FIELDS``), best
+    ``rank_by`` first. ``workers`` defaults to one process per CPU.
+    """
+    started = time.perf_counter()
+    combos = list(combos)
+    if not frames:
+        raise ValueError("no frames to backtest")
+    if rank_by not in RESULT_FIELDS:
+        raise ValueError(f"rank_by must be one of {RESULT_FIELDS}")
+    cfgs = [apply_params(cfg, params) for params in combos]
+    # group combinations that share a strategy section so their signals are reused
+    order = sorted(range(len(cfgs)), key=lambda j: strategy_key(cfgs[j]))
+    workers = min(workers or os.cpu_count() or 1, len(cfgs))
+
+    if workers <= 1:
+        evaluator = SweepEvaluator(frames, timeframe, intrabar)
+        results = [evaluator.evaluate(cfgs[j]) for j in order]
+    else:
+        with evaluator_pool(frames, timeframe, intrabar, workers) as pool:
+            # contiguous chunks keep each worker on few strategy sections
+            chunk = max(1, len(cfgs) // (workers * 4))
+            results = list(pool.map(_evaluate_task, [cfgs[j] for j in order], chunksize=chunk))
+
+    rows = [{**combos[j], **res} for j, res in zip(order, results)]
+    table = pd.DataFrame(rows, columns=list(combos[0]) + RESULT_FIELDS if combos else RESULT_FIELDS)
+    table = table.sort_values(rank_by, ascending=rank_by == "max_drawdown_pct", kind="stable",
+                              na_position="last").reset_index(drop=True)
+    table.attrs["elapsed_sec"] = time.perf_counter() - started
+    return table
@@ -17,7 +17,8 @@ def run_scanner(cfg) -> List[str]:
     Build a runtime whitelist using only cryptofeed live data.
     - Pull symbols seen by the hub
     - Rank by quote volume (price * base_volume_24h)
-    - Filter by ATR% floor (cfg['scanner']['min_atr_pct'])
+    - Filter by ATR% floor (cfg['scanner']['min_atr_pct']), read in O(1) from the
+      hub's streaming ATR (scanner.atr_window bars, scanner.atr_mode smoothing)
     """
     sc = cfg.get("scanner", {})
     top_n = int(sc.get("max_symbols", 20))
@@ -35,6 +36,8 @@ def run_scanner(cfg) -> List[str]:
         except ValueError:
             pass
     min_price = float(sc.get("min_price_usd", 0.0))
+    atr_window = sc.get("atr_window")        # None -> hub default (14)
+    atr_mode = sc.get("atr_mode", "wilder")  # same smoothing as the strategy's atr()
 
     rows: List[Tuple[str, float, float]] = []  # (symbol, qv_usd, atr_pct)
     for sym in hub.list_symbols():
@@ -44,7 +47,7 @@ def run_scanner(cfg) -> List[str]:
         qv = _to_quote_vol_usd(price, base_vol_24h)
         if qv < min_qv:
             continue
-        atrp = hub.atr_pct(sym) or 0.0
+        atrp = hub.atr_pct(sym, window=atr_window, mode=atr_mode) or 0.0
         if atrp < min_atr_pct:
             continue
         rows.append((sym, qv, atrp))
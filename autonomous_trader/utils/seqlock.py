@@ -0,0 +1,51 @@
+# utils/seqlock.py
+import time
+from typing import Any, Callable
+
+# exceptions a reader can hit when the writer mutates a container mid-copy
+_TORN_READ_ERRORS = (RuntimeError, IndexError, KeyError)
+
+
+class SeqLock:
+    """
+    Single-writer sequence lock.
+
+    The writer bumps a version counter to an odd value before mutating and
+    back to even afterwards; it never waits. Readers copy what they need and
+    retry if the version was odd or changed while they were copying, so they
+    always return a snapshot taken between two complete writes without ever
+    blocking the feed callbacks.
+    """
+    __slots__ = ("_seq",)
+
+    def __init__(self):
+        self._seq = 0
+
+    @property
+    def version(self) -> int:
+        return self._seq
+
+    # -------- writer side (one thread only: the feed event loop)
+    def write_begin(self) -> None:
+        self._seq += 1
+
+    def write_end(self) -> None:
+        self._seq += 1
+
+    # -------- reader side (any thread)
+    def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` until it completes without an interleaved write."""
+        while True:
+            start = self._seq
+            if start & 1:
+                time.sleep(0)  # writer mid-update; let it finish
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except _TORN_READ_ERRORS:
+                if self._seq == start:
+                    raise  # a genuine error, not a concurrent mutation
+                time.sleep(0)
+                continue
+            if self._seq == start:
+                return result
@@ -1,5 +1,5 @@
 
-import os, json, time
+import os, json, math, time
 from typing import Dict, Any, Optional
 
 # Import the Notifier logger so we can emit messages to events.log.  The module
@@ -40,20 +40,39 @@ EXPECTANCY_WINDOW = RISK_CFG.get("expectancy_window", 30)
 LOGGER = Notifier(CFG)
 
 class PaperBroker:
-    def __init__(self):
-        os.makedirs(os.path.join(BASE_DIR, "data", "performance"), exist_ok=True)
-        os.makedirs(os.path.join(BASE_DIR, "data", "runtime"), exist_ok=True)
+    """
+    Paper-trading broker with the bot's sizing, stop/TP, trailing and risk
+    limits.
+
+    By default it trades on the wall clock, reads ``config.json`` and keeps
+    its state in ``data/performance`` and ``data/runtime``. For backtests,
+    pass ``clock`` (a callable returning epoch seconds, e.g. the current
+    bar's close), ``persist=False`` to start from ``risk.dry_run_wallet``
+    and keep everything in memory, ``cfg`` to trade with another config and
+    ``logger`` to redirect or silence risk messages.
+    """
+    def __init__(self, clock=None, persist: bool = True, cfg: Optional[Dict[str, Any]] = None, logger=None):
+        self.clock = clock or time.time
+        self.persist = persist
+        self.cfg = CFG if cfg is None else cfg
+        self.risk_cfg = RISK_CFG if cfg is None else cfg.get("risk", {})
+        self.logger = LOGGER if logger is None else logger
+        if persist:
+            os.makedirs(os.path.join(BASE_DIR, "data", "performance"), exist_ok=True)
+            os.makedirs(os.path.join(BASE_DIR, "data", "runtime"), exist_ok=True)
 
         self.balance = self._load_balance()
         self.positions = self._load_positions()
         self.cooldowns = self._load_cooldowns()
-        self.expectancy_window = EXPECTANCY_WINDOW
+        self.expectancy_window = self.risk_cfg.get("expectancy_window", EXPECTANCY_WINDOW)
         self.symbol_pnl = self._load_symbol_pnl()
         self.daily_trades, self.trade_day = self._load_trade_count()
         self.daily_pnl, self.pnl_day = self._load_daily_pnl()
         self.consecutive_losses = 0
 
-        risk_cfg = RISK_CFG
+        risk_cfg = self.risk_cfg
+        self.pos_pnl_mult = risk_cfg.get("positive_pnl_stake_multiplier", POS_PNL_MULT)
+        self.neg_pnl_mult = risk_cfg.get("negative_pnl_stake_multiplier", NEG_PNL_MULT)
         self.max_open = risk_cfg.get("max_open_trades", 3)
         self.tradable_ratio = risk_cfg.get("tradable_balance_ratio", 0.75)
         self.stake_ratio = risk_cfg.get("stake_per_trade_ratio", 0.2)
@@ -65,8 +84,8 @@ class PaperBroker:
         self.consecutive_loss_limit = risk_cfg.get("consecutive_loss_limit", 3)
 
         # cache exit and trailing stop configuration
-        self.exits_cfg = CFG.get("exits", {})
-        self.trailing_cfg_base = CFG.get("trailing_stop", {})
+        self.exits_cfg = self.cfg.get("exits", {})
+        self.trailing_cfg_base = self.cfg.get("trailing_stop", {})
         self.stop_loss_pct = self.exits_cfg.get("stop_loss_pct", 0.015)
         self.trail_pct = self.trailing_cfg_base.get("trail_pct", 0.012)
 
@@ -74,18 +93,18 @@ class PaperBroker:
 
     # ---------- persistence ----------
     def _load_balance(self) -> float:
-        risk_cfg = CFG.get("risk", {})
-        reset = risk_cfg.get("reset_balance", False) or CFG.get("reset_balance", False)
+        risk_cfg = self.cfg.get("risk", {})
+        reset = risk_cfg.get("reset_balance", False) or self.cfg.get("reset_balance", False)
         try:
-            if os.path.exists(BAL_PATH) and not reset:
+            if self.persist and os.path.exists(BAL_PATH) and not reset:
                 return float(open(BAL_PATH, "r").read().strip())
         except Exception:
             pass
-        return RISK_CFG.get("dry_run_wallet", 1000.0)
+        return self.risk_cfg.get("dry_run_wallet", 1000.0)
 
     def _load_positions(self) -> Dict[str, Any]:
         try:
-            if os.path.exists(POS_PATH):
+            if self.persist and os.path.exists(POS_PATH):
                 return json.load(open(POS_PATH, "r"))
         except Exception:
             pass
@@ -93,7 +112,7 @@ class PaperBroker:
 
     def _load_cooldowns(self) -> Dict[str, float]:
         try:
-            if os.path.exists(CD_PATH):
+            if self.persist and os.path.exists(CD_PATH):
                 return json.load(open(CD_PATH, "r"))
         except Exception:
             pass
@@ -101,7 +120,7 @@ class PaperBroker:
 
     def _load_symbol_pnl(self) -> Dict[str, list]:
         try:
-            if os.path.exists(PPL_PATH):
+            if self.persist and os.path.exists(PPL_PATH):
                 data = json.load(open(PPL_PATH, "r"))
                 if isinstance(data, dict):
                     result = {}
@@ -116,9 +135,9 @@ class PaperBroker:
         return {}
 
     def _load_trade_count(self):
-        today = time.strftime("%Y-%m-%d", time.gmtime())
+        today = self._today()
         try:
-            if os.path.exists(TC_PATH):
+            if self.persist and os.path.exists(TC_PATH):
                 data = json.load(open(TC_PATH, "r"))
                 return data.get("count", 0), data.get("day", today)
         except Exception:
@@ -126,9 +145,9 @@ class PaperBroker:
         return 0, today
 
     def _load_daily_pnl(self):
-        today = time.strftime("%Y-%m-%d", time.gmtime())
+        today = self._today()
         try:
-            if os.path.exists(DP_PATH):
+            if self.persist and os.path.exists(DP_PATH):
                 data = json.load(open(DP_PATH, "r"))
                 return data.get("pnl", 0.0), data.get("day", today)
         except Exception:
@@ -136,40 +155,56 @@ class PaperBroker:
         return 0.0, today
 
     def _persist_balance(self):
+        if not self.persist:
+            return
         with open(BAL_PATH, "w") as f:
             f.write(str(self.balance))
 
     def _persist_positions(self):
+        if not self.persist:
+            return
         with open(POS_PATH, "w", encoding="utf-8") as f:
             json.dump(self.positions, f, indent=2)
 
     def _persist_cooldowns(self):
+        if not self.persist:
+            return
         with open(CD_PATH, "w", encoding="utf-8") as f:
             json.dump(self.cooldowns, f, indent=2)
 
     def _persist_symbol_pnl(self):
+        if not self.persist:
+            return
         with open(PPL_PATH, "w", encoding="utf-8") as f:
             json.dump(self.symbol_pnl, f, indent=2)
 
     def _persist_trade_count(self):
+        if not self.persist:
+            return
         with open(TC_PATH, "w", encoding="utf-8") as f:
             json.dump({"count": self.daily_trades, "day": self.trade_day}, f, indent=2)
 
     def _persist_daily_pnl(self):
+        if not self.persist:
+            return
         with open(DP_PATH, "w", encoding="utf-8") as f:
             json.dump({"pnl": self.daily_pnl, "day": self.pnl_day}, f, indent=2)
 
     # ---------- utils ----------
     def _now(self) -> float:
-        return time.time()
+        return self.clock()
+
+    def _today(self) -> str:
+        return time.strftime("%Y-%m-%d", time.gmtime(self._now()))
 
     def _on_cooldown(self, symbol: str) -> bool:
         ts = self.cooldowns.get(symbol, 0)
         return (self._now() - ts) < self.cooldown_minutes * 60
 
     # ---------- risk sizing ----------
-    def can_open(self) -> bool:
-        today = time.strftime("%Y-%m-%d", time.gmtime())
+    def roll_day(self) -> None:
+        """Reset the daily trade count and PnL once the (UTC) day changes."""
+        today = self._today()
         if today != self.trade_day:
             self.trade_day = today
             self.daily_trades = 0
@@ -178,14 +213,17 @@ class PaperBroker:
             self.pnl_day = today
             self.daily_pnl = 0.0
             self._persist_daily_pnl()
+
+    def can_open(self) -> bool:
+        self.roll_day()
         if self.daily_loss_limit is not None and self.daily_pnl <= -abs(self.daily_loss_limit):
-            LOGGER.send("[RISK] Cannot open trade: daily_loss_limit reached")
+            self.logger.send("[RISK] Cannot open trade: daily_loss_limit reached")
             return False
         if self.daily_trades >= self.max_trades_per_day:
-            LOGGER.send("[RISK] Cannot open trade: max_trades_per_day reached")
+            self.logger.send("[RISK] Cannot open trade: max_trades_per_day reached")
             return False
         if len(self.positions) >= self.max_open:
-            LOGGER.send("[RISK] Cannot open trade: max_open_trades reached")
+            self.logger.send("[RISK] Cannot open trade: max_open_trades reached")
             return False
         return self.balance * self.tradable_ratio > 0
 
@@ -194,17 +232,17 @@ class PaperBroker:
 
         # adjust based on account performance
         if self.daily_pnl < 0 or self.consecutive_losses >= 2:
-            stake *= NEG_PNL_MULT
+            stake *= self.neg_pnl_mult
         elif self.daily_pnl > 0:
-            stake *= POS_PNL_MULT
+            stake *= self.pos_pnl_mult
 
         # adjust based on symbol performance using rolling PnL history
         if symbol:
             pnl = sum(self.symbol_pnl.get(symbol, []))
             if pnl > 0:
-                stake *= POS_PNL_MULT
+                stake *= self.pos_pnl_mult
             elif pnl < 0:
-                stake *= NEG_PNL_MULT
+                stake *= self.neg_pnl_mult
         return min(stake, self.balance)
 
     # ---------- trading ----------
@@ -215,23 +253,24 @@ class PaperBroker:
         stake = self.stake_amount(symbol)
         loss_limit = self.consecutive_loss_limit
         if loss_limit is not None and self.consecutive_losses >= loss_limit:
-            LOGGER.send("[RISK] Consecutive loss limit reached; scaling stake down")
-            stake *= NEG_PNL_MULT
+            self.logger.send("[RISK] Consecutive loss limit reached; scaling stake down")
+            stake *= self.neg_pnl_mult
             if stake <= 0:
                 return None
         symbol_pnl = sum(self.symbol_pnl.get(symbol, []))
-        sym_limit = CFG.get("symbol_loss_limit")
+        sym_limit = self.cfg.get("symbol_loss_limit")
         if sym_limit is not None:
             if symbol_pnl <= sym_limit:
                 try:
-                    wl = json.load(open(RW_PATH, "r"))
-                    if symbol in wl:
-                        wl.remove(symbol)
-                        with open(RW_PATH, "w", encoding="utf-8") as f:
-                            json.dump(wl, f, indent=2)
+                    if self.persist:
+                        wl = json.load(open(RW_PATH, "r"))
+                        if symbol in wl:
+                            wl.remove(symbol)
+                            with open(RW_PATH, "w", encoding="utf-8") as f:
+                                json.dump(wl, f, indent=2)
                 except Exception:
                     pass
-                if CFG.get("debug", {}).get("verbose"):
+                if self.cfg.get("debug", {}).get("verbose"):
                     print(f"[RISK] Skipping {symbol}: pnl {symbol_pnl:.2f} <= {sym_limit:.2f}")
                 return None
             elif symbol_pnl < 0 and abs(symbol_pnl) >= 0.8 * abs(sym_limit):
@@ -247,15 +286,11 @@ class PaperBroker:
         qty = max(0.00000001, stake / max(adj_price, 1e-9))
         self.balance -= stake
         # initial stops
-        trailing_cfg_base = self.trailing_cfg_base
-        overrides = trailing_cfg_base.get("overrides", {})
-        symbol_cfg = overrides.get(symbol, {})
-        trailing_cfg = {k: v for k, v in trailing_cfg_base.items() if k != "overrides"}
-        trailing_cfg.update(symbol_cfg)
+        trailing_cfg = self._trailing_cfg(symbol)
         tp_pct = meta.get("take_profit_pct", exits_cfg.get("take_profit_pct", 0.006))
         atr_pct = meta.get("atr_pct")
         if atr_pct is None:
-            atr_mult = RISK_CFG.get("atr_stop_multiplier", 1.5)
+            atr_mult = self.risk_cfg.get("atr_stop_multiplier", 1.5)
             atr_pct = sl_pct / atr_mult if atr_mult else None
         self.positions[symbol] = {
             "qty": qty,
@@ -275,17 +310,21 @@ class PaperBroker:
         self._persist_balance(); self._persist_positions(); self._persist_trade_count()
         return {"symbol": symbol, "qty": qty, "price": adj_price}
 
+    def _trailing_cfg(self, symbol: str) -> Dict[str, Any]:
+        trailing_cfg_base = self.trailing_cfg_base
+        overrides = trailing_cfg_base.get("overrides", {})
+        symbol_cfg = overrides.get(symbol, {})
+        trailing_cfg = {k: v for k, v in trailing_cfg_base.items() if k != "overrides"}
+        trailing_cfg.update(symbol_cfg)
+        return trailing_cfg
+
     def update_trailing(self, symbol: str, price: float):
         pos = self.positions.get(symbol)
         if not pos:
             return
         entry = pos["entry"]
         pos["peak"] = max(pos.get("peak", entry), price)
-        trailing_cfg_base = self.trailing_cfg_base
-        overrides = trailing_cfg_base.get("overrides", {})
-        symbol_cfg = overrides.get(symbol, {})
-        trailing_cfg = {k: v for k, v in trailing_cfg_base.items() if k != "overrides"}
-        trailing_cfg.update(symbol_cfg)
+        trailing_cfg = self._trailing_cfg(symbol)
         activate_pct = pos.get("activate_profit_pct", trailing_cfg.get("activate_profit_pct", 0.0))
         if not pos.get("trail_active"):
             if price >= entry * (1 + activate_pct):
@@ -320,6 +359,27 @@ class PaperBroker:
             return True, "sl_or_trail"
         return False, ""
 
+    def exit_levels(self, symbol: str):
+        """
+        ``(low, high)`` for an open position: at any price strictly between
+        them ``should_exit`` returns False and changes nothing. ``low`` is the
+        stop; ``high`` is the lowest price that hits the take-profit, sets a
+        new peak, activates the trail or moves the stop to breakeven.
+        """
+        pos = self.positions.get(symbol)
+        if not pos:
+            return None
+        entry = pos["entry"]
+        trailing_cfg = self._trailing_cfg(symbol)
+        high = min(pos.get("tp_price", float("inf")), math.nextafter(pos.get("peak", entry), math.inf))
+        if not pos.get("trail_active"):
+            activate_pct = pos.get("activate_profit_pct", trailing_cfg.get("activate_profit_pct", 0.0))
+            high = min(high, entry * (1 + activate_pct))
+        elif pos["stop"] < entry:
+            trigger_pct = pos.get("breakeven_trigger_pct", trailing_cfg.get("breakeven_pct", 0.003))
+            high = min(high, entry * (1 + trigger_pct))
+        return pos.get("stop", 0), high
+
     def sell(self, symbol: str, price: float):
         pos = self.positions.get(symbol)
         if not pos:
@@ -0,0 +1,104 @@
+# utils/trade_ring.py
+from typing import Optional, Tuple
+
+import numpy as np
+
+# default number of prints kept per symbol (~4.8 MB per symbol, see TradeRing)
+TRADE_RING_CAPACITY = 100_000
+
+# column order inside the buffer
+TS, PRICE, SIZE = 0, 1, 2
+
+
+class TradeRing:
+    """
+    Preallocated, fixed-capacity columnar buffer of (ts, price, size) prints.
+
+    Each column is stored twice back to back (length ``2 * capacity``) and
+    every write lands in both halves, so the newest ``n`` prints are always a
+    contiguous slice. ``view()`` therefore hands out zero-copy NumPy views
+    regardless of where the write head is; memory is fixed at
+    ``2 * 3 * 8 * capacity`` bytes per symbol.
+    """
+    __slots__ = ("capacity", "_buf", "_ts", "_price", "_size", "_head", "_count")
+
+    def __init__(self, capacity: int = TRADE_RING_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self._buf = np.zeros((3, 2 * self.capacity), dtype=np.float64)
+        self._ts, self._price, self._size = self._buf  # per-column views
+        self._head = 0   # next write slot in [0, capacity)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ts: float, price: float, size: float) -> None:
+        i = self._head
+        j = i + self.capacity
+        self._ts[i] = self._ts[j] = ts
+        self._price[i] = self._price[j] = price
+        self._size[i] = self._size[j] = size
+        self._head = i + 1 if i + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, ts, price, size) -> None:
+        """Append a batch of prints given as equal-length array-likes."""
+        block = np.vstack([np.asarray(ts, dtype=np.float64),
+                           np.asarray(price, dtype=np.float64),
+                           np.asarray(size, dtype=np.float64)])
+        n = block.shape[1]
+        if n == 0:
+            return
+        cap = self.capacity
+        if n > cap:
+            block = block[:, -cap:]
+            n = cap
+        i = self._head
+        first = min(n, cap - i)
+        for base in (0, cap):
+            self._buf[:, base + i:base + i + first] = block[:, :first]
+            if first < n:
+                self._buf[:, base:base + n - first] = block[:, first:]
+        self._head = (i + n) % cap
+        self._count = min(cap, self._count + n)
+
+    def view(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Zero-copy (ts, price, size) views of the newest ``n`` prints, oldest first."""
+        if n is None or n > self._count:
+            n = self._count
+        end = self._head + self.capacity
+        window = self._buf[:, end - n:end]
+        return window[TS], window[PRICE], window[SIZE]
+
+    def last(self) -> Optional[Tuple[float, float, float]]:
+        if not self._count:
+            return None
+        j = self._head + self.capacity - 1
+        return (float(self._buf[TS, j]), float(self._buf[PRICE, j]), float(self._buf[SIZE, j]))
+
+    def ohlcv(self, step_sec: int, n: Optional[int] = None) -> np.ndarray:
+        """
+        Vectorized bucketing of the newest ``n`` prints into OHLCV rows
+        ``[time_ms, open, high, low, close, volume]``; open/close follow
+        arrival order within each bucket.
+        """
+        ts, price, size = self.view(n)
+        if not len(ts):
+            return np.empty((0, 6), dtype=np.float64)
+        buckets = (ts // step_sec).astype(np.int64) * int(step_sec)
+        if np.any(buckets[1:] < buckets[:-1]):
+            order = np.argsort(buckets, kind="stable")
+            buckets, price, size = buckets[order], price[order], size[order]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        out = np.empty((len(starts), 6), dtype=np.float64)
+        out[:, 0] = buckets[starts] * 1000
+        out[:, 1] = price[starts]
+        out[:, 2] = np.maximum.reduceat(price, starts)
+        out[:, 3] = np.minimum.reduceat(price, starts)
+        out[:, 4] = price[ends]
+        out[:, 5] = np.add.reduceat(size, starts)
+        return out
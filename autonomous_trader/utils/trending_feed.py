@@ -1,6 +1,8 @@
 # utils/trending_feed.py
 import os, json, re, threading, time, requests
 from typing import List, Set, Optional
+
+from utils.market_catalog import alias_symbols
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 CFG_PATH = os.path.join(BASE_DIR, "config", "config.json")
@@ -115,25 +117,12 @@ def _configured_symbols() -> Set[str]:
 
 def _ccxt_market_symbols() -> Set[str]:
     """
-    Load spot symbols from the configured exchange via CCXT (e.g., Kraken).
-    We’ll only keep markets with quote in QUOTES.
+    Spot symbols of the configured exchange (e.g., Kraken) from the shared
+    market catalog. We’ll only keep markets with quote in QUOTES.
     """
     try:
-        cfg = _load_cfg()
-        ex_name = (cfg.get("exchange") or "kraken").lower()
-        import ccxt  # lazy import
-        if not hasattr(ccxt, ex_name):
-            return set()
-        ex = getattr(ccxt, ex_name)({"enableRateLimit": True})
-        markets = ex.load_markets()
-        out = set()
-        for sym, m in markets.items():
-            try:
-                if m.get("spot") and m.get("quote") in QUOTES:
-                    out.add(sym.upper())
-            except Exception:
-                pass
-        return out
+        from utils.exchange_utils import get_market_catalog  # lazy: builds the exchange on first use
+        return {s.upper() for s in get_market_catalog().spot_symbols(QUOTES)}
     except Exception as e:
         print("[TREND] CCXT markets error:", e)
         return set()
@@ -217,15 +206,10 @@ def _alias_for_exchange(candidate: str) -> List[str]:
     """
     cfg = _load_cfg()
     ex = (cfg.get("exchange") or "").lower()
-    cands = [candidate]
     if ex == "kraken":
-        # If base = BTC, also try XBT
-        if candidate.startswith("BTC/"):
-            cands.append("XBT/" + candidate.split("/", 1)[1])
-        # If base = XBT, also try BTC
-        if candidate.startswith("XBT/"):
-            cands.append("BTC/" + candidate.split("/", 1)[1])
-    return cands
+        # BTC <-> XBT, DOGE <-> XDG
+        return alias_symbols(candidate)
+    return [candidate]
 
 def fetch_all_trending_validated() -> List[str]:
     """
@@ -0,0 +1,161 @@
+"""Walk-forward optimization: tune on a window, trade the next one.
+
+History is split into rolling windows. Window ``j`` trains on
+``[start + j * step, + train)`` and tests on the ``test`` span right after
+it. For every window, each combination of a parameter space (see
+``utils.param_sweep``) is backtested on the training span, the best one by
+``rank_by`` is kept, and that config is backtested on the test span. Each
+span is a fresh broker at ``risk.dry_run_wallet``. The test-span equity
+curves are chained into one out-of-sample curve: each window starts from
+the equity the previous one ended with.
+
+All of it runs on one ``param_sweep.evaluator_pool``. A training task is one
+combination scored on every window at once, so the windows are optimized
+concurrently and the combination's full-history signals are computed once
+for all of them. Each worker caches signals by strategy section and
+summaries by window and config hash (``SweepEvaluator``), so overlapping
+windows don't repeat indicator or signal work.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.backtester import BacktestResult, bar_open_times
+from utils.bar_builder import parse_timeframe
+from utils.param_sweep import (RESULT_FIELDS, SweepEvaluator, apply_params, evaluator_pool, strategy_key,
+                               worker_evaluator)
+
+WINDOW_FIELDS = ["train_start", "train_end", "test_start", "test_end"]
+
+
+def walk_forward_windows(start: float, end: float, train: str, test: str,
+                         step: Optional[str] = None) -> List[Tuple[float, float, float, float]]:
+    """
+    ``(train_start, train_end, test_start, test_end)`` epoch-second spans
+    covering ``[start, end)``. ``train``/``test``/``step`` are durations such
+    as ``"30d"`` or ``"2w"``; ``step`` defaults to ``test``, so test spans
+    tile the history after the first training span. The last test span may
+    be cut short at ``end``.
+    """
+    train_sec, test_sec = parse_timeframe(train), parse_timeframe(test)
+    step_sec = parse_timeframe(step) if step else test_sec
+    windows = []
+    t = float(start)
+    while t + train_sec < end:
+        windows.append((t, t + train_sec, t + train_sec, min(t + train_sec + test_sec, float(end))))
+        t += step_sec
+    return windows
+
+
+class WalkForwardResult:
+    """
+    ``windows`` has one row per window: its spans, the chosen params, the
+    training score and the test span's ``RESULT_FIELDS``. ``oos`` is a
+    ``BacktestResult`` of the stitched out-of-sample run: the chained
+    equity curve and all test-span trades, each with its ``window`` and
+    with ``qty``/``pnl`` scaled like the curve.
+    """
+    def __init__(self, windows: pd.DataFrame, oos: BacktestResult):
+        self.windows = windows
+        self.oos = oos
+
+    def summary(self) -> dict:
+        return {"windows": len(self.windows), **self.oos.summary()}
+
+
+def _train_task(args) -> List[dict]:
+    cfg, windows = args
+    evaluator = worker_evaluator()
+    return [evaluator.evaluate(cfg, w) for w in windows]
+
+
+def _test_task(args):
+    cfg, window = args
+    return _test_run(worker_evaluator(), cfg, window)
+
+
+def _test_run(evaluator: SweepEvaluator, cfg: dict, window) -> Optional[dict]:
+    result = evaluator.backtest(cfg, window)
+    if result is None:
+        return None
+    summary = result.summary()
+    return {"summary": {k: summary[k] for k in RESULT_FIELDS}, "trades": result.trades,
+            "equity": result.equity, "bars": result.bars}
+
+
+def _best(scores: List[Optional[float]], rank_by: str) -> int:
+    """Index of the best score (lowest for drawdown, else highest); the first of ties; missing last."""
+    sign = 1.0 if rank_by == "max_drawdown_pct" else -1.0
+    keys = [(s is None or s != s, sign * s if s is not None else 0.0, j) for j, s in enumerate(scores)]
+    return min(keys)[2]
+
+
+def run_walk_forward(cfg: dict, frames: Dict[str, pd.DataFrame], combos: Iterable[dict], train: str,
+                     test: str, step: Optional[str] = None, timeframe: str = "5m", intrabar: bool = True,
+                     workers: Optional[int] = None, rank_by: str = "return_pct") -> WalkForwardResult:
+    """Optimize ``combos`` of ``cfg`` on each training span and evaluate the winner on the next test span."""
+    started = time.perf_counter()
+    combos = list(combos)
+    if not frames:
+        raise ValueError("no frames to backtest")
+    if not combos:
+        raise ValueError("no parameter combinations")
+    if rank_by not in RESULT_FIELDS:
+        raise ValueError(f"rank_by must be one of {RESULT_FIELDS}")
+    open_times = [bar_open_times(df, timeframe) for df in frames.values() if len(df)]
+    first = min(t[0] for t in open_times)
+    last = max(t[-1] for t in open_times) + parse_timeframe(timeframe)
+    windows = walk_forward_windows(first, last, train, test, step)
+    if not windows:
+        raise ValueError(f"history shorter than one {train} training span")
+    train_spans = [w[:2] for w in windows]
+    test_spans = [w[2:] for w in windows]
+
+    cfgs = [apply_params(cfg, params) for params in combos]
+    order = sorted(range(len(cfgs)), key=lambda j: strategy_key(cfgs[j]))
+    workers = min(workers or os.cpu_count() or 1, max(len(cfgs), len(windows)))
+
+    def optimize(train_map, test_map):
+        scored = dict(zip(order, train_map([(cfgs[j], train_spans) for j in order])))
+        picks = [_best([scored[j][w][rank_by] for j in range(len(cfgs))], rank_by) for w in range(len(windows))]
+        tests = list(test_map([(cfgs[j], span) for j, span in zip(picks, test_spans)]))
+        return scored, picks, tests
+
+    if workers <= 1:
+        evaluator = SweepEvaluator(frames, timeframe, intrabar)
+        scored, picks, tests = optimize(
+            lambda tasks: [[evaluator.evaluate(c, w) for w in spans] for c, spans in tasks],
+            lambda tasks: [_test_run(evaluator, c, w) for c, w in tasks])
+    else:
+        with evaluator_pool(frames, timeframe, intrabar, workers) as pool:
+            chunk = max(1, len(cfgs) // (workers * 4))
+            scored, picks, tests = optimize(lambda tasks: pool.map(_train_task, tasks, chunksize=chunk),
+                                            lambda tasks: pool.map(_test_task, tasks))
+
+    starting_balance = float(cfg.get("risk", {}).get("dry_run_wallet", 1000.0))
+    capital = starting_balance
+    rows, trades, curves, bars = [], [], [], 0
+    for w, (window, j, run) in enumerate(zip(windows, picks, tests)):
+        row = {**dict(zip(WINDOW_FIELDS, window)), **combos[j], f"train_{rank_by}": scored[j][w][rank_by]}
+        row.update(run["summary"] if run else {k: None for k in RESULT_FIELDS})
+        rows.append(row)
+        if run is None:
+            continue
+        # rescale the window's curve from a fresh wallet to the equity carried in
+        scale = capital / float(cfgs[j].get("risk", {}).get("dry_run_wallet", 1000.0))
+        curve = run["equity"].copy()
+        curve[["balance", "equity"]] *= scale
+        curves.append(curve)
+        trades.extend({**t, "qty": t["qty"] * scale, "pnl": t["pnl"] * scale, "window": w} for t in run["trades"])
+        bars += run["bars"]
+        if len(curve):
+            capital = float(curve["equity"].iloc[-1])
+
+    equity = (pd.concat(curves, ignore_index=True) if curves
+              else pd.DataFrame({"time": [], "balance": [], "equity": []}))
+    columns = WINDOW_FIELDS + list(combos[0]) + [f"train_{rank_by}"] + RESULT_FIELDS
+    oos = BacktestResult(trades, equity, {}, starting_balance, bars, time.perf_counter() - started)
+    return WalkForwardResult(pd.DataFrame(rows, columns=columns), oos)
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils import trade_executor  # noqa: E402
+
+
+@pytest.fixture
+def no_disk(tmp_path, monkeypatch):
+    """Point every PaperBroker persistence path into ``tmp_path``."""
+    for name in ("BAL_PATH", "POS_PATH", "CD_PATH", "PPL_PATH", "TC_PATH", "DP_PATH", "RW_PATH"):
+        monkeypatch.setattr(trade_executor, name, tmp_path / name)
+    return tmp_path
@@ -0,0 +1,36 @@
+"""Configs and synthetic bars shared by the strategy and backtest tests."""
+
+import random
+
+import pandas as pd
+
+CFG = {"strategy": {"buy_score_threshold": 0.8,
+                    "filters": {"avg_volume_period": 30, "min_avg_volume": 95, "max_atr_pct": 0.02,
+                                "adx_period": 14, "min_adx": 12}}}
+TIGHT_CFG = {"strategy": {"buy_score_threshold": 0.8,
+                          "filters": {"max_atr_pct": 0.007, "adx_period": 14, "min_adx": 20}}}
+
+BT_CFG = {
+    "strategy": {**CFG["strategy"], "momentum_pct": 0.01},
+    "risk": {"dry_run_wallet": 1000.0, "max_open_trades": 2, "tradable_balance_ratio": 1.0,
+             "stake_per_trade_ratio": 0.25, "cooldown_minutes": 60, "max_trades_per_day": 3,
+             "daily_loss_limit": None},
+    "exits": {"take_profit_pct": 0.01, "stop_loss_pct": 0.01},
+    "trailing_stop": {"enable": True, "activate_profit_pct": 0.004, "breakeven_pct": 0.005,
+                      "trail_pct": 0.006, "atr_trail_multiplier": 0.0},
+}
+
+
+def random_bars(n=700, seed=3):
+    """Random walk with alternating trend regimes and occasional volume spikes."""
+    rng = random.Random(seed)
+    close, rows = 100.0, []
+    for i in range(n):
+        drift = 0.002 if (i // 80) % 2 == 0 else -0.0015
+        o = close
+        close = close * (1 + drift + rng.gauss(0, 0.004))
+        h = max(o, close) * (1 + abs(rng.gauss(0, 0.002)))
+        l = min(o, close) * (1 - abs(rng.gauss(0, 0.002)))
+        v = rng.uniform(50, 150) * (3 if rng.random() < 0.1 else 1)
+        rows.append((1_700_000_000_000 + i * 300_000, o, h, l, close, v))
+    return pd.DataFrame(rows, columns=["time", "open", "high", "low", "close", "volume"])
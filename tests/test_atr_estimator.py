@@ -0,0 +1,67 @@
+import importlib.util
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.atr_estimator import AtrEstimator, EMA, SMA, WILDER  # noqa: E402
+from utils.bar_builder import BarBuilder, bars_to_df  # noqa: E402
+
+spec = importlib.util.spec_from_file_location("ai_combo_strategy", ROOT / "strategies" / "ai_combo_strategy.py")
+ai_combo_strategy = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ai_combo_strategy)
+
+
+def _trades(n=20000, seed=5):
+    rng = random.Random(seed)
+    ts, price, out = 1_700_000_000.0, 100.0, []
+    for _ in range(n):
+        ts += rng.expovariate(1 / 3.0)
+        price *= 1 + rng.gauss(0, 0.001)
+        out.append((ts, price))
+    return out
+
+
+def test_streaming_modes_match_vectorized_references():
+    trades = _trades()
+    est = AtrEstimator(minutes=14, windows=(5, 50))
+    bars = BarBuilder(60, max_bars=100_000)
+    for ts, price in trades:
+        est.on_trade(ts, price)
+        bars.on_trade(ts, price, 1.0)
+    closed = bars_to_df(bars.tail()[:-1])  # the estimator ignores the forming bar
+
+    h, l, c = closed["high"], closed["low"], closed["close"]
+    prev = c.shift(1).fillna(closed["open"])
+    tr = pd.concat([h - l, (h - prev).abs(), (l - prev).abs()], axis=1).max(axis=1)
+    for n in (5, 14, 50):
+        assert est.value(n, WILDER) == pytest.approx(ai_combo_strategy.atr(closed, n).iloc[-1], rel=1e-9)
+        assert est.value(n, EMA) == pytest.approx(tr.ewm(span=n, adjust=False).mean().iloc[-1], rel=1e-9)
+        assert est.value(n, SMA) == pytest.approx(tr.tail(n).mean(), rel=1e-9)
+    assert est.atr == est.value(14, WILDER)
+    assert est.windows == [5, 14, 50]
+
+
+def test_warmup_unknown_windows_and_bar_history():
+    est = AtrEstimator(minutes=14)
+    for minute in range(7):
+        est.on_trade(minute * 60.0, 100.0 + minute)
+        est.on_trade(minute * 60.0 + 30, 99.0 + minute)
+    assert est.atr is None  # 6 closed bars < min_periods of 7
+    est.on_trade(7 * 60.0, 107.0)
+    assert est.atr is not None
+    with pytest.raises(KeyError):
+        est.value(20)
+    with pytest.raises(ValueError):
+        AtrEstimator(mode="median")
+
+    # folding finished bars gives the same result as streaming their prints
+    replayed = AtrEstimator(minutes=14)
+    for minute in range(7):
+        replayed.on_bar(100.0 + minute, 99.0 + minute, 99.0 + minute)
+    assert replayed.atr == pytest.approx(est.atr)
@@ -0,0 +1,85 @@
+import copy
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.backtester import Backtester, compute_signals  # noqa: E402
+from helpers import BT_CFG, CFG, random_bars  # noqa: E402
+
+
+def test_run_respects_simulated_clock_limits_and_stays_in_memory(no_disk):
+    frames = {"AAA/USD": random_bars(3000, 1), "BBB/USD": random_bars(3000, 2)}
+    result = Backtester(BT_CFG).run(frames)
+    trades = result.trades_df()
+    assert len(trades) > 10 and list(no_disk.iterdir()) == []
+
+    for _, group in trades.groupby("symbol"):  # cooldown runs on bar time
+        assert (group["entry_time"].to_numpy()[1:] >= group["exit_time"].to_numpy()[:-1] + 3600).all()
+    per_day = trades.groupby(trades["entry_time"] // 86400).size()
+    assert per_day.max() <= 3
+    assert set(trades["reason"]) <= {"tp", "sl_or_trail"}
+
+    summary = result.summary()
+    realized = 1000.0 + trades["pnl"].sum()
+    if not result.open_positions:
+        assert summary["final_equity"] == pytest.approx(realized)
+    assert len(result.equity) == 3000 and summary["bars"] == 6000
+
+
+def test_precomputed_signals_and_intrabar_fills(no_disk):
+    n = 80
+    close = np.full(n, 100.0)
+    df = pd.DataFrame({"time": np.arange(n) * 300_000, "open": close, "high": close + 0.1,
+                       "low": close - 0.1, "close": close, "volume": np.full(n, 100.0)})
+    df.loc[61, ["open", "high", "low", "close"]] = [100.0, 100.3, 98.0, 99.5]  # stop crossed inside the bar
+    df.loc[70, ["open", "high", "low", "close"]] = [100.0, 102.0, 99.9, 101.5]  # target crossed inside the bar
+    signals = pd.DataFrame({"signal": "HOLD", "score": 0.0}, index=df.index)
+    signals.loc[[60, 69], ["signal", "score"]] = ["BUY", 1.2]
+
+    cfg = copy.deepcopy(BT_CFG)
+    cfg["risk"]["cooldown_minutes"] = 0
+    result = Backtester(cfg).run({"X/USD": df}, signals={"X/USD": signals})
+    stop, target = result.trades
+    assert (stop["reason"], stop["exit_price"]) == ("sl_or_trail", pytest.approx(99.0))
+    assert (target["reason"], target["exit_price"]) == ("tp", pytest.approx(101.0))
+    assert stop["exit_time"] == 62 * 300 and target["score"] == 1.2
+
+    # on closes alone the dip never reaches the stop; the first position rides to the target
+    closes_only = Backtester(cfg, intrabar=False).run({"X/USD": df}, signals={"X/USD": signals})
+    assert [(t["entry_time"], t["exit_price"]) for t in closes_only.trades] == [(61 * 300, 101.5)]
+
+
+def test_compute_signals_adds_momentum_entries():
+    df = random_bars(400, 3)
+    with_momo = compute_signals(df, BT_CFG)
+    without = compute_signals(df, {**BT_CFG, "strategy": CFG["strategy"]})
+    assert (with_momo["signal"] == "BUY").sum() > (without["signal"] == "BUY").sum()
+
+
+def test_exits_free_capacity_before_entries_at_the_same_close(no_disk):
+    n = 30
+    close = np.full(n, 100.0)
+
+    def frame():
+        return pd.DataFrame({"time": np.arange(n) * 300_000, "open": close, "high": close + 0.1,
+                             "low": close - 0.1, "close": close, "volume": np.full(n, 100.0)})
+
+    frames = {"A/USD": frame(), "B/USD": frame()}
+    frames["B/USD"].loc[20, ["open", "high", "low", "close"]] = [100.0, 100.1, 98.0, 98.5]  # B stops out
+    buy = {"A/USD": np.zeros(n, dtype=bool), "B/USD": np.zeros(n, dtype=bool)}
+    buy["B/USD"][10] = True
+    buy["A/USD"][20] = True  # same close as B's exit, from a lower-index symbol
+    score = {s: np.ones(n) for s in frames}
+
+    cfg = copy.deepcopy(BT_CFG)
+    cfg["risk"].update(max_open_trades=1, cooldown_minutes=0)
+    result = Backtester(cfg).replay(frames, buy, score)
+    assert [(t["symbol"], t["entry_time"]) for t in result.trades] == [("B/USD", 11 * 300)]
+    assert result.trades[0]["exit_time"] == 21 * 300
+    assert list(result.open_positions) == ["A/USD"]  # the live loop sells B, then has room for A
@@ -0,0 +1,128 @@
+import asyncio
+import importlib.util
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+MODULE_PATH = ROOT / "utils" / "bar_builder.py"
+spec = importlib.util.spec_from_file_location("bar_builder", MODULE_PATH)
+bar_builder = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bar_builder)
+
+
+def _rebucket(trades, step):
+    """Reference: the full re-bucketing the hubs used to do on every call."""
+    buckets = {}
+    for ts, price, size in trades:
+        b = int(ts // step) * step
+        if b not in buckets:
+            buckets[b] = [price, price, price, price, size]
+        else:
+            o, h, l, _, v = buckets[b]
+            buckets[b] = [o, max(h, price), min(l, price), price, v + size]
+    return [[b * 1000, *buckets[b]] for b in sorted(buckets)]
+
+
+def _random_trades(n=3000, seed=7):
+    rng = random.Random(seed)
+    ts, price, out = 1_700_000_000.0, 100.0, []
+    for _ in range(n):
+        ts += rng.expovariate(1 / 2.0)
+        price *= 1 + rng.gauss(0, 0.001)
+        out.append((ts, price, rng.uniform(0.01, 2.0)))
+    return out
+
+
+def test_incremental_bars_match_rebucketing():
+    trades = _random_trades()
+    for step in (60, 300, 900):
+        bb = bar_builder.BarBuilder(step, max_bars=10_000)
+        for ts, price, size in trades:
+            bb.on_trade(ts, price, size)
+        assert bb.tail() == _rebucket(trades, step)
+        assert bb.tail(5) == _rebucket(trades, step)[-5:]
+
+
+def test_late_print_folds_into_existing_bar():
+    bb = bar_builder.BarBuilder(60)
+    bb.on_trade(0.0, 10.0, 1.0)
+    bb.on_trade(61.0, 11.0, 1.0)
+    bb.on_trade(30.0, 12.0, 2.0)  # arrives late for the first minute
+    first, second = bb.tail()
+    # late prints widen high/low and add volume but never replace the close
+    assert first == [0, 10.0, 12.0, 10.0, 10.0, 3.0]
+    assert second == [60000, 11.0, 11.0, 11.0, 11.0, 1.0]
+
+
+def test_parse_timeframe():
+    assert bar_builder.parse_timeframe("30m") == 1800
+    assert bar_builder.parse_timeframe("4h") == 14400
+    assert bar_builder.parse_timeframe("1d") == 86400
+    for bad in ("", "5", "m5", "0m", "5x"):
+        with pytest.raises(ValueError):
+            bar_builder.parse_timeframe(bad)
+
+
+def test_rollups_match_rebucketing_whether_registered_early_or_late():
+    trades = _random_trades(n=30000, seed=11)  # roughly 16 hours of prints
+    early = bar_builder.TimeframeBars()
+    for step in (300, 3600, 14400):
+        early.rollup(step)
+    late = bar_builder.TimeframeBars()
+    for ts, price, size in trades:
+        early.on_trade(ts, price, size)
+        late.on_trade(ts, price, size)
+
+    for step in (60, 300, 1800, 3600, 14400):
+        expected = _rebucket(trades, step)
+        for bars in (early, late):
+            got = bars.tail(step, limit=50)
+            assert len(got) == min(50, len(expected))
+            for row, ref in zip(got, expected[-50:]):
+                assert row[:5] == ref[:5]
+                assert row[5] == pytest.approx(ref[5])
+    assert late.timeframes() == [300, 1800, 3600, 14400]
+
+
+def test_late_print_patches_rollups():
+    bars = bar_builder.TimeframeBars()
+    bars.rollup(300)
+    bars.on_trade(0.0, 10.0, 1.0)
+    bars.on_trade(61.0, 11.0, 1.0)
+    bars.on_trade(125.0, 9.0, 1.0)
+    bars.on_trade(30.0, 15.0, 1.0)  # late for the first minute
+    assert bars.tail(300) == [[0, 10.0, 15.0, 9.0, 9.0, 4.0]]
+    bars.on_trade(301.0, 12.0, 1.0)  # closes the 5m bar
+    bars.on_trade(200.0, 16.0, 1.0)  # late for the closed 5m bar
+    assert bars.tail(300)[0] == [0, 10.0, 16.0, 9.0, 9.0, 5.0]
+
+
+def test_rollup_rejects_sub_minute_steps():
+    with pytest.raises(ValueError):
+        bar_builder.TimeframeBars().rollup(90)
+
+
+def test_hub_ohlcv_df_reads_incremental_bars():
+    from utils.market_data_kraken import KrakenHub
+
+    hub = KrakenHub(symbols=["ETH/USDT"])
+    trades = _random_trades(500)
+
+    async def feed():
+        for ts, price, size in trades:
+            await hub._on_trade(None, "ETH-USDT", None, ts, "buy", size, price, ts)
+
+    asyncio.run(feed())
+    df = hub.ohlcv_df("ETH/USDT", timeframe="1m", limit=10)
+    assert list(df.columns) == ["time", "open", "high", "low", "close", "volume"]
+    assert df.values.tolist() == _rebucket(trades, 60)[-10:]
+    assert hub.ohlcv_df("BTC/USDT").empty
+    hourly = hub.ohlcv_df("ETH/USDT", timeframe="1h").values.tolist()
+    assert [row[:5] for row in hourly] == [row[:5] for row in _rebucket(trades, 3600)]
+    with pytest.raises(ValueError):
+        hub.ohlcv_df("ETH/USDT", timeframe="weekly")
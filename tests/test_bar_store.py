@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils import bar_store  # noqa: E402
+
+
+def _bar(i, step=60):
+    return [i * step * 1000, 10.0 + i, 11.0 + i, 9.0 + i, 10.5 + i, 1.0 + i]
+
+
+def test_append_read_wraps_and_persists(tmp_path):
+    path = str(tmp_path / "X-USD_1m.bin")
+    store = bar_store.BarStore(path, 60, capacity=4)
+    for i in range(6):
+        assert store.append(_bar(i))
+    assert len(store) == 4
+    assert store.read().tolist() == [_bar(i) for i in range(2, 6)]
+    assert store.read(2).tolist() == [_bar(4), _bar(5)]
+
+    # older bars are ignored and same-time bars overwrite the newest record
+    assert not store.append(_bar(1))
+    updated = _bar(5)
+    updated[4] = 99.0
+    assert store.append(updated)
+    store.flush()
+
+    reopened = bar_store.BarStore(path, 60, capacity=4)
+    assert reopened.read().tolist() == [_bar(2), _bar(3), _bar(4), updated]
+    assert reopened.last_time() == _bar(5)[0]
+
+
+def test_rejects_foreign_or_mismatched_files(tmp_path):
+    bogus = tmp_path / "bogus.bin"
+    bogus.write_bytes(b"x" * 200)
+    with pytest.raises(ValueError):
+        bar_store.BarStore(str(bogus), 60)
+
+    path = str(tmp_path / "Y-USD_5m.bin")
+    bar_store.BarStore(path, 300, capacity=8)
+    with pytest.raises(ValueError):
+        bar_store.BarStore(path, 60)
+
+
+def test_load_recent_bars_skips_stale_history(tmp_path):
+    now = 10_000 * 60
+    store = bar_store.open_bar_store("Z/USD", "1m", base_dir=str(tmp_path))
+    for i in range(9990, 9999):
+        store.append(_bar(i))
+    fresh = bar_store.load_recent_bars("Z/USD", "1m", now, limit=5, base_dir=str(tmp_path))
+    assert fresh[:, 0].tolist() == [i * 60_000 for i in range(9994, 9999)]
+    stale = bar_store.load_recent_bars("Z/USD", "1m", now + 3600, limit=5, base_dir=str(tmp_path))
+    assert len(stale) == 0
+    missing = bar_store.load_recent_bars("NOPE/USD", "1m", now, limit=5, base_dir=str(tmp_path))
+    assert len(missing) == 0
+    assert not Path(bar_store.store_path("NOPE/USD", "1m", str(tmp_path))).exists()
+
+
+def test_hub_persists_closed_bars_and_warm_starts(tmp_path):
+    from utils.market_data_kraken import KrakenHub
+
+    start = (int(time.time()) // 60 - 30) * 60
+    hub = KrakenHub(symbols=["ETH/USDT"], bar_store_dir=str(tmp_path))
+
+    async def feed():
+        for i in range(30 * 6):
+            ts = start + i * 10
+            await hub._on_trade(None, "ETH-USDT", None, ts, "buy", 1.0, 100.0 + np.sin(i), ts)
+
+    asyncio.run(feed())
+    before = hub.ohlcv_df("ETH/USDT", timeframe="1m", limit=100)
+    assert len(before) == 30
+
+    restarted = KrakenHub(symbols=["ETH/USDT"], bar_store_dir=str(tmp_path))
+    after = restarted.ohlcv_df("ETH/USDT", timeframe="1m", limit=100)
+    # everything but the still-forming minute survives the restart
+    assert after.values.tolist() == before.iloc[:-1].values.tolist()
+    five_min = {int(t) // 300_000 for t in after["time"]}
+    assert len(restarted.ohlcv_df("ETH/USDT", timeframe="5m")) == len(five_min)
+
+
+def test_hub_tops_up_stale_history_with_only_the_gap(tmp_path):
+    from utils.market_data_kraken import KrakenHub
+
+    now_min = int(time.time()) // 60
+    for sym in ("ETH/USDT", "SOL/USD"):
+        store = bar_store.open_bar_store(sym, "1m", base_dir=str(tmp_path))
+        store.extend(_bar(m) for m in range(now_min - 40, now_min - 20))  # 20 minutes missing before now
+    calls = []
+
+    def backfill(requests):
+        for symbol, since in requests:
+            calls.append((symbol, since))
+            if symbol == "SOL/USD" and since is not None:
+                yield symbol, [], None  # the top-up does not reach the forming minute: refetch everything
+                continue
+            first = now_min - 30 if since is None else since // 60_000
+            yield symbol, [_bar(m) for m in range(first, now_min + 1)], None
+
+    hub = KrakenHub(symbols=[], bar_store_dir=str(tmp_path), backfill=backfill)
+    assert hub.ohlcv_df("ETH/USDT", timeframe="1m").empty  # too stale to warm start alone
+    hub._backfill_history(["ETH-USDT", "SOL-USD"])
+    assert calls == [("ETH/USDT", (now_min - 20) * 60_000), ("SOL/USD", (now_min - 20) * 60_000), ("SOL/USD", None)]
+
+    eth = hub.ohlcv_df("ETH/USDT", timeframe="1m", limit=100)
+    assert eth["time"].tolist() == [m * 60_000 for m in range(now_min - 40, now_min)]
+    sol = hub.ohlcv_df("SOL/USD", timeframe="1m", limit=100)
+    assert sol["time"].tolist() == [m * 60_000 for m in range(now_min - 30, now_min)]
+    stored = bar_store.open_bar_store("ETH/USDT", "1m", base_dir=str(tmp_path)).read()
+    assert stored[:, 0].tolist() == [m * 60_000 for m in range(now_min - 40, now_min)]
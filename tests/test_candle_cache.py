@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.candle_cache import CandleCache, splice_bars  # noqa: E402
+
+STEP = 300_000
+
+
+def _rows(first: int, n: int, close: float = 1.0) -> list:
+    return [[(first + i) * STEP, close, close, close, close, 1.0] for i in range(n)]
+
+
+def _reference(history: list, live: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """The old concat + drop_duplicates + sort_values merge."""
+    df = pd.concat([pd.DataFrame(history, columns=live.columns), live], ignore_index=True)
+    df = df.drop_duplicates(subset=["time"], keep="last").sort_values("time")
+    return df.tail(limit).reset_index(drop=True)
+
+
+def test_request_plans_full_fetch_then_top_ups():
+    cache = CandleCache()
+    assert cache.request("A/USD", "5m", 200, now_ms=400 * STEP, step_ms=STEP) == (None, 200)
+    cache.update("A/USD", "5m", _rows(200, 200), STEP)  # bars 200..399, the last one forming
+    assert cache.request("A/USD", "5m", 200, now_ms=401 * STEP + 5, step_ms=STEP) == (399 * STEP, 4)
+
+    # a reply from the last bar on overwrites it and appends the new ones
+    cache.update("A/USD", "5m", _rows(399, 3, close=2.0), STEP)
+    bars = cache.bars("A/USD", "5m")
+    assert len(bars) == 202 and bars[-1, 0] == 401 * STEP and (bars[-3:, 4] == 2.0).all()
+    assert np.all(np.diff(bars[:, 0]) == STEP)
+
+    # too far behind for a top-up: fetch everything again, and a gapped reply replaces the cache
+    assert cache.request("A/USD", "5m", 200, now_ms=900 * STEP, step_ms=STEP) == (None, 200)
+    cache.update("A/USD", "5m", _rows(700, 200), STEP)
+    assert cache.bars("A/USD", "5m")[0, 0] == 700 * STEP
+    assert (cache.topups, cache.full_fetches) == (1, 2)
+
+
+def test_frame_matches_concat_merge_and_retain_follows_whitelist():
+    cache = CandleCache(capacity=150)
+    history = _rows(0, 300)
+    cache.update("A/USD", "5m", history, STEP)
+    cache.update("B/USD", "1m", _rows(0, 5), STEP)
+    live = pd.DataFrame(_rows(280, 30, close=3.0), columns=["time", "open", "high", "low", "close", "volume"])
+    live["time"] = live["time"].astype("int64")
+
+    got = cache.frame("A/USD", "5m", live, 120, STEP)
+    expected = _reference(history, live, 120)
+    pd.testing.assert_frame_equal(got, expected)
+    assert len(cache.bars("A/USD", "5m")) == 150
+    assert cache.frame("C/USD", "5m", None, 10, STEP).empty
+
+    cache.retain(["A/USD"])
+    assert len(cache) == 1 and len(cache.bars("B/USD", "1m")) == 0
+    assert splice_bars(np.empty((0, 6)), np.empty((0, 6))).shape == (0, 6)
+
+
+def test_frame_never_splices_live_bars_across_a_gap():
+    cache = CandleCache()
+    cache.update("A/USD", "5m", _rows(0, 100), STEP)
+
+    def live(first, n):
+        df = pd.DataFrame(_rows(first, n, close=2.0), columns=["time", "open", "high", "low", "close", "volume"])
+        df["time"] = df["time"].astype("int64")
+        return df
+
+    joined = cache.frame("A/USD", "5m", live(100, 5), 200, STEP)  # starts one bar after the cache
+    assert joined["time"].tolist() == [i * STEP for i in range(105)]
+    gapped = cache.frame("A/USD", "5m", live(103, 5), 200, STEP)  # bars 100..102 are missing
+    assert gapped["time"].tolist() == [i * STEP for i in range(103, 108)]
+    assert cache.request("A/USD", "5m", 50, 107 * STEP, STEP) == (99 * STEP, 10)  # top-up covers the hole
+
+
+def test_seed_from_stored_bars_makes_the_first_request_a_top_up():
+    cache = CandleCache()
+    cache.seed("A/USD", "5m", _rows(100, 200), STEP)  # stored bars 100..299, the newest two minutes behind
+    assert cache.request("A/USD", "5m", 200, now_ms=302 * STEP + 5, step_ms=STEP) == (299 * STEP, 5)
+    assert (cache.topups, cache.full_fetches) == (1, 0)
+
+    cache.update("A/USD", "5m", _rows(299, 4, close=2.0), STEP)
+    cache.seed("A/USD", "5m", _rows(100, 200), STEP)  # never drops the newer REST bars
+    bars = cache.bars("A/USD", "5m")
+    assert bars[-1, 0] == 302 * STEP and (bars[-4:, 4] == 2.0).all()
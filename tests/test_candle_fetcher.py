@@ -0,0 +1,70 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.candle_fetcher import CandleFetcher, RateLimiter  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_rate_limiter_burst_then_steady_rate_and_backoff():
+    clock = FakeClock()
+    limiter = RateLimiter(rate_per_sec=2.0, burst=3, clock=clock, sleep=clock.sleep)
+    waits = [limiter.acquire() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0] and waits[3:] == [pytest.approx(0.5)] * 2
+
+    limiter.backoff(4.0)
+    start = clock.now
+    limiter.acquire()
+    assert clock.now - start == pytest.approx(4.5)  # the pause, then a token earned after it
+    with pytest.raises(ValueError):
+        RateLimiter(rate_per_sec=0)
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+def test_fetch_many_yields_in_completion_order_with_bounded_concurrency():
+    delays = {"SLOW/USD": 0.2, "FAST/USD": 0.0, "BAD/USD": 0.05, "MID/USD": 0.05}
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fetch(symbol, timeframe, limit, since=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(delays[symbol])
+        with lock:
+            active[0] -= 1
+        if symbol == "BAD/USD":
+            raise RateLimitExceeded("slow down")
+        return [[since or 0, 1, 1, 1, 1, 1]] * limit
+
+    limiter = RateLimiter(rate_per_sec=1000.0, burst=10)
+    fetcher = CandleFetcher(fetch, workers=2, limiter=limiter, backoff_sec=0.3)
+    got = list(fetcher.fetch_many([(sym, 60_000 if sym == "MID/USD" else None, 3) for sym in delays], "5m"))
+    fetcher.close()
+
+    # MID/USD queues behind BAD/USD's rate-limit pause, so it lands after SLOW/USD
+    assert [sym for sym, _, _ in got] == ["FAST/USD", "BAD/USD", "SLOW/USD", "MID/USD"]
+    assert peak[0] <= 2
+    bad = next(r for r in got if r[0] == "BAD/USD")
+    assert bad[1] is None and isinstance(bad[2], RateLimitExceeded)
+    assert limiter._paused_until > 0  # the rate-limit error paused the shared limiter
+    assert all(len(rows) == 3 for sym, rows, err in got if err is None)
+    assert got[-1][1][0][0] == 60_000  # since is passed through
@@ -50,3 +50,14 @@ def test_generate_signal_from_csv(tmp_path):
     signal = generate_signal(loaded, cfg)
 
     assert signal["signal"] == "BUY"
+
+
+def test_with_time_returns_epoch_milliseconds(tmp_path):
+    csv_file = tmp_path / "dated.csv"
+    csv_file.write_text("date,open,high,low,close,volume\n"
+                        "2024-01-01 00:00,1,2,0,1,10\n2024-01-01 00:05,1,2,0,1,10\n")
+    assert read_csv_ohlcv(csv_file, with_time=True)["time"].tolist() == [1704067200000, 1704067500000]
+
+    csv_file.write_text("timestamp,open,high,low,close,volume\n1704067200,1,2,0,1,10\n")
+    assert read_csv_ohlcv(csv_file, with_time=True)["time"].tolist() == [1704067200000]
+    assert list(read_csv_ohlcv(csv_file).columns) == ["open", "high", "low", "close", "volume"]
@@ -0,0 +1,87 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.event_scheduler import EventScheduler  # noqa: E402
+from utils.market_data_kraken_ws import KrakenWsHub  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def _trade_frame(pair, trades):
+    return json.dumps([42, [[str(p), "0.1", str(ts), "b", "l", ""] for ts, p in trades], "trade", pair])
+
+
+def test_bar_closes_prices_and_fallback_timer():
+    clock = FakeClock()
+    sched = EventScheduler("5m", fallback_sec=30, clock=clock)
+    # first wait: nothing evaluated yet, so every symbol is due on the timer
+    entries, exits = sched.wait(["A/USD", "B/USD"], timeout=0)
+    assert entries == {"A/USD": None, "B/USD": None} and exits == {}
+
+    sched.bar_closed("A/USD", 240_000, 300)   # 04:00 closed, 05:00 forming: new 5m bar
+    sched.bar_closed("B/USD", 120_000, 180)   # inside one 5m bar: no entry check
+    sched.price("A/USD", 10.0)                # not watched
+    sched.watch(["B/USD"])
+    sched.price("B/USD", 11.0)
+    clock.t += 0.5
+    sched.price("B/USD", 12.0)                # coalesced, keeps the first event time
+    clock.t += 0.5
+    entries, exits = sched.wait(["A/USD", "B/USD"], timeout=0)
+    assert entries == {"A/USD": 1000.0} and exits == {"B/USD": (12.0, 1000.0)}
+    sched.record("bar", entries["A/USD"])
+    sched.record("price", exits["B/USD"][1])
+
+    clock.t += 29.0   # B was last evaluated 30s ago, A on its bar close 29s ago
+    entries, _ = sched.wait(["B/USD", "A/USD"], timeout=0)
+    assert entries == {"B/USD": None}
+    s = sched.summary()
+    assert s["bar_events"] == 1 and s["price_events"] == 2 and s["timer_runs"] == 3
+    assert s["bar_decisions"] == 1 and 900 < s["bar_p50_ms"] <= 1000 * 10 ** 0.25
+    assert sched.heartbeat().startswith("sched bar=")
+
+
+def test_hub_events_wake_a_waiting_loop():
+    sched = EventScheduler("5m", fallback_sec=3600)
+    sched.wait(["XBT/USDT"], timeout=0)  # timer run done; only events wake it now
+    sched.watch(["XBT/USDT"])
+    hub = KrakenWsHub(symbols=["XBT/USDT"])
+    hub.events = sched
+    t0 = 1_700_000_380.0  # 20s before a 5m boundary
+    hub._handle_frame(_trade_frame("XBT/USDT", [(t0, 100.0), (t0 + 5, 101.0)]), t0 + 5)
+    entries, exits = sched.wait(["XBT/USDT"], timeout=0)
+    assert entries == {} and exits["XBT/USDT"][0] == 101.0
+
+    got = {}
+    waiter = threading.Thread(target=lambda: got.update(zip(("entries", "exits"), sched.wait(["XBT/USDT"], 5))))
+    waiter.start()
+    started = time.perf_counter()
+    time.sleep(0.05)
+    hub._handle_frame(_trade_frame("XBT/USDT", [(t0 + 25, 102.0)]), t0 + 25)
+    waiter.join(5)
+    assert time.perf_counter() - started < 2
+    assert list(got["entries"]) == ["XBT/USDT"]
+
+
+def test_bar_closes_wait_for_the_caller_that_asks_for_them():
+    clock = FakeClock()
+    sched = EventScheduler.from_config({"timeframe_crypto": "5m", "scheduler": {"fallback_sec": 45}})
+    sched.clock = clock
+    assert sched.fallback_sec == 45.0
+    sched.wait(["A/USD", "B/USD"], timeout=0)  # timer run for both
+    sched.bar_closed("A/USD", 240_000, 300)
+    sched.bar_closed("B/USD", 240_000, 300)
+    clock.t += 1.0
+    assert sched.wait(["A/USD"], timeout=0) == ({"A/USD": 1000.0}, {})
+    assert sched.wait(["B/USD"], timeout=0) == ({"B/USD": 1000.0}, {})  # not dropped by the first wait
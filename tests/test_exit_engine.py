@@ -0,0 +1,109 @@
+import json
+import random
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.exit_engine import ExitEngine  # noqa: E402
+from utils.market_data_kraken_ws import KrakenWsHub  # noqa: E402
+from utils.trade_executor import PaperBroker  # noqa: E402
+
+CFG = {
+    "risk": {"dry_run_wallet": 1000.0, "max_open_trades": 5, "max_trades_per_day": 100, "cooldown_minutes": 0,
+             "fee_pct": 0.001, "slippage_pct": 0.0005},
+    "exits": {"take_profit_pct": 0.03, "stop_loss_pct": 0.015},
+    "trailing_stop": {"activate_profit_pct": 0.004, "breakeven_pct": 0.008, "trail_pct": 0.01,
+                      "atr_trail_multiplier": 1.2, "overrides": {"B/USD": {"breakeven_pct": 0.002}}},
+}
+
+
+class Quiet:
+    def send(self, msg):
+        pass
+
+
+def _broker():
+    return PaperBroker(clock=lambda: 1_700_000_000.0, persist=False, cfg=CFG, logger=Quiet())
+
+
+@pytest.mark.parametrize("seed,drain_each", [(s, s % 2 == 0) for s in range(6)])
+def test_band_checks_match_should_exit_on_every_print(seed, drain_each):
+    rng = random.Random(seed)
+    reference, broker = _broker(), _broker()
+    exits = []
+    engine = ExitEngine(broker, on_exit=lambda *args: exits.append(args))
+    for sym in ("A/USD", "B/USD"):
+        reference.buy(sym, 100.0, {})
+        broker.buy(sym, 100.0, {})
+    engine.sync()
+
+    prices = {"A/USD": 100.0, "B/USD": 100.0}
+    expected = []
+    for _ in range(3000):
+        sym = rng.choice(sorted(prices))
+        prices[sym] *= 1 + rng.gauss(0.0002, 0.002)
+        price = prices[sym]
+        if sym not in reference.positions:  # reopen, so trailing runs from many entries
+            reference.buy(sym, price, {})
+            engine.drain()
+            with engine.lock:
+                broker.buy(sym, price, {})
+                engine.sync()
+            continue
+        hit, reason = reference.should_exit(sym, price)
+        if hit:
+            expected.append((sym, price, reference.sell(sym, price)["pnl"], reason))
+        engine.on_trade(sym, price)
+        if drain_each:
+            engine.drain()
+            assert broker.positions == reference.positions  # same peak, stop and trail state after every print
+
+    # without draining, prints queue up behind a pending check and are still seen in order
+    engine.drain()
+    assert broker.positions == reference.positions
+    assert [(s, p, r["pnl"], why) for s, p, r, why in exits] == expected
+    assert broker.balance == reference.balance
+    assert len(expected) > 20 and {why for *_, why in expected} == {"tp", "sl_or_trail"}
+    if drain_each:
+        assert engine.checks < engine.prints / 2  # most prints stay inside the band
+
+
+def test_trade_batch_sells_on_the_crossing_print():
+    broker = _broker()
+    sold = []
+    engine = ExitEngine(broker, on_exit=lambda sym, price, result, reason: sold.append((price, reason)))
+    broker.buy("XBT/USDT", 100.0, {})
+    engine.sync()
+    low, high = engine.band("XBT/USDT")
+    assert low == pytest.approx(98.5)
+
+    hub = KrakenWsHub(symbols=["XBT/USDT"])
+    hub.exit_engine = engine
+    trades = [[str(p), "0.1", str(1_700_000_000 + i), "s", "l", ""] for i, p in enumerate([99.9, 98.4, 97.0])]
+    hub._handle_frame(json.dumps([42, trades, "trade", "XBT/USDT"]), 1_700_000_003.0)
+    engine.drain()
+    assert "XBT/USDT" not in broker.positions and engine.band("XBT/USDT") is None
+    assert engine.exits == 1 and engine.checks == 1
+    assert sold == [(98.4, "sl_or_trail")]  # the crossing print, not the batch's last
+    assert engine.heartbeat().startswith("exits prints=")
+
+
+def test_hub_thread_only_queues_while_the_broker_is_busy():
+    broker = _broker()
+    sold = threading.Event()
+    engine = ExitEngine(broker, on_exit=lambda *args: sold.set())
+    broker.buy("A/USD", 100.0, {})
+    engine.sync()
+    with engine.lock:  # e.g. the trading loop in the middle of a buy and its file I/O
+        assert engine.on_trade("A/USD", 99.5) is False
+        assert engine.on_trade("A/USD", 90.0) is True  # queued without waiting for the lock
+        assert "A/USD" in broker.positions and not sold.is_set()
+    assert sold.wait(5)
+    engine.drain()
+    assert "A/USD" not in broker.positions and engine.exits == 1
+    assert engine.heartbeat().endswith("queued=0 chk_p99=" + engine.heartbeat().rsplit("=", 1)[1])
@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils import feed_recorder  # noqa: E402
+from utils.market_data_cryptofeed import CryptoFeedHub  # noqa: E402
+from utils.market_data_kraken import KrakenHub  # noqa: E402
+
+
+def _live_session(hub, n=2000, seed=3):
+    rng = random.Random(seed)
+    ts, price = 1_700_000_000.0, 100.0
+
+    async def feed():
+        nonlocal ts, price
+        for i in range(n):
+            ts += rng.expovariate(1 / 1.5)
+            price *= 1 + rng.gauss(0, 0.001)
+            sym = "ETH-USDT" if i % 3 else "SOL-USD"
+            if i % 10 == 0:
+                await hub._on_ticker(None, sym, price - 0.01, price + 0.01, ts, ts + 0.05, volume=1000.0 + i)
+            await hub._on_trade(None, sym, None, ts, "buy" if i % 2 else "sell", rng.uniform(0.1, 2), price, ts + 0.05)
+
+    asyncio.run(feed())
+
+
+def test_recording_replays_to_identical_hub_state(tmp_path):
+    path = str(tmp_path / "feed.csv.gz")
+    live = KrakenHub(symbols=[])
+    live.recorder = feed_recorder.FeedRecorder(path, flush_lines=64)
+    _live_session(live)
+    live.recorder.close()
+
+    for replayed in (KrakenHub(symbols=[]), CryptoFeedHub({"data_feeds": {}})):
+        n = asyncio.run(feed_recorder.replay(path, replayed, speed=None))
+        assert n == 2200
+        for sym in ("ETH/USDT", "SOL/USD"):
+            for tf in ("1m", "15m"):
+                expected = live.ohlcv_df(sym, timeframe=tf, limit=500).values.tolist()
+                assert replayed.ohlcv_df(sym, timeframe=tf, limit=500).values.tolist() == expected
+            assert replayed.snapshot(sym) == live.snapshot(sym)
+            assert replayed.atr_pct(sym) == live.atr_pct(sym)
+
+
+def test_sessions_append_and_truncated_tail_is_tolerated(tmp_path):
+    path = str(tmp_path / "feed.csv.gz")
+    for session in range(2):
+        rec = feed_recorder.FeedRecorder(path)
+        rec.trade("ETH-USDT", 1.0 + session, "buy", 1.0, 10.0, 1.5 + session)
+        rec.ticker("ETH-USDT", 2.0 + session, None, None, 2.5 + session, last=11.0)
+        rec.close()
+    records = list(feed_recorder.read_records(path))
+    assert [(k, r) for k, r, _, _ in records] == [("t", 1.5), ("k", 2.5), ("t", 2.5), ("k", 3.5)]
+    assert records[1][3] == (2.0, None, None, 11.0, None)
+
+    data = Path(path).read_bytes()
+    Path(path).write_bytes(data[:-7])  # crash mid-write
+    assert len(list(feed_recorder.read_records(path))) >= 2
+
+
+def test_paced_replay_follows_receipt_times(tmp_path):
+    path = str(tmp_path / "feed.csv.gz")
+    rec = feed_recorder.FeedRecorder(path)
+    for i in range(5):
+        rec.trade("ETH-USDT", 100.0 + i, "buy", 1.0, 10.0, 100.0 + i)  # one message per second
+    rec.close()
+    started = time.perf_counter()
+    asyncio.run(feed_recorder.replay(path, KrakenHub(symbols=[]), speed=20))
+    assert 0.18 <= time.perf_counter() - started < 2.0
+    with gzip.open(path, "rt") as f:
+        assert f.readline().startswith(feed_recorder.FORMAT_HEADER)
@@ -0,0 +1,61 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils import feed_stats  # noqa: E402
+
+
+def test_histogram_quantiles_land_in_the_right_bucket():
+    hist = feed_stats.LogHistogram()
+    for _ in range(90):
+        hist.record(0.002)   # 2ms
+    for _ in range(10):
+        hist.record(0.5)     # 500ms
+    p50, p99 = hist.quantile(0.5), hist.quantile(0.99)
+    assert 0.002 <= p50 < 0.002 * 10 ** 0.25
+    assert p99 == 0.5  # capped at the observed max
+    assert hist.mean() == pytest.approx((90 * 0.002 + 10 * 0.5) / 100)
+    assert feed_stats.LogHistogram().quantile(0.5) is None
+
+
+def test_rates_use_a_sliding_window_and_skew_is_counted():
+    stats = feed_stats.FeedStats()
+    t0 = 1_700_000_000.0
+    for i in range(120):
+        stats.record("ETH-USDT", "trades", t0 + i - 0.05, t0 + i, 1e-5)
+    stats.record("ETH-USDT", "ticker", t0 + 121, t0 + 120, 1e-5)  # exchange clock ahead
+    summary = stats.summary(now=t0 + 119)
+    trades = summary["ETH-USDT/trades"]
+    assert trades["count"] == 120
+    assert trades["rate"] == pytest.approx(1.0)  # only the last 60s count
+    assert 49 < trades["latency_p50_ms"] <= 50 * 10 ** 0.25
+    assert summary["ETH-USDT/ticker"]["clock_skew"] == 1
+    assert summary["all"]["count"] == 121
+    line = stats.heartbeat(now=t0 + 120)
+    assert line.startswith("feed=") and "slowest=ETH-USDT/trades" in line
+    assert feed_stats.FeedStats().heartbeat() == "feed=idle"
+
+
+def test_hub_callbacks_record_latency_from_receipt_timestamp():
+    from utils.market_data_kraken import KrakenHub
+
+    hub = KrakenHub(symbols=["ETH/USDT"])
+
+    async def feed():
+        for i in range(20):
+            ts = 1_700_000_000.0 + i
+            await hub._on_trade(None, "ETH-USDT", None, ts, "buy", 1.0, 100.0, ts + 0.25)
+            await hub._on_ticker(None, "ETH-USDT", 99.0, 101.0, ts, ts + 0.01)
+
+    asyncio.run(feed())
+    stats = hub.feed_stats()
+    assert stats["ETH-USDT/trades"]["count"] == 20
+    assert stats["ETH-USDT/ticker"]["count"] == 20
+    assert 250 <= stats["ETH-USDT/trades"]["latency_p50_ms"] <= 250 * 10 ** 0.25
+    assert stats["ETH-USDT/ticker"]["latency_p99_ms"] < stats["ETH-USDT/trades"]["latency_p50_ms"]
+    assert stats["all"]["processing_max_ms"] > 0
@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.market_data_kraken import KrakenHub  # noqa: E402
+from utils.seqlock import SeqLock  # noqa: E402
+
+TRADES = 120_000   # 100 prints per second -> 20 minutes of bars
+PER_MINUTE = 6000
+
+
+def _price(i):
+    return 100.0 + (i % 7)
+
+
+def _check_bars(rows, per_bar):
+    for prev, row in zip(rows, rows[1:]):
+        assert row[0] - prev[0] == per_bar // PER_MINUTE * 60_000
+    for t, o, h, l, c, v in rows[:-1]:
+        assert v == per_bar
+    for t, o, h, l, c, v in rows:
+        first = int(t) // 10  # ts = i / 100 seconds
+        assert o == _price(first)
+        assert c == _price(first + int(v) - 1)
+        assert l <= min(o, c) and h >= max(o, c)
+
+
+def test_readers_never_see_torn_state_while_feed_writes():
+    hub = KrakenHub(symbols=["ETH/USDT"])
+    done = threading.Event()
+    errors = []
+    reads = [0]
+
+    def writer():
+        async def feed():
+            for i in range(TRADES):
+                ts = i / 100
+                await hub._on_trade(None, "ETH-USDT", None, ts, "buy", 1.0, _price(i), ts)
+                if i % 10 == 0:
+                    await hub._on_ticker(None, "ETH-USDT", float(i), float(i), ts, ts, volume=2.0 * i)
+        try:
+            asyncio.run(feed())
+        except Exception as e:  # pragma: no cover - surfaced by the assert below
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader(timeframe, per_bar):
+        try:
+            while not done.is_set():
+                df = hub.ohlcv_df("ETH/USDT", timeframe=timeframe, limit=50)
+                if not df.empty:
+                    _check_bars(df.values.tolist(), per_bar)
+                price, vol = hub.snapshot("ETH/USDT")
+                if price is not None:
+                    assert vol == 2.0 * price
+                hub.atr_pct("ETH/USDT")
+                hub.list_symbols()
+                reads[0] += 1
+        except Exception as e:
+            errors.append(e)
+
+    def raw_reader():
+        # tight loop without the DataFrame overhead to maximise overlap with writes
+        try:
+            while not done.is_set():
+                bars = hub._bars.get("ETH-USDT")
+                if bars is not None:
+                    _check_bars(bars.snapshot(300, 50), 5 * PER_MINUTE)
+                    reads[0] += 1
+        except Exception as e:
+            errors.append(e)
+
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # force frequent thread switches mid-update
+    try:
+        threads = [threading.Thread(target=reader, args=("1m", PER_MINUTE)),
+                   threading.Thread(target=reader, args=("5m", 5 * PER_MINUTE)),
+                   threading.Thread(target=raw_reader),
+                   threading.Thread(target=writer)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=120)
+    finally:
+        sys.setswitchinterval(old_interval)
+
+    assert not errors, errors[0]
+    assert reads[0] > 0
+    final = hub.ohlcv_df("ETH/USDT", timeframe="5m", limit=50)
+    assert len(final) == 4
+    _check_bars(final.values.tolist(), 5 * PER_MINUTE)
+
+
+def test_seqlock_read_propagates_real_errors():
+    seq = SeqLock()
+    assert seq.read(lambda: 42) == 42
+    try:
+        seq.read(lambda: [][0])
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("IndexError should escape when no write overlapped")
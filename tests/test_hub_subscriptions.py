@@ -0,0 +1,148 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils import market_data_kraken  # noqa: E402
+
+
+class FakeKraken:
+    """Stands in for cryptofeed's Kraken feed (no network)."""
+    def __init__(self, subscribe, callbacks):
+        symbols = subscribe[market_data_kraken.TRADES]
+        if any(s.startswith("BAD") for s in symbols):
+            raise ValueError("unsupported symbol")
+        self.symbols = list(symbols)
+        self.started = self.stopped = self.closed = False
+
+    def start(self, loop):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+    async def shutdown(self):
+        self.closed = True
+
+
+class FakeFeedHandler:
+    def __init__(self):
+        self.feeds = []
+        self.running = False
+
+    def add_feed(self, feed, loop=None):
+        self.feeds.append(feed)
+        if self.running:
+            feed.start(loop)
+
+    def run(self):
+        self.running = True
+        loop = asyncio.get_event_loop()
+        for feed in self.feeds:
+            feed.start(loop)
+        loop.run_forever()
+
+
+@pytest.fixture
+def fake_cryptofeed(monkeypatch):
+    monkeypatch.setattr(market_data_kraken, "Kraken", FakeKraken)
+    monkeypatch.setattr(market_data_kraken, "FeedHandler", FakeFeedHandler)
+
+
+def _closed_minutes(n):
+    start = (int(time.time()) // 60 - n) * 60
+    # the last row is the still-forming minute and must not be loaded
+    return [[(start + i * 60) * 1000, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(n + 1)]
+
+
+def _settle(hub):
+    done = threading.Event()
+    hub._loop.call_soon_threadsafe(done.set)
+    assert done.wait(5)
+    time.sleep(0.05)  # let scheduled shutdown coroutines finish
+
+
+def test_update_before_run_only_changes_the_symbol_list(fake_cryptofeed):
+    calls = []
+    hub = market_data_kraken.KrakenHub(symbols=["ETH/USDT"], backfill=lambda reqs: [(s, calls.append(s) or [], None) for s, _ in reqs])
+    added, removed = hub.update_subscriptions(["ETH/USDT", "SOL/USD"])
+    assert (added, removed) == (["SOL-USD"], [])
+    assert hub.symbols_norm == ["ETH-USDT", "SOL-USD"]
+    assert calls == ["SOL/USD"]
+
+
+def test_runtime_subscribe_backfill_and_unsubscribe(fake_cryptofeed):
+    backfills = []
+
+    def backfill(requests):
+        assert not hub._sub_lock.locked()  # REST never blocks the subscription lock
+        for symbol, _ in requests:
+            backfills.append(symbol)
+            yield symbol, _closed_minutes(30), None
+
+    hub = market_data_kraken.KrakenHub(symbols=["ETH/USDT"], backfill=backfill)
+    runner = threading.Thread(target=hub.run, daemon=True)
+    runner.start()
+    deadline = time.time() + 5
+    while hub._loop is None and time.time() < deadline:
+        time.sleep(0.01)
+    try:
+        first = hub._fh.feeds[0]
+        assert first.symbols == ["ETH-USDT"]
+
+        added, removed = hub.update_subscriptions(["ETH/USDT", "SOL/USD", "BAD/USD"])
+        assert (added, removed) == (["BAD-USD", "SOL-USD"], [])
+        _settle(hub)
+        assert backfills == ["BAD/USD", "SOL/USD"]
+        sol_feed = hub._fh.feeds[-1]
+        assert sol_feed.symbols == ["SOL-USD"] and sol_feed.started
+        assert len(hub.ohlcv_df("SOL/USD", timeframe="1m", limit=100)) == 30
+        assert hub.ohlcv_df("BAD/USD").empty
+
+        # rejected symbols are not retried and an unchanged list is a no-op
+        assert hub.update_subscriptions(["ETH/USDT", "SOL/USD", "BAD/USD"]) == ([], [])
+
+        asyncio.run_coroutine_threadsafe(
+            hub._on_ticker(None, "ETH-USDT", 99.0, 101.0, time.time(), time.time()), hub._loop).result(5)
+        assert hub.snapshot("ETH/USDT")[0] == 100.0
+
+        added, removed = hub.update_subscriptions(["SOL/USD"])
+        assert (added, removed) == ([], ["ETH-USDT"])
+        _settle(hub)
+        assert first.stopped and first.closed and first not in hub._fh.feeds
+        assert hub.snapshot("ETH/USDT") == (None, None)
+        assert hub.ohlcv_df("ETH/USDT").empty
+        assert hub.symbols_norm == ["SOL-USD"]
+    finally:
+        hub._loop.call_soon_threadsafe(hub._loop.stop)
+        runner.join(5)
+
+
+def test_deferred_forget_spares_a_resubscribed_symbol(fake_cryptofeed):
+    def backfill(requests):
+        return [(symbol, _closed_minutes(30), None) for symbol, _ in requests]
+
+    hub = market_data_kraken.KrakenHub(symbols=["ETH/USDT"], backfill=backfill)
+    runner = threading.Thread(target=hub.run, daemon=True)
+    runner.start()
+    deadline = time.time() + 5
+    while hub._loop is None and time.time() < deadline:
+        time.sleep(0.01)
+    try:
+        gate = threading.Event()
+        hub._loop.call_soon_threadsafe(gate.wait, 5)  # hold the hub loop so the forget stays queued
+        assert hub.update_subscriptions([]) == ([], ["ETH-USDT"])
+        assert hub.update_subscriptions(["ETH/USDT"]) == (["ETH-USDT"], [])
+        gate.set()
+        _settle(hub)
+        assert hub.symbols_norm == ["ETH-USDT"]
+        assert len(hub.ohlcv_df("ETH/USDT", timeframe="1m", limit=100)) == 30
+    finally:
+        hub._loop.call_soon_threadsafe(hub._loop.stop)
+        runner.join(5)
@@ -0,0 +1,84 @@
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from strategies import ai_combo_strategy  # noqa: E402
+from strategies.indicator_engine import IndicatorEngine  # noqa: E402
+from helpers import CFG, TIGHT_CFG, random_bars  # noqa: E402
+
+
+def _pandas_indicators(df):
+    s = ai_combo_strategy
+    return pd.DataFrame({
+        "ema20": s.ema(df["close"], 20), "ema50": s.ema(df["close"], 50), "ema200": s.ema(df["close"], 200),
+        "rsi": s.rsi(df["close"], 14), "atr": s.atr(df, 14), "macd_hist": s.macd(df["close"])[2],
+        "vol_ma": df["volume"].rolling(20).mean(), "vol_mean_30": df["volume"].rolling(30).mean(),
+        "hh": df["high"].rolling(20).max(), "ll": df["low"].rolling(20).min(),
+        "adx": s.adx(df, 14),
+    })
+
+
+def test_every_indicator_matches_pandas_bit_for_bit():
+    df = random_bars()
+    ref = _pandas_indicators(df)
+    engine = IndicatorEngine(adx_period=14, volume_periods=(30,))
+    rows = [engine.update(r.high, r.low, r.close, r.volume, r.time) for r in df.iloc[:-1].itertuples()]
+    rows.append(engine.preview(*df[["high", "low", "close", "volume"]].iloc[-1]))
+    got = pd.DataFrame(rows)
+    for col in ref:
+        assert np.array_equal(got[col].to_numpy(), ref[col].to_numpy(), equal_nan=True), col
+    atr_pct = (ref["atr"] / df["close"]).fillna(0.0)
+    assert np.array_equal(got["atr_pct"].to_numpy(), atr_pct.to_numpy())
+    assert engine.count == len(df) - 1
+
+
+def test_generate_signal_parity_as_bars_form_and_close():
+    full = random_bars(450)
+    engines = {id(cfg): IndicatorEngine.from_config(cfg) for cfg in (CFG, TIGHT_CFG)}
+    rng = random.Random(9)
+    outcomes = set()
+    for k in range(60, len(full) + 1):
+        df = full.iloc[:k].copy()
+        # the forming bar is re-scored as it changes, then closes
+        for _ in range(1 + k % 2):
+            last = df.index[-1]
+            df.loc[last, "close"] *= 1 + rng.gauss(0, 0.003)
+            df.loc[last, "high"] = max(df.loc[last, "high"], df.loc[last, "close"])
+            df.loc[last, "volume"] += rng.uniform(0, 40)
+            for cfg in (CFG, TIGHT_CFG):
+                expected = ai_combo_strategy.generate_signal(df, cfg)
+                assert ai_combo_strategy.generate_signal(df, cfg, engines[id(cfg)]) == expected, k
+                outcomes.add(expected.get("failed") or expected["signal"])
+    # the walk exercises every branch of the strategy
+    assert {"BUY", "trend", "momentum", "volume", "adx", "atr_range"} <= outcomes
+
+
+def test_sync_rebuilds_when_history_does_not_line_up():
+    full = random_bars(300)
+    engine = IndicatorEngine.from_config(CFG)
+    engine.sync(full.iloc[:250])
+
+    revised = full.iloc[:260].copy()
+    revised.loc[248, "close"] *= 1.01  # the last bar the engine folded in changed
+    assert engine.sync(revised)[1] == IndicatorEngine.from_config(CFG).sync(revised)[1]
+    assert engine.count == 259
+
+    # a trimmed frame that lines up only adds the new bars; the engine keeps its longer history
+    engine = IndicatorEngine.from_config(CFG)
+    engine.sync(full.iloc[:280])
+    window = full.iloc[100:300].reset_index(drop=True)
+    assert engine.sync(window)[1] == IndicatorEngine.from_config(CFG).sync(full)[1]
+    assert engine.count == len(full) - 1
+
+    gap = full.iloc[:120].assign(time=full["time"] + 10 ** 9)  # back after a long gap: start over
+    assert engine.sync(gap)[1] == IndicatorEngine.from_config(CFG).sync(gap)[1]
+    assert engine.count == len(gap) - 1
+
+    no_time = full.iloc[:200].drop(columns=["time"])
+    assert ai_combo_strategy.generate_signal(no_time, CFG, engine) == ai_combo_strategy.generate_signal(no_time, CFG)
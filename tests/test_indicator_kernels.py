@@ -0,0 +1,108 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from strategies import ai_combo_strategy, indicator_kernels as K  # noqa: E402
+from helpers import CFG, TIGHT_CFG, random_bars  # noqa: E402
+
+
+def _same(a, b):
+    return np.array_equal(np.asarray(a, dtype=float), np.asarray(b, dtype=float), equal_nan=True)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_kernels_match_pandas_bit_for_bit(seed):
+    df = random_bars(300, seed)
+    df.loc[[0, 1], "volume"] = 0.0  # leading equal values take pandas' constant-run branch
+    s = ai_combo_strategy
+    h, l, c, v = (df[k].to_numpy() for k in ("high", "low", "close", "volume"))
+    for span in (12, 20, 200):
+        assert _same(K.ema(c, span), s.ema(df["close"], span))
+    assert _same(K.ewm_mean(v, 0.3), df["volume"].ewm(alpha=0.3, adjust=False).mean())
+    assert _same(K.rsi(c, 14), s.rsi(df["close"], 14))
+    assert _same(K.atr(h, l, c, 14), s.atr(df, 14))
+    assert _same(K.adx(h, l, c, 14), s.adx(df, 14))
+    for got, ref in zip(K.macd(c), s.macd(df["close"])):
+        assert _same(got, ref)
+    assert _same(K.rolling_mean(v, 20), df["volume"].rolling(20).mean())
+    assert _same(K.rolling_max(h, 20), df["high"].rolling(20).max())
+    assert _same(K.rolling_min(l, 20), df["low"].rolling(20).min())
+    assert K.tail_mean(v, 30) == df["volume"].tail(30).mean()
+
+
+def test_edge_inputs_follow_pandas():
+    flat = pd.DataFrame({"high": [1.0] * 40, "low": [1.0] * 40, "close": [1.0] * 40})
+    assert _same(K.adx(flat["high"], flat["low"], flat["close"]), ai_combo_strategy.adx(flat))
+    assert _same(K.rsi(flat["close"]), ai_combo_strategy.rsi(flat["close"]))
+
+    gappy = pd.Series([np.nan, np.nan, 3.0, np.nan, 5.0, 4.0, np.nan, np.nan, 9.0])
+    assert _same(K.ema(gappy, 3), ai_combo_strategy.ema(gappy, 3))
+    assert _same(K.rolling_max([1.0, 2.0], 20), [np.nan, np.nan])
+
+
+def test_out_buffers_are_filled_in_place():
+    c = random_bars(120)["close"].to_numpy()
+    buf = np.empty(len(c))
+    assert K.ema(c, 20, out=buf) is buf and _same(buf, K.ema(c, 20))
+    bufs = (np.empty(len(c)), np.empty(len(c)), np.empty(len(c)))
+    assert all(a is b for a, b in zip(K.macd(c, out=bufs), bufs))
+    with pytest.raises(ValueError):
+        K.rsi(c, out=np.empty(len(c) - 1))
+
+
+def test_generate_signal_backends_agree():
+    full = random_bars(420)
+    pandas_cfg = {**CFG, "strategy": {**CFG["strategy"], "indicator_backend": "pandas"}}
+    tight_pandas = {**TIGHT_CFG, "strategy": {**TIGHT_CFG["strategy"], "indicator_backend": "pandas"}}
+    for k in range(60, len(full) + 1, 3):
+        df = full.iloc[max(0, k - 200):k]
+        assert ai_combo_strategy.generate_signal(df, CFG) == ai_combo_strategy.generate_signal(df, pandas_cfg)
+        assert ai_combo_strategy.generate_signal(df, TIGHT_CFG) == ai_combo_strategy.generate_signal(df, tight_pandas)
+
+
+def test_engine_smoothing_handles_gaps_like_pandas():
+    from strategies.indicator_engine import _Ewm
+
+    gappy = [np.nan, 3.0, np.nan, 5.0, 4.0, np.nan, np.nan, 9.0, 2.0]
+    for com in (K.ema_com(3), K.ema_com(20), K.wilder_com(14)):
+        ewm, got = _Ewm(com), []
+        for x in gappy:
+            ewm.set(ewm.step(x))
+            got.append(ewm.value)
+        assert _same(got, pd.Series(gappy).ewm(com=com, adjust=False).mean())
+
+
+def test_panel_rows_match_per_series_kernels():
+    frames = [random_bars(n, seed) for seed, n in enumerate([300, 250, 120, 61, 20])]
+    panel = ai_combo_strategy.ohlcv_panel(frames)
+    h, l, c, v = (panel[k] for k in ("high", "low", "close", "volume"))
+    for i, df in enumerate(frames):
+        n = len(df)
+        hi, lo, cl, vo = (df[k].to_numpy() for k in ("high", "low", "close", "volume"))
+        assert _same(K.ema(c, 3)[i, -n:], K.ema(cl, 3))
+        assert _same(K.rsi(c)[i, -n:], K.rsi(cl))
+        assert _same(K.adx(h, l, c)[i, -n:], K.adx(hi, lo, cl))
+        assert _same(K.macd(c)[2][i, -n:], K.macd(cl)[2])
+        assert _same(K.rolling_mean(v, 20)[i, -n:], K.rolling_mean(vo, 20))
+        assert _same(K.rolling_min(l, 20)[i, -n:], K.rolling_min(lo, 20))
+        assert K.tail_means(v, 30, panel["lengths"])[i] == K.tail_mean(vo, 30)
+
+
+def test_generate_signals_matches_generate_signal_per_symbol():
+    full = [random_bars(450, seed) for seed in range(4)]
+    frames = [f.iloc[max(0, k - 200 - (k % 3) * 50):k] for k in range(40, 451, 9) for f in full]
+    panel = ai_combo_strategy.ohlcv_panel(frames)
+    outcomes = set()
+    for cfg in (CFG, TIGHT_CFG, {}):
+        result = ai_combo_strategy.generate_signals(panel, cfg)
+        for i, df in enumerate(frames):
+            sig = ai_combo_strategy.signal_at(result, i)
+            assert sig == ai_combo_strategy.generate_signal(df, cfg), i
+            outcomes.add(sig.get("failed") or sig["signal"])
+    assert {"warmup", "volume", "trend", "momentum", "atr_range", "adx"} <= outcomes
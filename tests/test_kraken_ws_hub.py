@@ -0,0 +1,121 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.kraken_ws_standin import KrakenStandIn, synthetic_frames  # noqa: E402
+from utils.market_data_kraken import KrakenHub  # noqa: E402
+from utils.market_data_kraken_ws import KrakenWsHub, to_ws_pair  # noqa: E402
+
+PAIRS = ["XBT/USDT", "ETH/USDT"]
+
+
+def _legacy_replay(hub, frames):
+    """Feed the same frames through KrakenHub's cryptofeed-style callbacks."""
+    async def feed():
+        for raw in frames:
+            _, payload, channel, pair = json.loads(raw)
+            sym = pair.replace("/", "-")
+            if channel == "trade":
+                for price, volume, ts, side, _, _ in payload:
+                    await hub._on_trade(None, sym, None, float(ts), side, float(volume), float(price), 0.0)
+            else:
+                await hub._on_ticker(None, sym, float(payload["b"][0]), float(payload["a"][0]), 0.0, 0.0)
+    asyncio.run(feed())
+
+
+def test_frame_parsing_matches_the_callback_hub():
+    frames = synthetic_frames(PAIRS, 3000, max_trades_per_frame=12)
+    native, reference = KrakenWsHub(symbols=PAIRS), KrakenHub(symbols=PAIRS)
+    for raw in frames:
+        native._handle_frame(raw, 0.0)
+    _legacy_replay(reference, frames)
+    for sym in PAIRS:
+        for tf in ("1m", "5m"):
+            got = native.ohlcv_df(sym, timeframe=tf, limit=300).values.tolist()
+            assert got == reference.ohlcv_df(sym, timeframe=tf, limit=300).values.tolist()
+        assert native.snapshot(sym)[0] == reference.snapshot(sym)[0]
+        assert native.atr_pct(sym) == reference.atr_pct(sym)
+        assert len(native._trades[sym.replace("/", "-")]) == len(reference._trades[sym.replace("/", "-")])
+    assert native.snapshot("ETH/USDT")[1] is not None  # 24h volume comes from the ticker frame
+    assert to_ws_pair("BTC-USD") == "XBT/USD" and to_ws_pair("DOGE/USDT") == "XDG/USDT"
+
+
+def test_stand_in_reconnect_rejection_and_runtime_unsubscribe():
+    frames = synthetic_frames(PAIRS, 400, ticker_every=0)
+    expected = sum(len(json.loads(f)[1]) for f in frames)
+
+    async def scenario():
+        async with KrakenStandIn(frames, drop_after=150, reject={"BAD/USD"}) as server:
+            hub = KrakenWsHub(symbols=PAIRS + ["BAD/USD"], url=server.url, reconnect_delay=0.05)
+            runner = asyncio.ensure_future(hub.run_async())
+            await asyncio.wait_for(server.done.wait(), 10)
+            for _ in range(100):
+                if sum(len(r) for r in hub._trades.values()) >= expected:
+                    break
+                await asyncio.sleep(0.02)
+
+            assert hub.reconnects == 1 and server.connections == 2
+            assert sum(len(r) for r in hub._trades.values()) == expected
+            assert "BAD-USD" in hub._rejected and "BAD-USD" not in hub.symbols_norm
+
+            await asyncio.to_thread(hub.update_subscriptions, ["XBT/USDT"])
+            await asyncio.sleep(0.1)
+            unsubs = [r for r in server.requests if r["event"] == "unsubscribe"]
+            assert {p for r in unsubs for p in r["pair"]} == {"ETH/USDT"}
+            assert hub.ohlcv_df("ETH/USDT").empty and not hub.ohlcv_df("XBT/USDT").empty
+
+            # frames already in flight for the removed pair are dropped
+            late = [f for f in frames if json.loads(f)[-1] == "ETH/USDT"][-1]
+            hub._handle_frame(late, time.time())
+            hub._handle_frame(json.dumps([7, {"b": ["5.0"], "a": ["5.2"]}, "ticker", "ETH/USDT"]), time.time())
+            assert hub.list_symbols() == ["XBT/USDT"] and hub.snapshot("ETH/USDT") == (None, None)
+            assert hub.ohlcv_df("ETH/USDT").empty and "ETH-USDT" not in hub._bars
+
+            hub.stop()
+            await asyncio.wait_for(runner, 5)
+
+    asyncio.run(scenario())
+
+
+def _closed_minutes(n):
+    start = (int(time.time()) // 60 - n) * 60
+    return [[(start + i * 60) * 1000, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(n)]
+
+
+def test_subscription_changes_never_hold_the_lock_across_rest():
+    def backfill(requests):
+        # a rejection arriving on the hub thread mid-backfill must not wait for REST
+        rejected = threading.Thread(target=hub._handle_frame, args=(json.dumps(
+            {"event": "subscriptionStatus", "status": "error", "pair": "ETH/USDT", "errorMessage": "x"}), 0.0))
+        rejected.start()
+        rejected.join(5)
+        assert not rejected.is_alive()
+        return [(symbol, _closed_minutes(30), None) for symbol, _ in requests]
+
+    hub = KrakenWsHub(symbols=PAIRS, backfill=backfill)
+    assert hub.update_subscriptions(PAIRS + ["SOL/USD"]) == (["SOL-USD"], [])
+    assert hub.symbols_norm == ["SOL-USD", "XBT-USDT"] and "ETH-USDT" in hub._rejected
+    assert len(hub.ohlcv_df("SOL/USD", timeframe="1m", limit=100)) == 30
+
+    loop = asyncio.new_event_loop()
+    runner = threading.Thread(target=loop.run_forever, daemon=True)
+    runner.start()
+    hub._loop = loop
+    try:
+        gate = threading.Event()
+        loop.call_soon_threadsafe(gate.wait, 5)  # hold the hub loop so the unsubscribe stays queued
+        assert hub.update_subscriptions(["XBT/USDT"]) == ([], ["SOL-USD"])
+        assert hub.update_subscriptions(["XBT/USDT", "SOL/USD"]) == (["SOL-USD"], [])
+        gate.set()
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result(5)
+        assert hub.symbols_norm == ["SOL-USD", "XBT-USDT"]
+        assert len(hub.ohlcv_df("SOL/USD", timeframe="1m", limit=100)) == 30
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        runner.join(5)
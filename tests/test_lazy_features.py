@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from strategies import ai_combo_strategy  # noqa: E402
+from helpers import CFG, TIGHT_CFG, random_bars  # noqa: E402
+
+PANDAS = {"indicator_backend": "pandas"}
+
+
+def _features_computed(df, cfg):
+    stats = ai_combo_strategy.GATE_STATS
+    stats.reset()
+    sig = ai_combo_strategy.generate_signal(df, cfg)
+    return sig, set(stats.feature_calls)
+
+
+def test_features_are_only_computed_for_the_gates_a_symbol_reaches():
+    full = random_bars(450)
+    seen = {}
+    for k in range(200, len(full)):
+        for cfg in (CFG, TIGHT_CFG):
+            df = full.iloc[k - 200:k]
+            sig, computed = _features_computed(df, cfg)
+            pandas_cfg = {**cfg, "strategy": {**cfg["strategy"], **PANDAS}}
+            assert sig == ai_combo_strategy.generate_signal(df, pandas_cfg)
+            seen.setdefault(sig.get("failed") or sig["signal"], computed)
+
+    assert seen["atr_range"] == {"atr_pct"}
+    assert seen["adx"] == {"atr_pct", "adx14"}
+    assert seen["volume"] == {"atr_pct", "adx14", "vol_ma"}
+    assert seen["trend"] == {"atr_pct", "adx14", "vol_ma", "ema20", "ema50", "ema200", "macd_hist", "rsi", "hh"}
+
+
+def test_gate_stats_count_outcomes_and_feature_time():
+    stats = ai_combo_strategy.GATE_STATS
+    stats.reset()
+    assert stats.heartbeat() == "gates=idle"
+    frames = [random_bars(40), random_bars(200)]
+    for df in frames:
+        ai_combo_strategy.generate_signal(df, TIGHT_CFG)
+    ai_combo_strategy.generate_signals(ai_combo_strategy.ohlcv_panel(frames), TIGHT_CFG)
+    summary = stats.summary()
+    assert summary["evaluations"] == 4 and summary["outcomes"]["warmup"] == 2
+    assert summary["features"]["atr_pct"]["calls"] == 1
+    assert stats.heartbeat().startswith("gates=warmup:2")
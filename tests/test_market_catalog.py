@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils import exchange_utils  # noqa: E402
+from utils.market_catalog import MarketCatalog  # noqa: E402
+
+MARKETS = {
+    "BTC/USDT": {"id": "XBTUSDT", "base": "BTC", "quote": "USDT", "spot": True, "active": True,
+                 "precision": {"price": 0.1, "amount": 1e-08}, "limits": {"amount": {"min": 5e-05}, "cost": {"min": 5}}},
+    "ETH/USD": {"id": "XETHZUSD", "base": "ETH", "quote": "USD", "spot": True},
+    "ETH/USD:USD": {"id": "PF_ETHUSD", "base": "ETH", "quote": "USD", "spot": False},
+    "OLD/USD": {"id": "OLDUSD", "base": "OLD", "quote": "USD", "spot": True, "active": False},
+}
+
+
+class Loader:
+    def __init__(self, markets=MARKETS):
+        self.markets = markets
+        self.calls = 0
+
+    def __call__(self, reload=False):
+        self.calls += 1
+        if isinstance(self.markets, Exception):
+            raise self.markets
+        return self.markets
+
+
+def test_lookups_aliases_and_persisted_catalog(tmp_path):
+    path = tmp_path / "markets.json"
+    loader = Loader()
+    catalog = MarketCatalog(loader, exchange="kraken", path=str(path), ttl_sec=3600, clock=lambda: 1000.0)
+    btc = catalog.get("xbt-usdt")
+    assert btc["symbol"] == "BTC/USDT" and btc["min_notional"] == 5 and btc["amount_precision"] == 1e-08
+    assert catalog.resolve("XBTUSDT") == "BTC/USDT" and catalog.resolve("NOPE/USD") is None
+    assert catalog.is_spot("ETH/USD") and not catalog.is_spot("ETH/USD:USD") and not catalog.is_spot("OLD/USD")
+    assert sorted(catalog.spot_symbols(["USDT"])) == ["BTC/USDT"]
+    assert loader.calls == 1
+
+    # a restart within the TTL reads the file; another exchange's file is ignored
+    again = MarketCatalog(Loader(RuntimeError("offline")), exchange="kraken", path=str(path), ttl_sec=3600,
+                          clock=lambda: 2000.0)
+    assert again.resolve("XBT/USDT") == "BTC/USDT" and again.loads == 0
+    other = MarketCatalog(Loader({}), exchange="binance", path=str(path), clock=lambda: 2000.0)
+    assert len(other) == 0
+
+
+def test_stale_catalog_refreshes_in_background_and_survives_failures(tmp_path):
+    now = [0.0]
+    loader = Loader()
+    catalog = MarketCatalog(loader, exchange="kraken", path=None, ttl_sec=60, clock=lambda: now[0])
+    assert catalog.is_spot("BTC/USDT") and loader.calls == 1
+
+    now[0] = 120.0
+    loader.markets = {"SOL/USD": {"id": "SOLUSD", "base": "SOL", "quote": "USD", "spot": True}}
+    assert catalog.is_spot("BTC/USDT")  # answered from the old entries
+    catalog._refreshing.join()
+    assert catalog.is_spot("SOL/USD") and not catalog.is_spot("BTC/USDT") and not catalog.is_stale()
+
+    now[0] = 240.0
+    loader.markets = RuntimeError("rate limited")
+    catalog.get("SOL/USD")
+    catalog._refreshing.join()
+    calls = loader.calls
+    assert catalog.is_spot("SOL/USD") and catalog.is_spot("SOL/USD")
+    assert loader.calls == calls  # no retry until RETRY_SEC has passed
+
+
+def test_filter_supported_symbols_loads_markets_once(tmp_path, monkeypatch):
+    class Exchange:
+        def __init__(self):
+            self.load_markets = Loader()
+
+    ex = Exchange()
+    monkeypatch.setattr(exchange_utils, "CATALOG_PATH", str(tmp_path / "markets.json"))
+    monkeypatch.setattr(exchange_utils, "_catalog", None)
+    for _ in range(3):
+        assert exchange_utils.filter_supported_symbols(ex, ["XBT/USDT", "ETH/USD", "OLD/USD", "NOPE/USD"]) == [
+            "BTC/USDT", "ETH/USD"]
+    assert ex.load_markets.calls == 1
+
+
+def test_shared_catalog_reloads_markets_past_the_ccxt_cache(tmp_path, monkeypatch):
+    class Exchange:
+        """``load_markets`` as ccxt does it: cached on the instance unless ``reload``."""
+        def __init__(self):
+            self.markets = None
+            self.fetches = 0
+
+        def load_markets(self, reload=False):
+            if self.markets is None or reload:
+                self.fetches += 1
+                self.markets = dict(MARKETS)
+            return self.markets
+
+    ex = Exchange()
+    ex.load_markets()  # e.g. an earlier caller already loaded them
+    monkeypatch.setattr(exchange_utils, "CATALOG_PATH", str(tmp_path / "markets.json"))
+    monkeypatch.setattr(exchange_utils, "_catalog", None)
+    catalog = exchange_utils.get_market_catalog(ex)
+    assert catalog.is_spot("BTC/USDT") and ex.fetches == 2
+    assert catalog.refresh() and catalog.refresh()
+    assert ex.fetches == 4
@@ -0,0 +1,49 @@
+import copy
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.backtester import Backtester, compute_signals  # noqa: E402
+from utils.parallel_backtest import ParallelBacktester, SharedFrames  # noqa: E402
+from helpers import BT_CFG, random_bars  # noqa: E402
+
+
+def test_parallel_run_matches_single_process_portfolio(no_disk):
+    cfg = copy.deepcopy(BT_CFG)
+    cfg["risk"]["daily_loss_limit"] = 5.0
+    frames = {f"S{k}/USD": random_bars(2500, k + 10) for k in range(5)}
+    frames["S4/USD"] = frames["S4/USD"].iloc[:1500]
+    given = {"S0/USD": compute_signals(frames["S0/USD"], cfg)}
+
+    serial = Backtester(cfg).run(frames)
+    parallel = ParallelBacktester(cfg, workers=2).run(frames, signals=given)
+    assert parallel.trades == serial.trades and len(serial.trades) > 10
+    assert parallel.equity.equals(serial.equity)
+
+    # the risk limits hold across symbols, not per symbol
+    trades = parallel.trades_df()
+    starts, ends = trades["entry_time"].to_numpy(), trades["exit_time"].to_numpy()
+    assert max(((starts <= t) & (t < ends)).sum() for t in starts) <= cfg["risk"]["max_open_trades"]
+    assert trades.groupby(trades["entry_time"] // 86400).size().max() <= cfg["risk"]["max_trades_per_day"]
+
+
+def test_shared_frames_round_trip_and_unlink():
+    frames = {"A/USD": random_bars(50, 1), "B/USD": random_bars(30, 2)}
+    packed = SharedFrames.create(frames, "5m")
+    name = packed.shm.name
+    try:
+        view = SharedFrames.attach(name, packed.symbols, packed.offsets)
+        got = view.frame(1)
+        assert np.array_equal(got["close"].to_numpy(), frames["B/USD"]["close"].to_numpy())
+        assert np.array_equal(got["time"].to_numpy(), frames["B/USD"]["time"].to_numpy(dtype=np.float64))
+        del got
+        view.close()
+    finally:
+        packed.close()
+    with pytest.raises(FileNotFoundError):
+        SharedFrames.attach(name, packed.symbols, packed.offsets)
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.backtester import Backtester  # noqa: E402
+from utils.param_sweep import RESULT_FIELDS, apply_params, grid_space, random_space, run_sweep  # noqa: E402
+from helpers import BT_CFG, random_bars  # noqa: E402
+
+
+def test_spaces_and_apply_params():
+    grid = grid_space({"strategy.momentum_pct": {"low": 0.01, "high": 0.03, "step": 0.01},
+                       "risk.max_open_trades": [1, 2]})
+    assert len(grid) == 6 and grid[-1] == {"strategy.momentum_pct": 0.03, "risk.max_open_trades": 2}
+    drawn = random_space({"exits.take_profit_pct": {"low": 0.01, "high": 0.02}, "risk.cooldown_minutes": [0, 60]},
+                         50, seed=1)
+    assert all(0.01 <= p["exits.take_profit_pct"] <= 0.02 for p in drawn)
+    assert {p["risk.cooldown_minutes"] for p in drawn} == {0, 60}
+
+    cfg = apply_params(BT_CFG, {"risk.atr_stop_multiplier": 2.0, "strategy.filters.min_adx": 20})
+    assert cfg["risk"]["atr_stop_multiplier"] == 2.0 and cfg["strategy"]["filters"]["min_adx"] == 20
+    assert "atr_stop_multiplier" not in BT_CFG["risk"]
+    with pytest.raises(ValueError):
+        apply_params(BT_CFG, {"strategy.filterz.min_adx": 20})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sweep_rows_match_full_backtests(no_disk, workers):
+    frames = {"AAA/USD": random_bars(2000, 1), "BBB/USD": random_bars(2000, 2)}
+    combos = grid_space({"strategy.momentum_pct": [0.005, 0.01], "trailing_stop.trail_pct": [0.004, 0.008],
+                         "strategy.filters.avg_volume_period": [20, 40]})
+    table = run_sweep(BT_CFG, frames, combos, workers=workers)
+    assert len(table) == 8 and table["return_pct"].is_monotonic_decreasing
+
+    for row in table.iloc[[0, -1]].to_dict("records"):
+        params = {k: row[k] for k in combos[0]}
+        expected = Backtester(apply_params(BT_CFG, params)).run(frames).summary()
+        assert {k: row[k] for k in RESULT_FIELDS} == pytest.approx({k: expected[k] for k in RESULT_FIELDS})
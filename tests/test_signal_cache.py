@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from strategies.ai_combo_strategy import generate_signal  # noqa: E402
+from strategies.signal_cache import SignalCache, config_fingerprint  # noqa: E402
+from helpers import CFG, random_bars  # noqa: E402
+
+
+def test_same_inputs_hit_and_any_change_misses():
+    cache, df = SignalCache(), random_bars(200)
+    cfg_hash = config_fingerprint(CFG)
+    calls = []
+
+    def compute(frame=df):
+        calls.append(1)
+        return generate_signal(frame, CFG)
+
+    first = cache.get_or_compute(cache.key("BTC/USD", "5m", df, cfg_hash), compute)
+    again = cache.get_or_compute(cache.key("BTC/USD", "5m", df.copy(), cfg_hash), compute)
+    assert again == first and len(calls) == 1
+    again["score"] = -1.0  # callers get copies
+    assert cache.get(cache.key("BTC/USD", "5m", df, cfg_hash)) == first
+
+    ticked = df.copy()
+    ticked.loc[ticked.index[-1], "close"] += 0.01
+    tighter = {**CFG, "strategy": {**CFG["strategy"], "buy_score_threshold": 1.2}}
+    for key in (cache.key("BTC/USD", "5m", ticked, cfg_hash),
+                cache.key("BTC/USD", "5m", random_bars(201).iloc[1:], cfg_hash),
+                cache.key("BTC/USD", "1m", df, cfg_hash),
+                cache.key("ETH/USD", "5m", df, cfg_hash),
+                cache.key("BTC/USD", "5m", df, config_fingerprint(tighter))):
+        assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (2, 6)
+    assert cache.heartbeat() == "sig_cache=25% hits=2 misses=6 size=1"
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SignalCache(max_entries=2)
+    cache.put("a", {"signal": "HOLD"})
+    cache.put("b", {"signal": "HOLD"})
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", {"signal": "BUY"})
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    assert len(cache) == 2 and cache.evictions == 1
+    assert SignalCache().heartbeat() == "sig_cache=idle"
+    with pytest.raises(ValueError):
+        SignalCache(max_entries=0)
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from strategies import ai_combo_strategy, indicator_kernels as K  # noqa: E402
+from utils.momentum import apply_momentum_entry, apply_momentum_series  # noqa: E402
+from helpers import CFG, TIGHT_CFG, random_bars  # noqa: E402
+
+MOMO_CFG = {"strategy": {**CFG["strategy"], "momentum_pct": 0.01,
+                         "filters": {**CFG["strategy"]["filters"], "avg_volume_period": 90}}}
+
+
+def test_series_matches_per_bar_evaluation_on_growing_slices():
+    df = random_bars(400, 5)
+    df.index += 1000  # the series keeps the frame's index; rows are matched by position
+    outcomes = set()
+    for cfg in (CFG, TIGHT_CFG, MOMO_CFG):
+        series = apply_momentum_series(df, ai_combo_strategy.generate_signal_series(df, cfg), cfg)
+        assert series.index.equals(df.index)
+        for i in range(len(df)):
+            bars = df.iloc[:i + 1]
+            expected = apply_momentum_entry(bars, ai_combo_strategy.generate_signal(bars, cfg), cfg)
+            assert ai_combo_strategy.signal_at(series, i) == expected, (i, cfg)
+            outcomes.add(expected.get("failed") or expected["signal"])
+    assert {"BUY", "warmup", "volume", "trend", "momentum", "atr_range"} <= outcomes
+
+
+def test_trailing_means_match_tail_mean_of_each_prefix():
+    v = random_bars(120)["volume"].to_numpy()
+    got = K.trailing_means(v, 30)
+    assert np.array_equal(got, [K.tail_mean(v[:i + 1], 30) for i in range(len(v))])
@@ -0,0 +1,54 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "autonomous_trader" / "utils" / "trade_ring.py"
+spec = importlib.util.spec_from_file_location("trade_ring", MODULE_PATH)
+trade_ring = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(trade_ring)
+TradeRing = trade_ring.TradeRing
+
+
+def test_view_is_zero_copy_and_ordered_after_wrap():
+    ring = TradeRing(capacity=5)
+    for i in range(12):
+        ring.append(float(i), 100.0 + i, 1.0)
+    assert len(ring) == 5
+    ts, price, size = ring.view()
+    assert ts.tolist() == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert price.tolist() == [107.0, 108.0, 109.0, 110.0, 111.0]
+    assert np.shares_memory(ts, ring._buf)
+    assert ring.view(2)[0].tolist() == [10.0, 11.0]
+    assert ring.last() == (11.0, 111.0, 1.0)
+
+
+def test_extend_matches_repeated_append():
+    a, b = TradeRing(capacity=7), TradeRing(capacity=7)
+    ts = np.arange(20, dtype=float)
+    for chunk in (ts[:3], ts[3:11], ts[11:20]):
+        a.extend(chunk, chunk * 2, chunk * 3)
+        for t in chunk:
+            b.append(t, t * 2, t * 3)
+    for col_a, col_b in zip(a.view(), b.view()):
+        assert col_a.tolist() == col_b.tolist()
+
+
+def test_vectorized_ohlcv():
+    ring = TradeRing(capacity=100)
+    prints = [(0, 10, 1), (10, 12, 2), (59, 9, 1), (60, 11, 1), (130, 13, 4), (150, 14, 1)]
+    for t, p, s in prints:
+        ring.append(t, p, s)
+    bars = ring.ohlcv(60)
+    assert bars.tolist() == [
+        [0, 10, 12, 9, 9, 4],
+        [60000, 11, 11, 11, 11, 1],
+        [120000, 13, 14, 13, 14, 5],
+    ]
+    assert ring.ohlcv(60, n=2).tolist() == [[120000, 13, 14, 13, 14, 5]]
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        TradeRing(capacity=0)
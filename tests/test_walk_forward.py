@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1] / "autonomous_trader"
+sys.path.insert(0, str(ROOT))
+
+from utils.backtester import Backtester, compute_signals  # noqa: E402
+from utils.param_sweep import SweepEvaluator, apply_params, grid_space  # noqa: E402
+from utils.walk_forward import run_walk_forward, walk_forward_windows  # noqa: E402
+from helpers import BT_CFG, random_bars  # noqa: E402
+
+DAY = 86400
+
+
+def test_windows_roll_by_test_span_and_clip_at_the_end():
+    windows = walk_forward_windows(0, 10 * DAY, "4d", "2d")
+    assert windows[0] == (0, 4 * DAY, 4 * DAY, 6 * DAY)
+    assert [w[2] for w in windows] == [4 * DAY, 6 * DAY, 8 * DAY]
+    assert walk_forward_windows(0, 9 * DAY, "4d", "2d", step="1d")[-1] == (4 * DAY, 8 * DAY, 8 * DAY, 9 * DAY)
+    assert walk_forward_windows(0, 3 * DAY, "4d", "2d") == []
+
+
+def test_window_backtest_uses_full_history_warmup(no_disk):
+    frames = {"AAA/USD": random_bars(3000, 1), "BBB/USD": random_bars(3000, 2)}
+    evaluator = SweepEvaluator(frames)
+    start = frames["AAA/USD"]["time"].iloc[1500] / 1000.0
+    window = (start, start + 5 * DAY)
+    got = evaluator.backtest(BT_CFG, window)
+
+    sliced = {s: df[(df["time"] / 1000.0 >= window[0]) & (df["time"] / 1000.0 < window[1])] for s, df in frames.items()}
+    signals = {s: compute_signals(frames[s], BT_CFG).loc[df.index] for s, df in sliced.items()}
+    expected = Backtester(BT_CFG).run(sliced, signals=signals)
+    assert got.trades == expected.trades and got.equity.equals(expected.equity)
+
+    evaluator.evaluate(BT_CFG, window)
+    evaluator.evaluate(apply_params(BT_CFG, {"exits.stop_loss_pct": 0.02}), window)
+    assert evaluator.signal_cache.hits >= 1 and evaluator.signal_cache.misses == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_walk_forward_picks_in_sample_best_and_chains_equity(no_disk, workers):
+    frames = {"AAA/USD": random_bars(6000, 1), "BBB/USD": random_bars(6000, 2)}
+    combos = grid_space({"strategy.momentum_pct": [0.005, 0.02], "exits.stop_loss_pct": [0.005, 0.01]})
+    result = run_walk_forward(BT_CFG, frames, combos, "7d", "3d", workers=workers)
+    windows = result.windows
+    assert len(windows) == 5  # 6000 5m bars are 20.8 days
+
+    evaluator = SweepEvaluator(frames)
+    row = windows.iloc[1]
+    scores = [evaluator.evaluate(apply_params(BT_CFG, p), (row["train_start"], row["train_end"]))["return_pct"]
+              for p in combos]
+    assert row["train_return_pct"] == pytest.approx(max(scores))
+
+    growth = (1 + windows["return_pct"]).prod()
+    assert result.summary()["final_equity"] == pytest.approx(1000.0 * growth)
+    assert result.oos.equity["time"].is_monotonic_increasing
+    assert {t["window"] for t in result.oos.trades} <= set(range(5))